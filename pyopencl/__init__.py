@@ -373,6 +373,39 @@ def enable_debugging(platform_or_context):
                 % platform.name)
 
 
+# {{{ background builds
+
+_build_executor = None
+
+
+def _get_build_executor():
+    """Return the :class:`concurrent.futures.ThreadPoolExecutor` used for
+    background builds. It has as many threads as there are CPUs, unless
+    :envvar:`PYOPENCL_BUILD_THREADS` says otherwise.
+    """
+    global _build_executor
+
+    if _build_executor is None:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            raise ImportError("building programs in the background requires "
+                    "the 'futures' package on Python 2")
+
+        max_workers = int(os.environ.get("PYOPENCL_BUILD_THREADS", "0"))
+        if not max_workers:
+            from multiprocessing import cpu_count
+            max_workers = cpu_count()
+
+        # Creating two executors in a race is harmless; one of them is
+        # simply never used.
+        _build_executor = ThreadPoolExecutor(max_workers)
+
+    return _build_executor
+
+# }}}
+
+
 class Program(object):
     def __init__(self, arg1, arg2=None, arg3=None):
         if arg2 is None:
@@ -493,6 +526,12 @@ class Program(object):
         import os
         build_descr = None
 
+        record_filename = os.environ.get("PYOPENCL_RECORD_MANIFEST")
+        if record_filename and self._prg is None:
+            from pyopencl.precompile import record_build
+            record_build(record_filename, self._source, options,
+                    devices if devices is not None else self._context.devices)
+
         if os.environ.get("PYOPENCL_NO_CACHE") and self._prg is None:
             build_descr = "uncached source build (cache disabled by user)"
             self._prg = _cl._Program(self._context, self._source)
@@ -534,6 +573,10 @@ class Program(object):
 
         return self
 
+    def build_async(self, options=[], devices=None, cache_dir=None):
+        return _get_build_executor().submit(
+                self.build, options, devices, cache_dir)
+
     def _build_and_catch_errors(self, build_func, options_bytes, source=None):
         try:
             return build_func()
@@ -784,6 +827,7 @@ def _add_functionality():
     kernel_old_init = Kernel.__init__
     kernel_old_get_info = Kernel.get_info
     kernel_old_get_work_group_info = Kernel.get_work_group_info
+    kernel_old_set_arg = Kernel.set_arg
 
     def kernel_init(self, prg, name):
         if not isinstance(prg, _cl._Program):
@@ -802,10 +846,17 @@ def _add_functionality():
                 None,
                 warn_about_arg_count_bug=None,
                 work_around_arg_count_bug=None)
+        self._forget_set_args()
 
         self._wg_info_cache = {}
         return self
 
+    def kernel__forget_set_args(self):
+        # The invoker skips setting arguments that are the same as in the
+        # last invocation, which is recorded here.
+        self._pyopencl_last_scalar_buf = None
+        self._pyopencl_last_obj_args = None
+
     def kernel_set_scalar_arg_dtypes(self, scalar_arg_dtypes):
         self._scalar_arg_dtypes = tuple(scalar_arg_dtypes)
 
@@ -840,6 +891,11 @@ def _add_functionality():
                 self._scalar_arg_dtypes,
                 warn_about_arg_count_bug=warn_about_arg_count_bug,
                 work_around_arg_count_bug=work_around_arg_count_bug)
+        self._forget_set_args()
+
+    def kernel_set_arg(self, index, arg):
+        self._forget_set_args()
+        kernel_old_set_arg(self, index, arg)
 
     def kernel_get_work_group_info(self, param, device):
         try:
@@ -876,6 +932,8 @@ def _add_functionality():
 
     Kernel.__init__ = kernel_init
     Kernel._setup = kernel__setup
+    Kernel._forget_set_args = kernel__forget_set_args
+    Kernel.set_arg = kernel_set_arg
     Kernel.get_work_group_info = kernel_get_work_group_info
     Kernel.set_scalar_arg_dtypes = kernel_set_scalar_arg_dtypes
     Kernel.set_args = kernel_set_args
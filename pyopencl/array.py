@@ -45,6 +45,7 @@ from pyopencl.compyte.array import (
         get_common_dtype as _get_common_dtype_base)
 from pyopencl.characterize import has_double_support
 from pyopencl import cltypes
+from pyopencl import autotune
 
 
 def _get_common_dtype(obj1, obj2, queue):
@@ -118,11 +119,184 @@ def splay(queue, n, kernel_specific_max_wg_size=None):
     return (group_count*work_items_per_group,), (work_items_per_group,)
 
 
+def _get_elwise_launch_sizes(queue, knl, n, args):
+    """Return the global and local size to launch the element-wise kernel
+    *knl* with *args* over *n* work items, as determined by
+    :mod:`pyopencl.autotune` if it is enabled, otherwise by :func:`splay`.
+    """
+    if autotune.is_autotuning_enabled():
+        sizes = autotune.get_tuned_sizes(queue, knl, n, args)
+        if sizes is not None:
+            return sizes
+
+    return splay(queue, n,
+            knl.get_work_group_info(
+                cl.kernel_work_group_info.WORK_GROUP_SIZE,
+                queue.device))
+
+
+def _get_elwise_layout(shape, strides_list):
+    """Return a tuple ``(shape, strides_list)`` describing the same elements
+    in the same order, with axes of extent one removed and adjacent axes
+    merged wherever the strides in all of *strides_list* allow.
+    """
+    axes = [axis for axis, extent in enumerate(shape) if extent != 1]
+    new_shape = [shape[axis] for axis in axes]
+    new_strides_list = [[strides[axis] for axis in axes]
+            for strides in strides_list]
+
+    axis = len(new_shape) - 1
+    while axis > 0:
+        if all(strides[axis-1] == strides[axis]*new_shape[axis]
+                for strides in new_strides_list):
+            new_shape[axis-1] *= new_shape[axis]
+            del new_shape[axis]
+            for strides in new_strides_list:
+                del strides[axis-1]
+
+        axis -= 1
+
+    if not new_shape:
+        new_shape = [1]
+        new_strides_list = [[0] for strides in strides_list]
+
+    return tuple(new_shape), [tuple(strides) for strides in new_strides_list]
+
+
+def _get_strided_elwise_kernel_and_args(knl, repr_ary, args):
+    """Return a variant of the element-wise kernel *knl* that accepts the
+    (possibly non-contiguous) arrays among *args*, along with the arguments
+    to pass in addition to those *knl* takes, or ``(None, None)`` if this
+    is not possible.
+    """
+    arrays = [arg for arg in args if isinstance(arg, Array)]
+    if any(ary.shape != repr_ary.shape for ary in arrays):
+        return None, None
+
+    shape, strides_list = _get_elwise_layout(
+            repr_ary.shape, [ary.strides for ary in arrays])
+
+    is_strided = [
+            strides != _c_contiguous_strides(ary.dtype.itemsize, shape)
+            for ary, strides in zip(arrays, strides_list)]
+
+    strided_knl = elementwise.get_strided_elwise_kernel(
+            knl, len(shape), is_strided)
+    if strided_knl is None:
+        return None, None
+
+    extra_args = list(shape)
+    for strided, strides in zip(is_strided, strides_list):
+        if strided:
+            extra_args.extend(strides)
+
+    return strided_knl, extra_args
+
+
+# {{{ broadcasting
+
+def _get_broadcast_shape(*shapes):
+    """Return the shape that arrays of *shapes* broadcast to, following
+    the rules of :mod:`numpy`.
+    """
+    ndim = max(len(shape) for shape in shapes)
+
+    result = []
+    for axis in range(ndim):
+        extent = 1
+        for shape in shapes:
+            shape_axis = axis - (ndim - len(shape))
+            if shape_axis < 0 or shape[shape_axis] == 1:
+                continue
+
+            if extent != 1 and shape[shape_axis] != extent:
+                raise ValueError("operands could not be broadcast together "
+                        "with shapes %s"
+                        % " ".join(str(shape) for shape in shapes))
+            extent = shape[shape_axis]
+
+        result.append(extent)
+
+    return tuple(result)
+
+
+def _broadcast_to(ary, shape):
+    """Return a view of *ary* with shape *shape*, in which broadcast axes
+    have a stride of zero.
+    """
+    if ary.shape == shape:
+        return ary
+
+    if _get_broadcast_shape(ary.shape, shape) != shape:
+        raise ValueError("cannot broadcast array of shape %s to shape %s"
+                % (ary.shape, shape))
+
+    lead_ndim = len(shape) - len(ary.shape)
+    strides = (0,)*lead_ndim + tuple(
+            0 if ary_extent == 1 and extent != 1 else stride
+            for ary_extent, extent, stride in zip(
+                ary.shape, shape[lead_ndim:], ary.strides))
+
+    return ary._new_with_changes(ary.base_data, ary.offset,
+            shape=shape, strides=strides)
+
+# }}}
+
+
+def _get_out_array(out, like, dtype=None, shape=None, queue=None):
+    """Return *out*, after checking that it has shape *shape* and dtype
+    *dtype*, or, if *out* is *None*, a new array of that shape and dtype
+    allocated like *like*. *shape* and *dtype* default to those of *like*.
+    """
+    if dtype is None:
+        dtype = like.dtype
+    else:
+        dtype = np.dtype(dtype)
+    if shape is None:
+        shape = like.shape
+
+    if out is None:
+        if shape == like.shape:
+            return like._new_like_me(dtype, queue=queue)
+
+        queue = queue or like.queue
+        if queue is not None:
+            return Array(queue, shape, dtype, allocator=like.allocator)
+        else:
+            return Array(like.context, shape, dtype, allocator=like.allocator)
+
+    if not isinstance(out, Array):
+        raise TypeError("'out' must be an Array, not '%s'" % type(out).__name__)
+    if out.shape != shape:
+        raise ValueError("'out' has shape %s, but the result has shape %s"
+                % (out.shape, shape))
+    if out.dtype != dtype:
+        raise TypeError("'out' has dtype %s, but the result has dtype %s"
+                % (out.dtype, dtype))
+
+    return out
+
+
+# Below this number of entries, launch overhead outweighs the gain in
+# bandwidth from vector loads and stores.
+_MIN_VECTORIZED_SIZE = 1 << 14
+
+
 def elwise_kernel_runner(kernel_getter):
     """Take a kernel getter of the same signature as the kernel
     and return a function that invokes that kernel.
 
     Assumes that the zeroth entry in *args* is an :class:`Array`.
+
+    Arrays among the arguments that have the same shape as the zeroth one but
+    differ from it in their strides (e.g. because they are non-contiguous)
+    are handled by a variant of the kernel that indexes them through their
+    strides, as long as the kernel only accesses them at the current index
+    ``i``. Otherwise, all arrays must be contiguous.
+
+    Large contiguous arrays whose offsets are suitably aligned are processed
+    by a variant of the kernel using vector loads and stores, if
+    :func:`pyopencl.elementwise.get_vectorized_elwise_kernel` provides one.
     """
 
     def kernel_runner(*args, **kwargs):
@@ -138,19 +312,18 @@ def elwise_kernel_runner(kernel_getter):
 
         knl = kernel_getter(*args, **kwargs)
 
-        gs, ls = repr_ary.get_sizes(queue,
-                knl.get_work_group_info(
-                    cl.kernel_work_group_info.WORK_GROUP_SIZE,
-                    queue.device))
-
         assert isinstance(repr_ary, Array)
 
         actual_args = []
+        all_forc = True
+        same_layout = True
         for arg in args:
             if isinstance(arg, Array):
                 if not arg.flags.forc:
-                    raise RuntimeError("only contiguous arrays may "
-                            "be used as arguments to this operation")
+                    all_forc = False
+                if arg.shape == repr_ary.shape and not _equal_strides(
+                        arg.strides, repr_ary.strides, repr_ary.shape):
+                    same_layout = False
                 actual_args.append(arg.base_data)
                 actual_args.append(arg.offset)
                 wait_for.extend(arg.events)
@@ -158,6 +331,34 @@ def elwise_kernel_runner(kernel_getter):
                 actual_args.append(arg)
         actual_args.append(repr_ary.size)
 
+        strided_knl = None
+        if not (all_forc and same_layout):
+            strided_knl, extra_args = _get_strided_elwise_kernel_and_args(
+                    knl, repr_ary, args)
+
+            if strided_knl is None and not all_forc:
+                raise RuntimeError("only contiguous arrays may "
+                        "be used as arguments to this operation")
+
+        vector_width = 1
+        if strided_knl is None and repr_ary.size >= _MIN_VECTORIZED_SIZE:
+            vector_knl, vector_width = elementwise.get_vectorized_elwise_kernel(
+                    knl, queue.device)
+
+            if vector_knl is not None and all(
+                    arg.offset % (vector_width*arg.dtype.itemsize) == 0
+                    for arg in args if isinstance(arg, Array)):
+                knl = vector_knl
+            else:
+                vector_width = 1
+
+        if strided_knl is not None:
+            knl = strided_knl
+            actual_args.extend(extra_args)
+
+        gs, ls = _get_elwise_launch_sizes(queue, knl,
+                repr_ary.size // vector_width, actual_args)
+
         return knl(queue, gs, ls, *actual_args, wait_for=wait_for)
 
     try:
@@ -168,6 +369,27 @@ def elwise_kernel_runner(kernel_getter):
         return update_wrapper(kernel_runner, kernel_getter)
 
 
+def broadcasting_elwise_kernel_runner(kernel_getter):
+    """Like :func:`elwise_kernel_runner`, but broadcast the arrays among
+    *args* after the zeroth one to the shape of the zeroth one, which is
+    the output. Broadcast axes are indexed with a stride of zero, so no
+    broadcast array is ever expanded in memory.
+    """
+    runner = elwise_kernel_runner(kernel_getter)
+
+    def broadcasting_kernel_runner(out, *args, **kwargs):
+        args = [_broadcast_to(arg, out.shape) if isinstance(arg, Array) else arg
+                for arg in args]
+        return runner(out, *args, **kwargs)
+
+    try:
+        from functools import update_wrapper
+    except ImportError:
+        return broadcasting_kernel_runner
+    else:
+        return update_wrapper(broadcasting_kernel_runner, kernel_getter)
+
+
 class DefaultAllocator(cl.tools.DeferredAllocator):
     def __init__(self, *args, **kwargs):
         from warnings import warn
@@ -322,6 +544,14 @@ class Array(object):
     .. automethod :: __rdiv__
     .. automethod :: __pow__
 
+    The shapes of array operands of arithmetic, bitwise and comparison
+    operators are broadcast against each other as in :mod:`numpy`, without
+    expanding broadcast operands in memory. In-place operators broadcast
+    the right-hand operand to the shape of the array being updated.
+
+    .. versionchanged:: 2019.2
+        Added broadcasting.
+
     .. automethod :: __and__
     .. automethod :: __xor__
     .. automethod :: __or__
@@ -571,13 +801,29 @@ class Array(object):
                 queue=queue)
 
     #@memoize_method FIXME: reenable
-    def get_sizes(self, queue, kernel_specific_max_wg_size=None):
+    def get_sizes(self, queue, kernel_specific_max_wg_size=None, kernel=None,
+            kernel_args=None):
+        """Return the global and local size for launching an element-wise
+        kernel over *self*. If *kernel* and its arguments *kernel_args* are
+        given and :mod:`pyopencl.autotune` is enabled, the sizes are tuned
+        for *kernel*.
+
+        .. versionchanged:: 2019.2
+            Added *kernel* and *kernel_args*.
+        """
         if not self.flags.forc:
             raise NotImplementedError("cannot operate on non-contiguous array")
+
+        if kernel is not None and autotune.is_autotuning_enabled():
+            sizes = autotune.get_tuned_sizes(queue, kernel, self.size,
+                    kernel_args)
+            if sizes is not None:
+                return sizes
+
         return splay(queue, self.size,
                 kernel_specific_max_wg_size=kernel_specific_max_wg_size)
 
-    def set(self, ary, queue=None, async_=None, **kwargs):
+    def set(self, ary, queue=None, async_=None, host_pool=None, **kwargs):
         """Transfer the contents the :class:`numpy.ndarray` object *ary*
         onto the device.
 
@@ -588,6 +834,15 @@ class Array(object):
         to return before the transfer completes. To avoid synchronization
         bugs, this defaults to *False*.
 
+        If *host_pool* (a :class:`pyopencl.tools.PinnedHostMemoryPool`) is
+        given, *ary* is first copied into pinned memory from it, which is
+        then transferred. *ary* may then be modified as soon as this method
+        returns, even if *async_* is *True*.
+
+        .. versionchanged:: 2019.2
+
+            *host_pool* was added.
+
         .. versionchanged:: 2017.2.1
 
             Python 3.7 makes ``async`` a reserved keyword. On older Pythons,
@@ -627,12 +882,17 @@ class Array(object):
                     stacklevel=2)
 
         if self.size:
+            if host_pool is not None:
+                staging_ary = host_pool.empty(ary.size, ary.dtype)
+                staging_ary[:] = ary.ravel(order="K")
+                ary = staging_ary
+
             event1 = cl.enqueue_copy(queue or self.queue, self.base_data, ary,
                     device_offset=self.offset,
                     is_blocking=not async_)
             self.add_event(event1)
 
-    def _get(self, queue=None, ary=None, async_=None, **kwargs):
+    def _get(self, queue=None, ary=None, async_=None, host_pool=None, **kwargs):
         # {{{ handle 'async' deprecation
 
         async_arg = kwargs.pop("async", None)
@@ -651,7 +911,12 @@ class Array(object):
         # }}}
 
         if ary is None:
-            ary = np.empty(self.shape, self.dtype)
+            if host_pool is not None:
+                ary = host_pool.empty(self.shape, self.dtype,
+                        order="F" if (self.flags.f_contiguous
+                            and not self.flags.c_contiguous) else "C")
+            else:
+                ary = np.empty(self.shape, self.dtype)
 
             if self.strides != ary.strides:
                 ary = _as_strided(ary, strides=self.strides)
@@ -686,10 +951,16 @@ class Array(object):
 
         return ary, event1
 
-    def get(self, queue=None, ary=None, async_=None, **kwargs):
+    def get(self, queue=None, ary=None, async_=None, host_pool=None, **kwargs):
         """Transfer the contents of *self* into *ary* or a newly allocated
         :mod:`numpy.ndarray`. If *ary* is given, it must have the same
-        shape and dtype.
+        shape and dtype. If *ary* is not given and *host_pool* (a
+        :class:`pyopencl.tools.PinnedHostMemoryPool`) is, the result is
+        allocated from *host_pool*.
+
+        .. versionchanged:: 2019.2
+
+            *host_pool* was added.
 
         .. versionchanged:: 2019.1.2
 
@@ -718,11 +989,12 @@ class Array(object):
                     "device-to-host transfers",
                     DeprecationWarning, 2)
 
-        ary, event1 = self._get(queue=queue, ary=ary, async_=async_, **kwargs)
+        ary, event1 = self._get(queue=queue, ary=ary, async_=async_,
+                host_pool=host_pool, **kwargs)
 
         return ary
 
-    def get_async(self, queue=None, ary=None, **kwargs):
+    def get_async(self, queue=None, ary=None, host_pool=None, **kwargs):
         """
         Asynchronous version of :meth:`get` which returns a tuple ``(ary, event)``
         containing the host array `ary`
@@ -730,9 +1002,14 @@ class Array(object):
         :meth:`pyopencl.enqueue_copy`.
 
         .. versionadded:: 2019.1.2
+
+        .. versionchanged:: 2019.2
+
+            *host_pool* was added.
         """
 
-        return self._get(queue=queue, ary=ary, async_=True, **kwargs)
+        return self._get(queue=queue, ary=ary, async_=True, host_pool=host_pool,
+                **kwargs)
 
     def copy(self, queue=_copy_queue):
         """
@@ -778,7 +1055,7 @@ class Array(object):
     # {{{ kernel invocation wrappers
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _axpbyz(out, afac, a, bfac, b, queue=None):
         """Compute ``out = selffac * self + otherfac*other``,
         where *other* is an array."""
@@ -799,7 +1076,7 @@ class Array(object):
                 a.dtype, x.dtype, b.dtype, out.dtype)
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _elwise_multiply(out, a, b, queue=None):
         assert out.shape == a.shape
         assert out.shape == b.shape
@@ -815,7 +1092,7 @@ class Array(object):
                 out.context, ary.dtype, other.dtype, out.dtype)
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _div(out, self, other, queue=None):
         """Divides an array by another array."""
 
@@ -886,7 +1163,7 @@ class Array(object):
                 is_base_array=False, is_exp_array=True)
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _pow_array(result, base, exponent):
         return elementwise.get_pow_kernel(
                 result.context, base.dtype, exponent.dtype, result.dtype,
@@ -908,7 +1185,7 @@ class Array(object):
         if dtype is None:
             dtype = self.dtype
 
-        if dtype == self.dtype:
+        if dtype == self.dtype and self.flags.forc:
             strides = self.strides
 
         queue = queue or self.queue
@@ -919,6 +1196,13 @@ class Array(object):
             return self.__class__(self.context, self.shape, dtype,
                     strides=strides, allocator=self.allocator)
 
+    def _new_broadcast_like_me(self, other, dtype=None):
+        """Like :meth:`_new_like_me`, but with the shape that *self* and the
+        array *other* broadcast to.
+        """
+        return _get_out_array(None, self, dtype,
+                _get_broadcast_shape(self.shape, other.shape))
+
     @staticmethod
     @elwise_kernel_runner
     def _scalar_binop(out, a, b, queue=None, op=None):
@@ -927,10 +1211,8 @@ class Array(object):
                 np.array(b).dtype)
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _array_binop(out, a, b, queue=None, op=None):
-        if a.shape != b.shape:
-            raise ValueError("shapes of binop arguments do not match")
         return elementwise.get_array_binop_kernel(
                 out.context, op, out.dtype, a.dtype, b.dtype)
 
@@ -946,21 +1228,30 @@ class Array(object):
 
     # {{{ operators
 
-    def mul_add(self, selffac, other, otherfac, queue=None):
+    def mul_add(self, selffac, other, otherfac, queue=None, out=None,
+            wait_for=None):
         """Return `selffac * self + otherfac*other`.
+
+        .. versionchanged:: 2019.2
+            Added *out* and *wait_for*.
         """
-        result = self._new_like_me(
-                _get_common_dtype(self, other, queue or self.queue))
+        result = _get_out_array(out, self,
+                _get_common_dtype(self, other, queue or self.queue),
+                _get_broadcast_shape(self.shape, other.shape))
         result.add_event(
-                self._axpbyz(result, selffac, self, otherfac, other))
+                self._axpbyz(result, selffac, self, otherfac, other,
+                    queue=queue, wait_for=wait_for))
         return result
 
     def __add__(self, other):
         """Add an array with an array or an array with a scalar."""
 
+        if isinstance(other, LazyExpression):
+            return NotImplemented
+
         if isinstance(other, Array):
             # add another vector
-            result = self._new_like_me(
+            result = self._new_broadcast_like_me(other,
                     _get_common_dtype(self, other, self.queue))
 
             result.add_event(
@@ -986,8 +1277,11 @@ class Array(object):
     def __sub__(self, other):
         """Substract an array from an array or a scalar from an array."""
 
+        if isinstance(other, LazyExpression):
+            return NotImplemented
+
         if isinstance(other, Array):
-            result = self._new_like_me(
+            result = self._new_broadcast_like_me(other,
                     _get_common_dtype(self, other, self.queue))
             result.add_event(
                     self._axpbyz(result,
@@ -1042,13 +1336,14 @@ class Array(object):
             return self
 
     def __neg__(self):
-        result = self._new_like_me()
-        result.add_event(self._axpbz(result, -1, self, 0))
-        return result
+        return negative(self)
 
     def __mul__(self, other):
+        if isinstance(other, LazyExpression):
+            return NotImplemented
+
         if isinstance(other, Array):
-            result = self._new_like_me(
+            result = self._new_broadcast_like_me(other,
                     _get_common_dtype(self, other, self.queue))
             result.add_event(
                     self._elwise_multiply(result, self, other))
@@ -1083,8 +1378,11 @@ class Array(object):
     def __div__(self, other):
         """Divides an array by an array or a scalar, i.e. ``self / other``.
         """
+        if isinstance(other, LazyExpression):
+            return NotImplemented
+
         if isinstance(other, Array):
-            result = self._new_like_me(
+            result = self._new_broadcast_like_me(other,
                     _get_common_dtype(self, other, self.queue))
             result.add_event(self._div(result, self, other))
         else:
@@ -1107,7 +1405,7 @@ class Array(object):
         """
 
         if isinstance(other, Array):
-            result = self._new_like_me(
+            result = self._new_broadcast_like_me(other,
                     _get_common_dtype(self, other, self.queue))
             result.add_event(other._div(result, self))
         else:
@@ -1122,59 +1420,17 @@ class Array(object):
     __rtruediv__ = __rdiv__
 
     def __and__(self, other):
-        common_dtype = _get_common_dtype(self, other, self.queue)
-
-        if not np.issubdtype(common_dtype, np.integer):
-            raise TypeError("Integral types only")
-
-        if isinstance(other, Array):
-            result = self._new_like_me(common_dtype)
-            result.add_event(self._array_binop(result, self, other, op="&"))
-        else:
-            # create a new array for the result
-            result = self._new_like_me(common_dtype)
-            result.add_event(
-                    self._scalar_binop(result, self, other, op="&"))
-
-        return result
+        return bitwise_and(self, other)
 
     __rand__ = __and__  # commutes
 
     def __or__(self, other):
-        common_dtype = _get_common_dtype(self, other, self.queue)
-
-        if not np.issubdtype(common_dtype, np.integer):
-            raise TypeError("Integral types only")
-
-        if isinstance(other, Array):
-            result = self._new_like_me(common_dtype)
-            result.add_event(self._array_binop(result, self, other, op="|"))
-        else:
-            # create a new array for the result
-            result = self._new_like_me(common_dtype)
-            result.add_event(
-                    self._scalar_binop(result, self, other, op="|"))
-
-        return result
+        return bitwise_or(self, other)
 
     __ror__ = __or__  # commutes
 
     def __xor__(self, other):
-        common_dtype = _get_common_dtype(self, other, self.queue)
-
-        if not np.issubdtype(common_dtype, np.integer):
-            raise TypeError("Integral types only")
-
-        if isinstance(other, Array):
-            result = self._new_like_me(common_dtype)
-            result.add_event(self._array_binop(result, self, other, op="^"))
-        else:
-            # create a new array for the result
-            result = self._new_like_me(common_dtype)
-            result.add_event(
-                    self._scalar_binop(result, self, other, op="^"))
-
-        return result
+        return bitwise_xor(self, other)
 
     __rxor__ = __xor__  # commutes
 
@@ -1256,66 +1512,50 @@ class Array(object):
         """Return a `Array` of the absolute values of the elements
         of *self*.
         """
-
-        result = self._new_like_me(self.dtype.type(0).real.dtype)
-        result.add_event(self._abs(result, self))
-        return result
+        return absolute(self)
 
     def __pow__(self, other):
         """Exponentiation by a scalar or elementwise by another
         :class:`Array`.
         """
 
-        if isinstance(other, Array):
-            assert self.shape == other.shape
-
-            result = self._new_like_me(
-                    _get_common_dtype(self, other, self.queue))
-            result.add_event(
-                    self._pow_array(result, self, other))
-        else:
-            result = self._new_like_me(
-                    _get_common_dtype(self, other, self.queue))
-            result.add_event(self._pow_scalar(result, self, other))
+        if isinstance(other, LazyExpression):
+            return NotImplemented
 
-        return result
+        return power(self, other)
 
     def __rpow__(self, other):
         # other must be a scalar
-        common_dtype = _get_common_dtype(self, other, self.queue)
-        result = self._new_like_me(common_dtype)
-        result.add_event(
-                self._rpow_scalar(result, common_dtype.type(other), self))
-        return result
+        return power(other, self)
 
     def __invert__(self):
-        if not np.issubdtype(self.dtype, np.integer):
-            raise TypeError("Integral types only")
-
-        result = self._new_like_me()
-        result.add_event(self._unop(result, self, op="~"))
-
-        return result
+        return bitwise_not(self)
 
     # }}}
 
-    def reverse(self, queue=None):
+    def reverse(self, queue=None, out=None, wait_for=None):
         """Return this array in reversed order. The array is treated
         as one-dimensional.
         """
 
-        result = self._new_like_me()
+        result = _get_out_array(out, self, queue=queue)
         result.add_event(
-                self._reverse(result, self))
+                self._reverse(result, self, queue=queue, wait_for=wait_for))
         return result
 
-    def astype(self, dtype, queue=None):
-        """Return a copy of *self*, cast to *dtype*."""
-        if dtype == self.dtype:
+    def astype(self, dtype, queue=None, out=None, wait_for=None):
+        """Return a copy of *self*, cast to *dtype*. If *out* is given, the
+        result is written to it and *out* is returned.
+
+        .. versionchanged:: 2019.2
+            Added *out* and *wait_for*.
+        """
+        if dtype == self.dtype and out is None and wait_for is None:
             return self.copy()
 
-        result = self._new_like_me(dtype=dtype)
-        result.add_event(self._copy(result, self, queue=queue))
+        result = _get_out_array(out, self, dtype, queue=queue)
+        result.add_event(
+                self._copy(result, self, queue=queue, wait_for=wait_for))
         return result
 
     # {{{ rich comparisons, any, all
@@ -1356,83 +1596,28 @@ class Array(object):
                 out.context, op, a.dtype)
 
     @staticmethod
-    @elwise_kernel_runner
+    @broadcasting_elwise_kernel_runner
     def _array_comparison(out, a, b, queue=None, op=None):
-        if a.shape != b.shape:
-            raise ValueError("shapes of comparison arguments do not match")
         return elementwise.get_array_comparison_kernel(
                 out.context, op, a.dtype, b.dtype)
 
     def __eq__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op="=="))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._scalar_comparison(result, self, other, op="=="))
-            return result
+        return equal(self, other)
 
     def __ne__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op="!="))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._scalar_comparison(result, self, other, op="!="))
-            return result
+        return not_equal(self, other)
 
     def __le__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op="<="))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            self._scalar_comparison(result, self, other, op="<=")
-            return result
+        return less_equal(self, other)
 
     def __ge__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op=">="))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._scalar_comparison(result, self, other, op=">="))
-            return result
+        return greater_equal(self, other)
 
     def __lt__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op="<"))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._scalar_comparison(result, self, other, op="<"))
-            return result
+        return less(self, other)
 
     def __gt__(self, other):
-        if isinstance(other, Array):
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._array_comparison(result, self, other, op=">"))
-            return result
-        else:
-            result = self._new_like_me(np.int8)
-            result.add_event(
-                    self._scalar_comparison(result, self, other, op=">"))
-            return result
+        return greater(self, other)
 
     # }}}
 
@@ -1890,9 +2075,6 @@ class Array(object):
             if subarray.shape != value.shape:
                 raise ValueError("cannot assign between arrays of "
                         "differing shapes")
-            if subarray.strides != value.strides:
-                raise ValueError("cannot assign between arrays of "
-                        "differing strides")
 
             self.add_event(
                     self._copy(subarray, value, queue=queue, wait_for=wait_for))
@@ -1946,7 +2128,7 @@ class _same_as_transfer(object):  # noqa
 
 
 def to_device(queue, ary, allocator=None, async_=None,
-        array_queue=_same_as_transfer, **kwargs):
+        array_queue=_same_as_transfer, host_pool=None, **kwargs):
     """Return a :class:`Array` that is an exact copy of the
     :class:`numpy.ndarray` instance *ary*.
 
@@ -1955,7 +2137,8 @@ def to_device(queue, ary, allocator=None, async_=None,
         to make sure there is no implicit queue associated
         with the array by passing *None*.
 
-    See :class:`Array` for the meaning of *allocator*.
+    See :class:`Array` for the meaning of *allocator*, and
+    :meth:`Array.set` for the meaning of *host_pool*.
 
     .. versionchanged:: 2015.2
         *array_queue* argument was added.
@@ -1966,6 +2149,9 @@ def to_device(queue, ary, allocator=None, async_=None,
         we will continue to  accept *async* as a parameter, however this
         should be considered deprecated. *async_* is the new, official
         spelling.
+
+    .. versionchanged:: 2019.2
+        *host_pool* argument was added.
     """
 
     # {{{ handle 'async' deprecation
@@ -1995,7 +2181,7 @@ def to_device(queue, ary, allocator=None, async_=None,
 
     result = Array(first_arg, ary.shape, ary.dtype,
                     allocator=allocator, strides=ary.strides)
-    result.set(ary, async_=async_, queue=queue)
+    result.set(ary, async_=async_, queue=queue, host_pool=host_pool)
     return result
 
 
@@ -2391,9 +2577,13 @@ def multi_put(arrays, dest_indices, dest_shape=None, out=None, queue=None,
     return out
 
 
-def concatenate(arrays, axis=0, queue=None, allocator=None):
+def concatenate(arrays, axis=0, queue=None, allocator=None, out=None,
+        wait_for=None):
     """
     .. versionadded:: 2013.1
+
+    .. versionchanged:: 2019.2
+        Added *out* and *wait_for*.
     """
     # {{{ find properties of result array
 
@@ -2424,7 +2614,10 @@ def concatenate(arrays, axis=0, queue=None, allocator=None):
 
     shape = tuple(shape)
     dtype = np.find_common_type([ary.dtype for ary in arrays], [])
-    result = empty(queue, shape, dtype, allocator=allocator)
+    if out is None:
+        result = empty(queue, shape, dtype, allocator=allocator)
+    else:
+        result = _get_out_array(out, arrays[0], dtype, shape)
 
     full_slice = (slice(None),) * len(shape)
 
@@ -2435,7 +2628,7 @@ def concatenate(arrays, axis=0, queue=None, allocator=None):
                 full_slice[:axis]
                 + (slice(base_idx, base_idx+my_len),)
                 + full_slice[axis+1:],
-                ary)
+                ary, queue=queue, wait_for=wait_for)
 
         base_idx += my_len
 
@@ -2447,9 +2640,12 @@ def _diff(result, array):
     return elementwise.get_diff_kernel(array.context, array.dtype)
 
 
-def diff(array, queue=None, allocator=None):
+def diff(array, queue=None, allocator=None, out=None, wait_for=None):
     """
     .. versionadded:: 2013.2
+
+    .. versionchanged:: 2019.2
+        Added *out* and *wait_for*.
     """
 
     if len(array.shape) != 1:
@@ -2460,8 +2656,11 @@ def diff(array, queue=None, allocator=None):
     queue = queue or array.queue
     allocator = allocator or array.allocator
 
-    result = empty(queue, (n-1,), array.dtype, allocator=allocator)
-    event1 = _diff(result, array, queue=queue)
+    if out is None:
+        result = empty(queue, (n-1,), array.dtype, allocator=allocator)
+    else:
+        result = _get_out_array(out, array, shape=(n-1,))
+    event1 = _diff(result, array, queue=queue, wait_for=wait_for)
     result.add_event(event1)
     return result
 
@@ -2522,86 +2721,963 @@ def reshape(a, shape):
 # }}}
 
 
-# {{{ conditionals
+# {{{ arithmetic
 
-@elwise_kernel_runner
-def _if_positive(result, criterion, then_, else_):
-    return elementwise.get_if_positive_kernel(
-            result.context, criterion.dtype, then_.dtype)
+def _get_arithmetic_result(a, b, out, queue, dtype=None):
+    if isinstance(a, Array):
+        like = a
+    else:
+        like = b
 
+    queue = queue or like.queue
 
-def if_positive(criterion, then_, else_, out=None, queue=None):
-    """Return an array like *then_*, which, for the element at index *i*,
-    contains *then_[i]* if *criterion[i]>0*, else *else_[i]*.
-    """
+    shape = like.shape
+    if isinstance(a, Array) and isinstance(b, Array):
+        shape = _get_broadcast_shape(a.shape, b.shape)
 
-    if not (criterion.shape == then_.shape == else_.shape):
-        raise ValueError("shapes do not match")
+    if dtype is None:
+        dtype = _get_common_dtype(a, b, queue)
 
-    if not (then_.dtype == else_.dtype):
-        raise ValueError("dtypes do not match")
+    return _get_out_array(out, like, dtype, shape, queue=queue)
 
-    if out is None:
-        out = empty_like(then_)
-    event1 = _if_positive(out, criterion, then_, else_, queue=queue)
-    out.add_event(event1)
-    return out
 
+def add(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a + b``, where at least one of *a* and *b* is an
+    :class:`Array`, and the other one may be a scalar. If *out* is given,
+    the result is written to it and *out* is returned.
 
-def maximum(a, b, out=None, queue=None):
-    """Return the elementwise maximum of *a* and *b*."""
+    .. versionadded:: 2019.2
+    """
+    result = _get_arithmetic_result(a, b, out, queue)
 
-    # silly, but functional
-    return if_positive(a.mul_add(1, b, -1, queue=queue), a, b,
-            queue=queue, out=out)
+    if isinstance(a, Array) and isinstance(b, Array):
+        evt = Array._axpbyz(result, a.dtype.type(1), a, b.dtype.type(1), b,
+                queue=queue, wait_for=wait_for)
+    else:
+        if not isinstance(a, Array):
+            a, b = b, a
+        evt = Array._axpbz(result, a.dtype.type(1), a, result.dtype.type(b),
+                queue=queue, wait_for=wait_for)
 
+    result.add_event(evt)
+    return result
 
-def minimum(a, b, out=None, queue=None):
-    """Return the elementwise minimum of *a* and *b*."""
-    # silly, but functional
-    return if_positive(a.mul_add(1, b, -1, queue=queue), b, a,
-            queue=queue, out=out)
 
-# }}}
+def subtract(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a - b``, where at least one of *a* and *b* is an
+    :class:`Array`, and the other one may be a scalar. If *out* is given,
+    the result is written to it and *out* is returned.
 
+    .. versionadded:: 2019.2
+    """
+    result = _get_arithmetic_result(a, b, out, queue)
+
+    if isinstance(a, Array) and isinstance(b, Array):
+        evt = Array._axpbyz(result, a.dtype.type(1), a, b.dtype.type(-1), b,
+                queue=queue, wait_for=wait_for)
+    elif isinstance(a, Array):
+        evt = Array._axpbz(result, a.dtype.type(1), a, result.dtype.type(-b),
+                queue=queue, wait_for=wait_for)
+    else:
+        evt = Array._axpbz(result, b.dtype.type(-1), b, result.dtype.type(a),
+                queue=queue, wait_for=wait_for)
 
-# {{{ reductions
-_builtin_sum = sum
-_builtin_min = min
-_builtin_max = max
+    result.add_event(evt)
+    return result
 
 
-def sum(a, dtype=None, queue=None, slice=None):
-    """
-    .. versionadded:: 2011.1
+def multiply(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a * b``, where at least one of *a* and *b* is an
+    :class:`Array`, and the other one may be a scalar. If *out* is given,
+    the result is written to it and *out* is returned.
+
+    .. versionadded:: 2019.2
     """
-    from pyopencl.reduction import get_sum_kernel
-    krnl = get_sum_kernel(a.context, dtype, a.dtype)
-    result, event1 = krnl(a, queue=queue, slice=slice, wait_for=a.events,
-            return_event=True)
-    result.add_event(event1)
+    result = _get_arithmetic_result(a, b, out, queue)
+
+    if isinstance(a, Array) and isinstance(b, Array):
+        evt = Array._elwise_multiply(result, a, b,
+                queue=queue, wait_for=wait_for)
+    else:
+        if not isinstance(a, Array):
+            a, b = b, a
+        evt = Array._axpbz(result, result.dtype.type(b), a, a.dtype.type(0),
+                queue=queue, wait_for=wait_for)
+
+    result.add_event(evt)
     return result
 
 
-def dot(a, b, dtype=None, queue=None, slice=None):
-    """
-    .. versionadded:: 2011.1
+def divide(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a / b``, where at least one of *a* and *b* is an
+    :class:`Array`, and the other one may be a scalar. If *out* is given,
+    the result is written to it and *out* is returned.
+
+    .. versionadded:: 2019.2
     """
-    from pyopencl.reduction import get_dot_kernel
-    krnl = get_dot_kernel(a.context, dtype, a.dtype, b.dtype)
-    result, event1 = krnl(a, b, queue=queue, slice=slice,
-            wait_for=a.events + b.events, return_event=True)
-    result.add_event(event1)
+    result = _get_arithmetic_result(a, b, out, queue)
+
+    if isinstance(a, Array) and isinstance(b, Array):
+        evt = Array._div(result, a, b, queue=queue, wait_for=wait_for)
+    elif isinstance(a, Array):
+        evt = Array._axpbz(result, result.dtype.type(1/b), a, a.dtype.type(0),
+                queue=queue, wait_for=wait_for)
+    else:
+        evt = Array._rdiv_scalar(result, b, result.dtype.type(a),
+                queue=queue, wait_for=wait_for)
+
+    result.add_event(evt)
     return result
 
 
-def vdot(a, b, dtype=None, queue=None, slice=None):
-    """Like :func:`numpy.vdot`.
+def power(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a ** b``, where at least one of *a* and *b* is an
+    :class:`Array`, and the other one may be a scalar. If *out* is given,
+    the result is written to it and *out* is returned.
 
-    .. versionadded:: 2013.1
+    .. versionadded:: 2019.2
     """
-    from pyopencl.reduction import get_dot_kernel
-    krnl = get_dot_kernel(a.context, dtype, a.dtype, b.dtype,
+    result = _get_arithmetic_result(a, b, out, queue)
+
+    if isinstance(a, Array) and isinstance(b, Array):
+        evt = Array._pow_array(result, a, b, queue=queue, wait_for=wait_for)
+    elif isinstance(a, Array):
+        evt = Array._pow_scalar(result, a, b, queue=queue, wait_for=wait_for)
+    else:
+        evt = Array._rpow_scalar(result, result.dtype.type(a), b,
+                queue=queue, wait_for=wait_for)
+
+    result.add_event(evt)
+    return result
+
+
+def negative(a, out=None, queue=None, wait_for=None):
+    """Return ``-a``. If *out* is given, the result is written to it and
+    *out* is returned.
+
+    .. versionadded:: 2019.2
+    """
+    result = _get_out_array(out, a, queue=queue)
+    result.add_event(
+            Array._axpbz(result, -1, a, 0, queue=queue, wait_for=wait_for))
+    return result
+
+
+def absolute(a, out=None, queue=None, wait_for=None):
+    """Return the absolute values of the elements of *a*, which are real
+    also for complex *a*. If *out* is given, the result is written to it
+    and *out* is returned.
+
+    .. versionadded:: 2019.2
+    """
+    result = _get_out_array(out, a, a.dtype.type(0).real.dtype, queue=queue)
+    result.add_event(
+            Array._abs(result, a, queue=queue, wait_for=wait_for))
+    return result
+
+# }}}
+
+
+# {{{ complex-valued functions
+
+def real(a, out=None, queue=None, wait_for=None):
+    """Return the real part of *a*. Unlike :attr:`Array.real`, this returns
+    a copy of *a* (or *out*) if *a* is real.
+
+    .. versionadded:: 2019.2
+    """
+    result = _get_out_array(out, a, a.dtype.type(0).real.dtype, queue=queue)
+    if a.dtype.kind == "c":
+        evt = Array._real(result, a, queue=queue, wait_for=wait_for)
+    else:
+        evt = Array._copy(result, a, queue=queue, wait_for=wait_for)
+
+    result.add_event(evt)
+    return result
+
+
+def imag(a, out=None, queue=None, wait_for=None):
+    """Return the imaginary part of *a*, which is zero if *a* is real.
+
+    .. versionadded:: 2019.2
+    """
+    result = _get_out_array(out, a, a.dtype.type(0).real.dtype, queue=queue)
+    if a.dtype.kind == "c":
+        result.add_event(
+                Array._imag(result, a, queue=queue, wait_for=wait_for))
+    else:
+        result.fill(0, queue=queue, wait_for=wait_for)
+
+    return result
+
+
+def conj(a, out=None, queue=None, wait_for=None):
+    """Return the complex conjugate of *a*. Unlike :meth:`Array.conj`, this
+    returns a copy of *a* (or *out*) if *a* is real.
+
+    .. versionadded:: 2019.2
+    """
+    result = _get_out_array(out, a, queue=queue)
+    if a.dtype.kind == "c":
+        evt = Array._conj(result, a, queue=queue, wait_for=wait_for)
+    else:
+        evt = Array._copy(result, a, queue=queue, wait_for=wait_for)
+
+    result.add_event(evt)
+    return result
+
+# }}}
+
+
+# {{{ bitwise operations
+
+def _bitwise_binop(op, a, b, out, queue, wait_for):
+    if not isinstance(a, Array):
+        # all bitwise operations commute
+        a, b = b, a
+
+    dtype = _get_common_dtype(a, b, queue or a.queue)
+    if not np.issubdtype(dtype, np.integer):
+        raise TypeError("Integral types only")
+
+    result = _get_arithmetic_result(a, b, out, queue, dtype)
+
+    if isinstance(b, Array):
+        evt = Array._array_binop(result, a, b,
+                queue=queue, wait_for=wait_for, op=op)
+    else:
+        evt = Array._scalar_binop(result, a, b,
+                queue=queue, wait_for=wait_for, op=op)
+
+    result.add_event(evt)
+    return result
+
+
+def bitwise_and(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a & b``, where at least one of the integer operands *a* and
+    *b* is an :class:`Array`, and the other one may be a scalar. If *out*
+    is given, the result is written to it and *out* is returned.
+
+    .. versionadded:: 2019.2
+    """
+    return _bitwise_binop("&", a, b, out, queue, wait_for)
+
+
+def bitwise_or(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a | b``, like :func:`bitwise_and`.
+
+    .. versionadded:: 2019.2
+    """
+    return _bitwise_binop("|", a, b, out, queue, wait_for)
+
+
+def bitwise_xor(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a ^ b``, like :func:`bitwise_and`.
+
+    .. versionadded:: 2019.2
+    """
+    return _bitwise_binop("^", a, b, out, queue, wait_for)
+
+
+def bitwise_not(a, out=None, queue=None, wait_for=None):
+    """Return ``~a`` for an integer :class:`Array` *a*. If *out* is given,
+    the result is written to it and *out* is returned.
+
+    .. versionadded:: 2019.2
+    """
+    if not np.issubdtype(a.dtype, np.integer):
+        raise TypeError("Integral types only")
+
+    result = _get_out_array(out, a, queue=queue)
+    result.add_event(
+            Array._unop(result, a, queue=queue, wait_for=wait_for, op="~"))
+    return result
+
+# }}}
+
+
+# {{{ comparisons
+
+# the operator that gives the same result with its operands swapped
+_SWAPPED_COMPARISON_OPS = {
+        "==": "==", "!=": "!=",
+        "<": ">", "<=": ">=",
+        ">": "<", ">=": "<=",
+        }
+
+
+def _compare(op, a, b, out, queue, wait_for):
+    if not isinstance(a, Array):
+        a, b = b, a
+        op = _SWAPPED_COMPARISON_OPS[op]
+
+    if isinstance(b, Array):
+        result = _get_out_array(out, a, np.int8,
+                _get_broadcast_shape(a.shape, b.shape), queue=queue)
+        evt = Array._array_comparison(result, a, b,
+                queue=queue, wait_for=wait_for, op=op)
+    else:
+        result = _get_out_array(out, a, np.int8, queue=queue)
+        evt = Array._scalar_comparison(result, a, b,
+                queue=queue, wait_for=wait_for, op=op)
+
+    result.add_event(evt)
+    return result
+
+
+def equal(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a == b`` as an array of :class:`numpy.int8`, where at least
+    one of *a* and *b* is an :class:`Array`, and the other one may be a
+    scalar. If *out* is given, the result is written to it and *out* is
+    returned.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare("==", a, b, out, queue, wait_for)
+
+
+def not_equal(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a != b``, like :func:`equal`.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare("!=", a, b, out, queue, wait_for)
+
+
+def less(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a < b``, like :func:`equal`.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare("<", a, b, out, queue, wait_for)
+
+
+def less_equal(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a <= b``, like :func:`equal`.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare("<=", a, b, out, queue, wait_for)
+
+
+def greater(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a > b``, like :func:`equal`.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare(">", a, b, out, queue, wait_for)
+
+
+def greater_equal(a, b, out=None, queue=None, wait_for=None):
+    """Return ``a >= b``, like :func:`equal`.
+
+    .. versionadded:: 2019.2
+    """
+    return _compare(">=", a, b, out, queue, wait_for)
+
+# }}}
+
+
+# {{{ conditionals
+
+@broadcasting_elwise_kernel_runner
+def _if_positive(result, criterion, then_, else_):
+    return elementwise.get_if_positive_kernel(
+            result.context, criterion.dtype, then_.dtype)
+
+
+def if_positive(criterion, then_, else_, out=None, queue=None, wait_for=None):
+    """Return an array like *then_*, which, for the element at index *i*,
+    contains *then_[i]* if *criterion[i]>0*, else *else_[i]*.
+
+    .. versionchanged:: 2019.2
+        The shapes of *criterion*, *then_* and *else_* are broadcast
+        against each other. Added *wait_for*.
+    """
+
+    shape = _get_broadcast_shape(criterion.shape, then_.shape, else_.shape)
+
+    if not (then_.dtype == else_.dtype):
+        raise ValueError("dtypes do not match")
+
+    out = _get_out_array(out, then_, shape=shape, queue=queue)
+    event1 = _if_positive(out, criterion, then_, else_, queue=queue,
+            wait_for=wait_for)
+    out.add_event(event1)
+    return out
+
+
+def maximum(a, b, out=None, queue=None, wait_for=None):
+    """Return the elementwise maximum of *a* and *b*.
+
+    .. versionchanged:: 2019.2
+        Added *wait_for*.
+    """
+
+    # silly, but functional
+    return if_positive(a.mul_add(1, b, -1, queue=queue, wait_for=wait_for),
+            a, b, queue=queue, out=out)
+
+
+def minimum(a, b, out=None, queue=None, wait_for=None):
+    """Return the elementwise minimum of *a* and *b*.
+
+    .. versionchanged:: 2019.2
+        Added *wait_for*.
+    """
+    # silly, but functional
+    return if_positive(a.mul_add(1, b, -1, queue=queue, wait_for=wait_for),
+            b, a, queue=queue, out=out)
+
+# }}}
+
+
+# {{{ lazy evaluation
+
+class LazyExpression(object):
+    """An elementwise expression on :class:`Array` instances whose evaluation
+    is deferred until :meth:`evaluate` is called. Rather than launching one
+    kernel (and allocating one temporary) per operator, the whole expression
+    is then carried out by a single generated kernel.
+
+    Instances are obtained by calling :func:`lazy` on an :class:`Array` and
+    are combined using the arithmetic operators ``+``, ``-``, ``*``, ``/``,
+    ``**``, unary ``-`` and :func:`abs`, as well as the unary functions in
+    :mod:`pyopencl.clmath`. Operands may be other :class:`LazyExpression`
+    instances, :class:`Array` instances of the same shape or scalars.
+
+    The generated kernel is cached by the structure of the expression and
+    the types involved, not by the values of scalar operands, so that
+    repeatedly evaluating the same expression only incurs a build once.
+    Subexpressions that occur more than once are evaluated only once per
+    element.
+
+    Expressions involving complex numbers are evaluated one operation at a
+    time, using the same code paths as the operators on :class:`Array`.
+
+    Instances may also be passed to :func:`sum`, :func:`dot`, :func:`vdot`,
+    :func:`min` and :func:`max`, in which case the expression is evaluated
+    as part of the reduction, without storing its value to memory.
+
+    .. attribute:: shape
+    .. attribute:: dtype
+    .. attribute:: queue
+
+    .. automethod:: evaluate
+    .. automethod:: get
+
+    .. versionadded:: 2019.2
+    """
+
+    __array_priority__ = 100
+
+    def __init__(self, shape, dtype, queue, allocator, children):
+        self.shape = shape
+        self.dtype = dtype
+        self.queue = queue
+        self.allocator = allocator
+        self.children = children
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        from pytools import product
+        return product(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    # {{{ operators
+
+    def __add__(self, other):
+        return _make_lazy_binary_op("+", self, other)
+
+    def __radd__(self, other):
+        return _make_lazy_binary_op("+", other, self)
+
+    def __sub__(self, other):
+        return _make_lazy_binary_op("-", self, other)
+
+    def __rsub__(self, other):
+        return _make_lazy_binary_op("-", other, self)
+
+    def __mul__(self, other):
+        return _make_lazy_binary_op("*", self, other)
+
+    def __rmul__(self, other):
+        return _make_lazy_binary_op("*", other, self)
+
+    def __div__(self, other):
+        return _make_lazy_binary_op("/", self, other)
+
+    __truediv__ = __div__
+
+    def __rdiv__(self, other):
+        return _make_lazy_binary_op("/", other, self)
+
+    __rtruediv__ = __rdiv__
+
+    def __pow__(self, other):
+        return _make_lazy_function_call("pow", self, other)
+
+    def __rpow__(self, other):
+        return _make_lazy_function_call("pow", other, self)
+
+    def __neg__(self):
+        return _LazyUnaryOp("-", self)
+
+    def __abs__(self):
+        return _make_lazy_function_call("abs", self)
+
+    # }}}
+
+    # {{{ evaluation
+
+    def _is_fusable(self):
+        return (self.dtype.kind != "c"
+                and all(child._is_fusable() for child in self.children))
+
+    def _evaluate_unfused(self):
+        raise NotImplementedError
+
+    def _generate(self, cgen):
+        raise NotImplementedError
+
+    def evaluate(self, queue=None, out=None, allocator=None, wait_for=None):
+        """Compute the value of the expression and return it as an
+        :class:`Array`.
+
+        :arg out: if given, an :class:`Array` of the same shape as this
+            expression into which the result is written. Otherwise, a new
+            array of :attr:`dtype` is allocated using *allocator* (or the
+            allocator of the first array in the expression).
+        """
+        queue = queue or self.queue
+
+        if out is not None and out.shape != self.shape:
+            raise ValueError("shape of 'out' does not match expression")
+
+        if not self._is_fusable():
+            result = self._evaluate_unfused()
+            if out is None:
+                return result
+
+            out.add_event(
+                    out._copy(out, result, queue=queue, wait_for=wait_for))
+            return out
+
+        cgen = _LazyCodeGenerator(self)
+        expr = cgen(self)
+
+        if out is None:
+            out = Array(queue, self.shape, self.dtype,
+                    allocator=allocator or self.allocator)
+
+        out.add_event(
+                _fused_elwise(out, *cgen.args,
+                    arg_descrs=tuple(cgen.arg_descrs),
+                    statements="\n".join(cgen.statements),
+                    expr=expr,
+                    queue=queue, wait_for=wait_for))
+        return out
+
+    def get(self, queue=None):
+        """Evaluate the expression and return the result as a
+        :class:`numpy.ndarray`.
+        """
+        return self.evaluate(queue=queue).get(queue=queue)
+
+    # }}}
+
+
+class _LazyArrayLeaf(LazyExpression):
+    def __init__(self, ary):
+        if ary.queue is None:
+            raise ValueError("lazy evaluation requires an array "
+                    "with an associated queue")
+        if not ary.flags.forc:
+            raise ValueError("lazy evaluation requires contiguous arrays")
+
+        LazyExpression.__init__(self, ary.shape, ary.dtype, ary.queue,
+                ary.allocator, ())
+        self.ary = ary
+
+    def _evaluate_unfused(self):
+        return self.ary
+
+    def _generate(self, cgen):
+        return "%s[i]" % cgen.add_vector(self.ary)
+
+
+class _LazyScalar(object):
+    # Not a LazyExpression itself, since it has neither a shape nor a queue.
+
+    def __init__(self, value):
+        self.value = value
+        self.dtype = value.dtype
+        self.children = ()
+
+    def _is_fusable(self):
+        return True
+
+    def _evaluate_unfused(self):
+        return self.value
+
+    def _generate(self, cgen):
+        return cgen.add_scalar(self.value)
+
+
+class _LazyUnaryOp(LazyExpression):
+    def __init__(self, op, child):
+        LazyExpression.__init__(self, child.shape, child.dtype, child.queue,
+                child.allocator, (child,))
+        self.op = op
+
+    def _evaluate_unfused(self):
+        from operator import neg
+        assert self.op == "-"
+        return neg(self.children[0]._evaluate_unfused())
+
+    def _generate(self, cgen):
+        return "%s(%s)" % (self.op, cgen(self.children[0]))
+
+
+class _LazyBinaryOp(LazyExpression):
+    def __init__(self, op, left, right, dtype, repr_expr):
+        LazyExpression.__init__(self, repr_expr.shape, dtype, repr_expr.queue,
+                repr_expr.allocator, (left, right))
+        self.op = op
+
+    def _evaluate_unfused(self):
+        import operator
+        func = {
+                "+": operator.add,
+                "-": operator.sub,
+                "*": operator.mul,
+                "/": operator.truediv,
+                }[self.op]
+        left, right = self.children
+        return func(left._evaluate_unfused(), right._evaluate_unfused())
+
+    def _generate(self, cgen):
+        from pyopencl.tools import dtype_to_ctype
+        tp = dtype_to_ctype(self.dtype)
+        left, right = self.children
+        return "((%s) %s %s (%s) %s)" % (
+                tp, cgen(left), self.op, tp, cgen(right))
+
+
+class _LazyFunctionCall(LazyExpression):
+    def __init__(self, func_name, args, dtype, repr_expr):
+        LazyExpression.__init__(self, repr_expr.shape, dtype, repr_expr.queue,
+                repr_expr.allocator, args)
+        self.func_name = func_name
+
+    def _is_fusable(self):
+        if self.func_name != "abs":
+            # The built-in math functions only exist for floating point
+            # types.
+            if self.dtype.kind != "f":
+                return False
+
+        return LazyExpression._is_fusable(self)
+
+    def _evaluate_unfused(self):
+        args = [arg._evaluate_unfused() for arg in self.children]
+
+        if self.func_name == "pow":
+            base, exponent = args
+            return base ** exponent
+        elif self.func_name == "abs":
+            arg, = args
+            return abs(arg)
+        else:
+            import pyopencl.clmath as clmath
+            return getattr(clmath, self.func_name)(*args)
+
+    def _generate(self, cgen):
+        from pyopencl.tools import dtype_to_ctype
+        tp = dtype_to_ctype(self.dtype)
+
+        if self.func_name == "abs":
+            arg, = self.children
+            if self.dtype.kind == "f":
+                return "fabs(%s)" % cgen(arg)
+            else:
+                # abs() on signed integers returns the unsigned type
+                return "((%s) abs(%s))" % (tp, cgen(arg))
+
+        return "%s(%s)" % (self.func_name, ", ".join(
+            "(%s) %s" % (tp, cgen(arg)) for arg in self.children))
+
+
+def _as_lazy_operand(obj):
+    if isinstance(obj, Array):
+        return _LazyArrayLeaf(obj)
+    else:
+        return obj
+
+
+def _make_lazy_scalar(value, dtype):
+    if isinstance(value, LazyExpression):
+        return value
+    else:
+        return _LazyScalar(dtype.type(value))
+
+
+def _make_lazy_binary_op(op, left, right):
+    left = _as_lazy_operand(left)
+    right = _as_lazy_operand(right)
+
+    if isinstance(left, LazyExpression):
+        repr_expr, other = left, right
+    else:
+        repr_expr, other = right, left
+
+    if isinstance(other, LazyExpression) and other.shape != repr_expr.shape:
+        raise ValueError("shapes of operands do not match")
+
+    dtype = _get_common_dtype(repr_expr, other, repr_expr.queue)
+
+    return _LazyBinaryOp(op,
+            _make_lazy_scalar(left, dtype), _make_lazy_scalar(right, dtype),
+            dtype, repr_expr)
+
+
+def _make_lazy_function_call(func_name, *args):
+    args = [_as_lazy_operand(arg) for arg in args]
+
+    lazy_args = [arg for arg in args if isinstance(arg, LazyExpression)]
+    repr_expr = lazy_args[0]
+    for arg in lazy_args[1:]:
+        if arg.shape != repr_expr.shape:
+            raise ValueError("shapes of operands do not match")
+
+    dtype = repr_expr.dtype
+    for arg in args:
+        if arg is not repr_expr:
+            dtype = _get_common_dtype(repr_expr, arg, repr_expr.queue)
+
+    if func_name == "abs":
+        dtype = dtype.type(0).real.dtype
+
+    return _LazyFunctionCall(func_name,
+            tuple(_make_lazy_scalar(arg, dtype) for arg in args),
+            dtype, repr_expr)
+
+
+class _LazyCodeGenerator(object):
+    def __init__(self, root):
+        self.args = []
+        self.arg_descrs = []
+        self.statements = []
+
+        self.vector_names = {}
+        self.temporary_names = {}
+
+        self.ref_counts = {}
+        self._count_refs(root)
+
+    def _count_refs(self, node):
+        node_id = id(node)
+        count = self.ref_counts.get(node_id, 0)
+        self.ref_counts[node_id] = count + 1
+
+        if count == 0:
+            for child in node.children:
+                self._count_refs(child)
+
+    def add_vector(self, ary):
+        try:
+            return self.vector_names[id(ary)]
+        except KeyError:
+            name = "a%d" % len(self.args)
+            self.args.append(ary)
+            self.arg_descrs.append((True, ary.dtype))
+            self.vector_names[id(ary)] = name
+            return name
+
+    def add_scalar(self, value):
+        name = "a%d" % len(self.args)
+        self.args.append(value)
+        self.arg_descrs.append((False, value.dtype))
+        return name
+
+    def __call__(self, node):
+        node_id = id(node)
+        try:
+            return self.temporary_names[node_id]
+        except KeyError:
+            pass
+
+        code = node._generate(self)
+
+        if self.ref_counts[node_id] > 1 and node.children:
+            # common subexpression: store in a temporary
+            from pyopencl.tools import dtype_to_ctype
+            name = "t%d" % len(self.temporary_names)
+            self.statements.append("const %s %s = %s;" % (
+                dtype_to_ctype(node.dtype), name, code))
+            self.temporary_names[node_id] = name
+            return name
+
+        return code
+
+
+@elwise_kernel_runner
+def _fused_elwise(out, *args, **kwargs):
+    return elementwise.get_fused_elwise_kernel(out.context, out.dtype,
+            kwargs["arg_descrs"], kwargs["statements"], kwargs["expr"])
+
+
+def lazy(ary):
+    """Return a :class:`LazyExpression` referring to the (contiguous)
+    :class:`Array` *ary*, for use in building expressions that are
+    evaluated by a single fused kernel. For example::
+
+        x = cl_array.lazy(a)
+        result = (2*x*x + clmath.sin(x) + b).evaluate()
+
+    .. versionadded:: 2019.2
+    """
+    return _LazyArrayLeaf(ary)
+
+# }}}
+
+
+# {{{ reductions
+_builtin_sum = sum
+_builtin_min = min
+_builtin_max = max
+
+
+def _fused_reduce(what, expr, dtype_out, queue, slice):
+    cgen = _LazyCodeGenerator(expr)
+    map_expr = cgen(expr)
+
+    vectors = [arg for arg in cgen.args if isinstance(arg, Array)]
+
+    from pyopencl.reduction import get_fused_reduction_kernel
+    krnl = get_fused_reduction_kernel(vectors[0].context, what,
+            dtype_out, expr.dtype, tuple(cgen.arg_descrs),
+            "\n".join(cgen.statements), map_expr)
+
+    wait_for = []
+    for ary in vectors:
+        wait_for.extend(ary.events)
+
+    result, event1 = krnl(*cgen.args, queue=queue or expr.queue, slice=slice,
+            wait_for=wait_for, return_event=True)
+    result.add_event(event1)
+    return result
+
+
+def _axis_reduce(what, arrays, dtype, axis, queue, slice,
+        conjugate_first=False):
+    if slice is not None:
+        raise TypeError("may not specify both axis and slice")
+
+    arrays = tuple(
+            ary.evaluate(queue=queue) if isinstance(ary, LazyExpression)
+            else ary
+            for ary in arrays)
+
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+
+    from pyopencl.reduction import get_axis_reduction_kernel
+    krnl = get_axis_reduction_kernel(arrays[0].context, what, dtype,
+            tuple(ary.dtype for ary in arrays), conjugate_first)
+    return krnl(*arrays, axis=axis, queue=queue)
+
+
+def sum(a, dtype=None, queue=None, slice=None, axis=None):
+    """
+    .. versionadded:: 2011.1
+
+    .. versionchanged:: 2019.2
+
+        *a* may be a :class:`LazyExpression`, in which case its evaluation
+        is carried out as part of the reduction, without writing it to
+        memory.
+
+        Added *axis*. If given, *a* is reduced along that axis only, and
+        need not be contiguous.
+    """
+    if axis is not None:
+        return _axis_reduce("sum", (a,), dtype, axis, queue, slice)
+
+    if isinstance(a, LazyExpression):
+        if a._is_fusable():
+            if dtype is None:
+                dtype = a.dtype
+            return _fused_reduce("sum", a, np.dtype(dtype), queue, slice)
+        else:
+            a = a.evaluate(queue=queue)
+
+    from pyopencl.reduction import get_sum_kernel
+    krnl = get_sum_kernel(a.context, dtype, a.dtype)
+    result, event1 = krnl(a, queue=queue, slice=slice, wait_for=a.events,
+            return_event=True)
+    result.add_event(event1)
+    return result
+
+
+def dot(a, b, dtype=None, queue=None, slice=None, axis=None):
+    """
+    .. versionadded:: 2011.1
+
+    .. versionchanged:: 2019.2
+
+        *a* and *b* may be :class:`LazyExpression` instances.
+
+        Added *axis*. If given, *a* and *b* (which must have the same shape)
+        are multiplied and reduced along that axis.
+    """
+    if axis is not None:
+        return _axis_reduce("dot", (a, b), dtype, axis, queue, slice)
+
+    if isinstance(a, LazyExpression) or isinstance(b, LazyExpression):
+        return sum(_make_lazy_binary_op("*", a, b),
+                dtype=dtype, queue=queue, slice=slice)
+
+    from pyopencl.reduction import get_dot_kernel
+    krnl = get_dot_kernel(a.context, dtype, a.dtype, b.dtype)
+    result, event1 = krnl(a, b, queue=queue, slice=slice,
+            wait_for=a.events + b.events, return_event=True)
+    result.add_event(event1)
+    return result
+
+
+def vdot(a, b, dtype=None, queue=None, slice=None, axis=None):
+    """Like :func:`numpy.vdot`.
+
+    .. versionadded:: 2013.1
+
+    .. versionchanged:: 2019.2
+
+        *a* and *b* may be :class:`LazyExpression` instances.
+
+        Added *axis*, see :func:`dot`.
+    """
+    if axis is not None:
+        return _axis_reduce("dot", (a, b), dtype, axis, queue, slice,
+                conjugate_first=True)
+
+    if isinstance(a, LazyExpression) or isinstance(b, LazyExpression):
+        if a.dtype.kind != "c":
+            return dot(a, b, dtype=dtype, queue=queue, slice=slice)
+
+        if isinstance(a, LazyExpression):
+            a = a.evaluate(queue=queue)
+        if isinstance(b, LazyExpression):
+            b = b.evaluate(queue=queue)
+
+    from pyopencl.reduction import get_dot_kernel
+    krnl = get_dot_kernel(a.context, dtype, a.dtype, b.dtype,
             conjugate_first=True)
     result, event1 = krnl(a, b, queue=queue, slice=slice,
             wait_for=a.events + b.events, return_event=True)
@@ -2623,7 +3699,16 @@ def subset_dot(subset, a, b, dtype=None, queue=None, slice=None):
 
 
 def _make_minmax_kernel(what):
-    def f(a, queue=None):
+    def f(a, queue=None, axis=None):
+        if axis is not None:
+            return _axis_reduce(what, (a,), None, axis, queue, None)
+
+        if isinstance(a, LazyExpression):
+            if a._is_fusable():
+                return _fused_reduce(what, a, a.dtype, queue, None)
+            else:
+                a = a.evaluate(queue=queue)
+
         from pyopencl.reduction import get_minmax_kernel
         krnl = get_minmax_kernel(a.context, what, a.dtype)
         result, event1 = krnl(a, queue=queue, wait_for=a.events,
@@ -2637,11 +3722,25 @@ def _make_minmax_kernel(what):
 min = _make_minmax_kernel("min")
 min.__doc__ = """
     .. versionadded:: 2011.1
+
+    .. versionchanged:: 2019.2
+
+        *a* may be a :class:`LazyExpression`.
+
+        Added *axis*. If given, *a* is reduced along that axis only, and
+        need not be contiguous.
     """
 
 max = _make_minmax_kernel("max")
 max.__doc__ = """
     .. versionadded:: 2011.1
+
+    .. versionchanged:: 2019.2
+
+        *a* may be a :class:`LazyExpression`.
+
+        Added *axis*. If given, *a* is reduced along that axis only, and
+        need not be contiguous.
     """
 
 
@@ -2656,6 +3755,27 @@ def _make_subset_minmax_kernel(what):
     return f
 
 
+def multi_reduce(a, whats, queue=None, slice=None):
+    """Carry out several reductions over *a* while reading it only once.
+    *whats* is a sequence of names of reductions, each of which is one of
+    ``"sum"``, ``"sum_squares"`` (the sum of the squared magnitudes),
+    ``"min"`` and ``"max"``. For example::
+
+        a_sum, a_min, a_max = cl_array.multi_reduce(a, ["sum", "min", "max"])
+
+    :return: a tuple of single-entry :class:`Array` instances, one per
+        entry of *whats*.
+
+    .. versionadded:: 2019.2
+    """
+    if isinstance(a, LazyExpression):
+        a = a.evaluate(queue=queue)
+
+    from pyopencl.reduction import get_multi_reduction_kernel
+    krnl = get_multi_reduction_kernel(a.context, tuple(whats), a.dtype)
+    return krnl(a, queue=queue, slice=slice, wait_for=a.events)
+
+
 subset_min = _make_subset_minmax_kernel("min")
 subset_min.__doc__ = """.. versionadded:: 2011.1"""
 subset_max = _make_subset_minmax_kernel("max")
@@ -2664,14 +3784,287 @@ subset_max.__doc__ = """.. versionadded:: 2011.1"""
 # }}}
 
 
+# {{{ deferred scalar readback
+
+class ScalarFuture(object):
+    """A handle to the value of a single-entry :class:`Array` (such as the
+    result of a reduction) that is being transferred to the host
+    asynchronously as part of a :class:`ScalarReadbackBatch`.
+
+    Converting an instance to :class:`float`, :class:`int`, :class:`complex`
+    or :class:`bool` returns the value, waiting for it if necessary.
+
+    .. attribute:: array
+
+        The :class:`Array` whose value is being retrieved.
+
+    .. automethod:: done
+    .. automethod:: result
+    .. automethod:: add_done_callback
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, batch, ary):
+        self.array = ary
+
+        self._batch = batch
+        self._readback = None
+
+        self._value = None
+        self._done = False
+        self._callbacks = []
+
+        from threading import Lock, Event
+        self._lock = Lock()
+        self._done_event = Event()
+
+    def done(self):
+        """Return *True* if the value has arrived on the host."""
+        return self._done
+
+    def result(self):
+        """Return the value as a :mod:`numpy` scalar, waiting for the
+        transfer to complete if necessary. If the batch containing this
+        future has not been flushed, flush it first.
+        """
+        if not self._done:
+            if self._readback is None:
+                self._batch.flush()
+            self._readback.wait()
+
+            # The readback may have been resolved by another thread that
+            # has not delivered the value yet.
+            self._done_event.wait()
+
+        return self._value
+
+    def add_done_callback(self, fn):
+        """Arrange for *fn* to be called with this future as its only
+        argument once the value has arrived on the host. If it already has,
+        call *fn* immediately.
+
+        .. note::
+
+            *fn* may be called from a different thread.
+        """
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+
+        fn(self)
+
+    def _set_result(self, value):
+        with self._lock:
+            self._value = value
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+
+        self._done_event.set()
+
+        for fn in callbacks:
+            fn(self)
+
+    def __float__(self):
+        return float(self.result())
+
+    def __int__(self):
+        return int(self.result())
+
+    def __complex__(self):
+        return complex(self.result())
+
+    def __bool__(self):
+        return bool(self.result())
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        if self._done:
+            return "<ScalarFuture: %r>" % (self._value,)
+        else:
+            return "<ScalarFuture: pending>"
+
+
+class _PendingScalarReadback(object):
+    def __init__(self, batch, slot, entries, event):
+        self.batch = batch
+        self.slot = slot
+        self.entries = entries
+        self.event = event
+
+        self._resolved = False
+
+        from threading import Lock
+        self._lock = Lock()
+
+    def callback(self, status):
+        if status == cl.command_execution_status.COMPLETE:
+            self.resolve()
+
+    def resolve(self):
+        with self._lock:
+            if self._resolved:
+                return
+            self._resolved = True
+
+            _, _, host_ary = self.slot
+            values = []
+            for fut, offset in self.entries:
+                dtype = fut.array.dtype
+                values.append(
+                        host_ary[offset:offset+dtype.itemsize]
+                        .view(dtype).copy()[0])
+
+        # The values have been copied out, so the slot may be reused.
+        self.batch._release_slot(self.slot)
+
+        for (fut, _), value in zip(self.entries, values):
+            fut._set_result(value)
+
+    def wait(self):
+        self.event.wait()
+        self.resolve()
+
+
+class ScalarReadbackBatch(object):
+    """Collects single-entry :class:`Array` instances (such as the results
+    of reductions) whose values are needed on the host, and transfers them
+    all at once, without blocking.
+
+    On :meth:`flush`, the values are gathered into one buffer on the device,
+    which is then copied to page-locked host memory in a single transfer.
+    The values become available through the :class:`ScalarFuture` instances
+    returned by :meth:`submit` once that transfer completes, while the host
+    is free to enqueue further work. Staging buffers are reused across
+    flushes.
+
+    Instances may be used as context managers, in which case :meth:`flush`
+    is called on exit::
+
+        with cl_array.ScalarReadbackBatch(queue) as batch:
+            res_norm = batch.submit(cl_array.dot(r, r))
+            max_err = batch.submit(cl_array.max(err))
+
+        # ... enqueue more work ...
+
+        if float(res_norm) < tol:
+            ...
+
+    .. automethod:: submit
+    .. automethod:: flush
+
+    .. versionadded:: 2019.2
+    """
+
+    # alignment of the values within the staging buffers, in bytes
+    ALIGNMENT = 16
+    MIN_STAGING_SIZE = 256
+
+    def __init__(self, queue):
+        self.queue = queue
+
+        self._pending = []
+        self._free_slots = []
+
+        from threading import Lock
+        self._lock = Lock()
+
+    def submit(self, ary):
+        """Schedule the retrieval of the value of the single-entry
+        :class:`Array` *ary* with the next :meth:`flush`.
+
+        :returns: a :class:`ScalarFuture`.
+        """
+        if ary.size != 1:
+            raise ValueError("only single-entry arrays may be submitted")
+
+        fut = ScalarFuture(self, ary)
+        self._pending.append(fut)
+        return fut
+
+    def _get_slot(self, nbytes):
+        with self._lock:
+            for i, slot in enumerate(self._free_slots):
+                if slot[2].nbytes >= nbytes:
+                    return self._free_slots.pop(i)
+
+        capacity = _builtin_max(self.MIN_STAGING_SIZE, 1 << (nbytes-1).bit_length())
+
+        mf = cl.mem_flags
+        context = self.queue.context
+        dev_buf = cl.Buffer(context, mf.READ_WRITE, capacity)
+        host_buf = cl.Buffer(context, mf.READ_WRITE | mf.ALLOC_HOST_PTR, capacity)
+        host_ary, _ = cl.enqueue_map_buffer(self.queue, host_buf,
+                cl.map_flags.READ | cl.map_flags.WRITE, 0, (capacity,), np.uint8)
+
+        return dev_buf, host_buf, host_ary
+
+    def _release_slot(self, slot):
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def flush(self):
+        """Start the transfer of all values submitted since the last call."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        entries = []
+        nbytes = 0
+        for fut in pending:
+            nbytes = (nbytes + self.ALIGNMENT - 1) // self.ALIGNMENT * self.ALIGNMENT
+            entries.append((fut, nbytes))
+            nbytes += fut.array.dtype.itemsize
+
+        slot = self._get_slot(nbytes)
+        dev_buf, _, host_ary = slot
+
+        gather_events = []
+        for fut, offset in entries:
+            ary = fut.array
+            gather_events.append(
+                    cl.enqueue_copy(self.queue, dev_buf, ary.base_data,
+                        byte_count=ary.dtype.itemsize,
+                        src_offset=ary.offset, dest_offset=offset,
+                        wait_for=ary.events))
+
+        evt = cl.enqueue_copy(self.queue, host_ary[:nbytes], dev_buf,
+                is_blocking=False, wait_for=gather_events)
+
+        readback = _PendingScalarReadback(self, slot, entries, evt)
+        for fut, _ in entries:
+            fut._readback = readback
+
+        try:
+            evt.set_callback(cl.command_execution_status.COMPLETE,
+                    readback.callback)
+        except (AttributeError, cl.Error):
+            # No callbacks (e.g. before CL 1.1): the values are retrieved
+            # upon the first call to ScalarFuture.result().
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+# }}}
+
+
 # {{{ scans
 
 def cumsum(a, output_dtype=None, queue=None,
-        wait_for=None, return_event=False):
+        wait_for=None, return_event=False, out=None):
     # undocumented for now
 
     """
     .. versionadded:: 2013.1
+
+    .. versionchanged:: 2019.2
+        Added *out*.
     """
 
     if output_dtype is None:
@@ -2679,11 +4072,12 @@ def cumsum(a, output_dtype=None, queue=None,
     if wait_for is None:
         wait_for = []
 
-    result = a._new_like_me(output_dtype)
+    result = _get_out_array(out, a, output_dtype)
 
     from pyopencl.scan import get_cumsum_kernel
     krnl = get_cumsum_kernel(a.context, a.dtype, output_dtype)
-    evt = krnl(a, result, queue=queue, wait_for=wait_for + a.events)
+    evt = krnl(a, result, queue=queue,
+            wait_for=wait_for + a.events + result.events)
     result.add_event(evt)
 
     if return_event:
@@ -0,0 +1,347 @@
+"""Autotuning of the launch geometry of elementwise kernels.
+
+By default, elementwise kernels are launched with the global and local sizes
+chosen by :func:`pyopencl.array.splay`. If autotuning is enabled, by setting
+the environment variable :envvar:`PYOPENCL_AUTOTUNE` to any non-empty value
+or by calling :func:`set_autotuning`, the first launch of an elementwise
+kernel on a device for arrays in a given range of sizes instead benchmarks a
+number of candidate geometries and uses the fastest one from then on.
+Benchmarks run on scratch copies of the kernel's buffers, so they have no
+effect on the operands.
+
+The results are kept in a file next to the binary cache (see
+:func:`get_autotune_file`), so that each geometry is only tuned once per
+kernel and device.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+__copyright__ = "Copyright (C) 2019 PyOpenCL contributors"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import os
+import json
+import threading
+import weakref
+import six
+
+import pyopencl as cl
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+_enabled = bool(os.environ.get("PYOPENCL_AUTOTUNE"))
+
+_AUTOTUNE_FILE_NAME = "autotune-v1.json"
+
+# guards _results, _autotune_file and _profiling_queues
+_lock = threading.Lock()
+
+# key (see _get_key) -> [group_count, local_size]
+_results = None
+_autotune_file = None
+
+# queue -> command queue with profiling enabled on the same device
+#
+# Keyed on the queue being tuned rather than its context, because
+# CommandQueue.context returns a new wrapper object each time, which
+# would not keep its entry alive.
+_profiling_queues = weakref.WeakKeyDictionary()
+
+_BENCHMARK_REPETITIONS = 3
+
+
+# {{{ configuration
+
+def set_autotuning(enabled, autotune_file=None):
+    """Enable or disable autotuning. If *autotune_file* is given, results
+    are read from and written to that file instead of the one returned by
+    :func:`get_autotune_file`.
+    """
+    global _enabled, _results, _autotune_file
+
+    with _lock:
+        _enabled = enabled
+        if autotune_file != _autotune_file:
+            _autotune_file = autotune_file
+            _results = None
+
+
+def is_autotuning_enabled():
+    """Return whether autotuning is enabled."""
+    return _enabled
+
+
+def get_autotune_file():
+    """Return the name of the file holding the autotuning results. It is
+    stored in the directory of the binary cache (see
+    :func:`pyopencl.cache.get_default_cache_dir`), and is removed along with
+    it.
+    """
+    if _autotune_file is not None:
+        return _autotune_file
+
+    from pyopencl.cache import get_default_cache_dir
+    return os.path.join(get_default_cache_dir(), _AUTOTUNE_FILE_NAME)
+
+# }}}
+
+
+# {{{ persistence
+
+def _read_results(filename):
+    try:
+        with open(filename, "r") as inf:
+            result = json.load(inf)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    if not isinstance(result, dict):
+        return {}
+
+    return result
+
+
+def _get_results():
+    # must be called with _lock held
+    global _results
+    if _results is None:
+        _results = _read_results(get_autotune_file())
+    return _results
+
+
+def _store_result(key, value):
+    # must be called with _lock held
+    results = _get_results()
+    results[key] = value
+
+    filename = get_autotune_file()
+
+    from pyopencl.cache import _makedirs, _replace_file
+    _makedirs(os.path.dirname(filename))
+
+    # Merge with results written by other processes in the meantime.
+    on_disk = _read_results(filename)
+    on_disk.update(results)
+    results.update(on_disk)
+
+    temp_filename = "%s.%d.tmp" % (filename, os.getpid())
+    try:
+        with open(temp_filename, "w") as outf:
+            json.dump(on_disk, outf, sort_keys=True)
+        _replace_file(temp_filename, filename)
+    except (IOError, OSError) as e:
+        logger.warning("could not write autotuning results to '%s': %s"
+                % (filename, e))
+
+# }}}
+
+
+# {{{ benchmarking
+
+def _get_kernel_id(kernel):
+    try:
+        return kernel._pyopencl_autotune_id
+    except AttributeError:
+        pass
+
+    spec = getattr(kernel, "_pyopencl_elwise_spec", None)
+    if spec is None:
+        result = None
+    else:
+        from pyopencl.cache import new_hash
+        checksum = new_hash()
+        checksum.update(repr((
+            [arg.declarator() for arg in spec["arguments"]],
+            spec["operation"], spec["name"], spec["options"],
+            spec["preamble"], spec["use_range"],
+            sorted(six.iteritems(spec["kwargs"])),
+            )).encode("utf-8"))
+        result = checksum.hexdigest()
+
+    kernel._pyopencl_autotune_id = result
+    return result
+
+
+def _get_key(kernel_id, device, bucket):
+    from pyopencl.cache import new_hash, get_device_cache_id
+    checksum = new_hash()
+    checksum.update(repr((kernel_id, get_device_cache_id(device), bucket))
+            .encode("utf-8"))
+    return checksum.hexdigest()
+
+
+def _get_profiling_queue(queue):
+    with _lock:
+        try:
+            return _profiling_queues[queue]
+        except KeyError:
+            result = _profiling_queues[queue] = cl.CommandQueue(
+                    queue.context, queue.device,
+                    properties=cl.command_queue_properties.PROFILING_ENABLE)
+            return result
+
+
+def _get_candidates(device, max_wg_size, n):
+    local_sizes = set([max_wg_size])
+    local_size = 16
+    while local_size < max_wg_size:
+        local_sizes.add(local_size)
+        local_size *= 4
+
+    candidates = set()
+    for local_size in local_sizes:
+        max_group_count = max((n + local_size - 1) // local_size, 1)
+
+        candidates.add((max_group_count, local_size))
+        for groups_per_unit in [1, 4, 16]:
+            candidates.add((
+                min(device.max_compute_units * groups_per_unit, max_group_count),
+                local_size))
+
+    return sorted(candidates)
+
+
+def _benchmark(queue, kernel, n, args):
+    """Return the fastest ``(group_count, local_size)`` for launching
+    *kernel* with *args* over *n* work items, or *None* if benchmarking
+    failed, for example because there is not enough memory for scratch
+    copies of the buffers in *args*.
+    """
+    try:
+        return _benchmark_inner(queue, kernel, n, args)
+    except cl.Error as e:
+        logger.info("autotuning %s for %d work items failed: %s"
+                % (kernel.function_name, n, e))
+        return None
+
+
+def _benchmark_inner(queue, kernel, n, args):
+    context = queue.context
+    device = queue.device
+    prof_queue = _get_profiling_queue(queue)
+
+    # The operands may still be being computed by commands in queue, and
+    # prof_queue is not ordered with respect to it.
+    queue.finish()
+
+    scratch_args = []
+    for arg in args:
+        if isinstance(arg, cl.MemoryObject):
+            # Copies of the actual operands, so that kernels do not, for
+            # example, divide by zero while being tuned. Writes go to the
+            # copies, so in-place operations are unaffected.
+            scratch = cl.Buffer(context, cl.mem_flags.READ_WRITE, arg.size)
+            cl.enqueue_copy(prof_queue, scratch, arg)
+            scratch_args.append(scratch)
+        else:
+            scratch_args.append(arg)
+
+    max_wg_size = kernel.get_work_group_info(
+            cl.kernel_work_group_info.WORK_GROUP_SIZE, device)
+
+    prof = cl.profiling_info
+    best_time = None
+    best = None
+    for group_count, local_size in _get_candidates(device, max_wg_size, n):
+        global_size = (group_count*local_size,)
+
+        # warm-up
+        kernel(prof_queue, global_size, (local_size,), *scratch_args)
+
+        evts = [kernel(prof_queue, global_size, (local_size,), *scratch_args)
+                for i in range(_BENCHMARK_REPETITIONS)]
+        prof_queue.finish()
+
+        time = min(
+                evt.get_profiling_info(prof.END)
+                - evt.get_profiling_info(prof.START)
+                for evt in evts)
+        if best_time is None or time < best_time:
+            best_time = time
+            best = [group_count, local_size]
+
+    logger.info("autotuned %s for %d work items on %s: %d groups of %d"
+            % (kernel.function_name, n, device.name, best[0], best[1]))
+
+    return best
+
+# }}}
+
+
+def get_tuned_sizes(queue, kernel, n, args):
+    """Return a tuple ``(global_size, local_size)`` to launch the
+    elementwise kernel *kernel* with *args* over *n* work items on *queue*,
+    or *None* if autotuning is disabled or does not apply to *kernel*.
+    If no tuned geometry for *kernel* on the device of *queue* and sizes
+    similar to *n* is known, it is determined by benchmarking.
+
+    :arg kernel: a kernel obtained from
+        :func:`pyopencl.elementwise.get_elwise_kernel` or one of its
+        variants.
+    :arg args: the arguments to the kernel.
+    """
+    if not _enabled or n <= 0:
+        return None
+
+    device = queue.device
+
+    # sizes within a factor of two share their geometry
+    bucket = n.bit_length()
+
+    try:
+        tuned = kernel._pyopencl_tuned_sizes
+    except AttributeError:
+        tuned = kernel._pyopencl_tuned_sizes = {}
+
+    try:
+        group_count, local_size = tuned[device, bucket]
+    except KeyError:
+        kernel_id = _get_kernel_id(kernel)
+        if kernel_id is None:
+            return None
+
+        key = _get_key(kernel_id, device, bucket)
+        with _lock:
+            value = _get_results().get(key)
+
+        if value is None:
+            value = _benchmark(queue, kernel, n, args)
+            if value is None:
+                # Only remembered by this kernel, so that tuning is
+                # attempted again in later runs.
+                tuned[device, bucket] = (None, None)
+                return None
+
+            with _lock:
+                _store_result(key, value)
+
+        group_count, local_size = tuned[device, bucket] = value
+
+    if group_count is None:
+        return None
+
+    group_count = min(group_count, (n + local_size - 1) // local_size)
+    return (group_count*local_size,), (local_size,)
+
+# vim: foldmethod=marker
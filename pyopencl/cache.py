@@ -30,6 +30,8 @@ import pyopencl._cl as _cl
 import re
 import sys
 import os
+import struct
+import threading
 from pytools import Record
 
 import logging
@@ -40,14 +42,6 @@ import hashlib
 new_hash = hashlib.md5
 
 
-def _erase_dir(dir):
-    from os import listdir, unlink, rmdir
-    from os.path import join
-    for name in listdir(dir):
-        unlink(join(dir, name))
-    rmdir(dir)
-
-
 def update_checksum(checksum, obj):
     if isinstance(obj, six.text_type):
         checksum.update(obj.encode("utf8"))
@@ -55,94 +49,421 @@ def update_checksum(checksum, obj):
         checksum.update(obj)
 
 
-# {{{ cleanup
+# {{{ entry storage
+
+# Cache entries are stored one per file, named by their cache key. Since the
+# key is a hash of everything that goes into the build, an entry never
+# changes once written. Writers create entries under a temporary name and
+# rename them into place, which is atomic, so readers see either a complete
+# entry or none at all, and no lock is needed. If several processes build
+# the same program at once, the last rename wins, which is harmless since
+# all of them write equivalent entries.
+
+_TEMP_PREFIX = ".tmp-"
+
+
+class _CacheEntry(Record):
+    """
+    .. attribute:: dependencies
+    .. attribute:: log
+    .. attribute:: binary
+    .. attribute:: source
+    """
+
+
+def _get_entry_path(cache_dir, cache_key):
+    # spread entries over subdirectories to keep directories small
+    return os.path.join(cache_dir, cache_key[:2], cache_key)
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        from errno import EEXIST
+        if e.errno != EEXIST:
+            raise
+
+
+def _replace_file(src, dest):
+    try:
+        replace = os.replace
+    except AttributeError:
+        # Python 2
+        replace = os.rename
 
-class CleanupBase(object):
+    try:
+        replace(src, dest)
+    except OSError:
+        if not os.path.exists(dest):
+            raise
+
+        # Python 2 on Windows does not overwrite existing files on rename.
+        # Another process has written an equivalent entry, so keep that.
+        os.unlink(src)
+
+
+# Entries are stored in a packed format so that reading one takes a single
+# read call, and the binary can be handed to the CL runtime without being
+# copied or unpickled. Each entry consists of a header (see
+# _ENTRY_HEADER), the pickled dependencies and build log, the binary, and
+# the source (for reference only).
+
+_ENTRY_MAGIC = b"PCLC"
+_ENTRY_FORMAT_VERSION = 1
+_ENTRY_HEADER = struct.Struct("<4sIIQQ")
+
+# Hits only update the time of last use if it is older than this, to avoid
+# writing to the file system on every lookup.
+_TOUCH_INTERVAL = 60 * 60
+
+
+class _InvalidCacheEntry(RuntimeError):
     pass
 
 
-class CleanupManager(CleanupBase):
-    def __init__(self):
-        self.cleanups = []
+def _write_entry(cache_dir, cache_key, entry):
+    path = _get_entry_path(cache_dir, cache_key)
+    _makedirs(os.path.dirname(path))
 
-    def register(self, c):
-        self.cleanups.insert(0, c)
+    from six.moves.cPickle import dumps, HIGHEST_PROTOCOL
+    metadata = dumps((entry.dependencies, entry.log), protocol=HIGHEST_PROTOCOL)
+    source = entry.source.encode("utf8")
 
-    def clean_up(self):
-        for c in self.cleanups:
-            c.clean_up()
+    # not using tempfile.mkstemp, which would ignore the umask
+    from uuid import uuid4
+    temp_path = os.path.join(os.path.dirname(path), _TEMP_PREFIX + uuid4().hex)
+    fd = os.open(temp_path,
+            os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0),
+            0o666)
 
-    def error_clean_up(self):
-        for c in self.cleanups:
-            c.error_clean_up()
+    try:
+        with os.fdopen(fd, "wb") as outf:
+            outf.write(_ENTRY_HEADER.pack(
+                _ENTRY_MAGIC, _ENTRY_FORMAT_VERSION,
+                len(metadata), len(entry.binary), len(source)))
+            outf.write(metadata)
+            outf.write(entry.binary)
+            outf.write(source)
+
+        _replace_file(temp_path, path)
+    except Exception:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return (_ENTRY_HEADER.size
+            + len(metadata) + len(entry.binary) + len(source))
 
 
-class CacheLockManager(CleanupBase):
-    def __init__(self, cleanup_m, cache_dir):
-        if cache_dir is not None:
-            self.lock_file = os.path.join(cache_dir, "lock")
+def _unpack_entry(data):
+    if len(data) < _ENTRY_HEADER.size:
+        raise _InvalidCacheEntry()
 
-            attempts = 0
-            while True:
-                try:
-                    self.fd = os.open(self.lock_file,
-                            os.O_CREAT | os.O_WRONLY | os.O_EXCL)
-                    break
-                except OSError:
-                    pass
+    magic, version, metadata_len, binary_len, source_len = \
+            _ENTRY_HEADER.unpack_from(data)
+    if (magic != _ENTRY_MAGIC
+            or version != _ENTRY_FORMAT_VERSION
+            or len(data) != (_ENTRY_HEADER.size
+                + metadata_len + binary_len + source_len)):
+        raise _InvalidCacheEntry()
 
-                from time import sleep
-                sleep(1)
+    view = memoryview(data)
+    start = _ENTRY_HEADER.size
 
-                attempts += 1
+    from six.moves.cPickle import loads
+    try:
+        dependencies, log = loads(bytes(view[start:start+metadata_len]))
+    except Exception:
+        raise _InvalidCacheEntry()
+    start += metadata_len
+
+    binary = view[start:start+binary_len]
+    start += binary_len
+
+    return _CacheEntry(
+            dependencies=dependencies,
+            log=log,
+            binary=binary,
+            source=bytes(view[start:start+source_len]).decode("utf8"))
+
+
+def _read_entry(cache_dir, cache_key):
+    """Return the :class:`_CacheEntry` stored for *cache_key*, or *None* if
+    there is none or it cannot be read. The binary in the returned entry is
+    a :class:`memoryview`.
+    """
+    path = _get_entry_path(cache_dir, cache_key)
+    try:
+        inf = open(path, "rb")
+    except IOError:
+        return None
 
-                if attempts > 10:
-                    from warnings import warn
-                    warn("could not obtain cache lock--delete '%s' if necessary"
-                            % self.lock_file)
+    try:
+        with inf:
+            st = os.fstat(inf.fileno())
+            data = bytearray(st.st_size)
+            if inf.readinto(data) != st.st_size:
+                raise _InvalidCacheEntry()
+
+        entry = _unpack_entry(data)
+    except (IOError, OSError, _InvalidCacheEntry):
+        # The entry will be replaced once the program has been rebuilt.
+        from warnings import warn
+        warn("PyOpenCL encountered an invalid cache entry for cache key %s"
+                % cache_key)
+        return None
 
-                if attempts > 3 * 60:
-                    raise RuntimeError("waited more than three minutes "
-                            "on the lock file '%s'"
-                            "--something is wrong" % self.lock_file)
+    from time import time
+    if time() - st.st_mtime > _TOUCH_INTERVAL:
+        _touch_entry(cache_dir, cache_key)
 
-            cleanup_m.register(self)
+    return entry
 
-    def clean_up(self):
-        import os
-        os.close(self.fd)
-        os.unlink(self.lock_file)
 
-    def error_clean_up(self):
+def _touch_entry(cache_dir, cache_key):
+    # Record the time of last use in the modification time, since access
+    # times are often not maintained (e.g. on file systems mounted with
+    # 'noatime').
+    try:
+        os.utime(_get_entry_path(cache_dir, cache_key), None)
+    except OSError:
+        # may have been evicted by another process in the meantime
         pass
 
+# }}}
+
+
+# {{{ size limits and statistics
+
+def _parse_size(size):
+    if size is None or isinstance(size, six.integer_types):
+        return size
+
+    size = size.strip().upper()
+    if size == "NONE":
+        return None
+
+    for suffix, factor in [
+            ("K", 1 << 10),
+            ("M", 1 << 20),
+            ("G", 1 << 30),
+            ]:
+        if size.endswith(suffix):
+            return int(float(size[:-len(suffix)]) * factor)
+
+    return int(size)
+
+
+def _parse_age(age):
+    if age is None or isinstance(age, (float,) + six.integer_types):
+        return age
+
+    age = age.strip().upper()
+    if age == "NONE":
+        return None
+
+    return float(age) * 24 * 60 * 60
+
+
+_max_size = _parse_size(os.environ.get("PYOPENCL_CACHE_MAX_SIZE"))
+_max_age = _parse_age(os.environ.get("PYOPENCL_CACHE_MAX_AGE_DAYS"))
+
+_stats = {"hits": 0, "misses": 0}
 
-class ModuleCacheDirManager(CleanupBase):
-    def __init__(self, cleanup_m, path):
-        from os import mkdir
+# Temporary files older than this are left over from writers that died.
+_TEMP_FILE_MAX_AGE = 60 * 60
 
-        self.path = path
+# Writes scan the cache directory at most this often (in seconds), unless
+# they bring its estimated size over the limit.
+_PRUNE_INTERVAL = 10 * 60
+
+# cache_dir -> [estimated size, time of last pruning]
+_prune_state = {}
+
+# Builds, and thus cache writes, may run on several threads at once.
+_prune_lock = threading.Lock()
+
+
+def set_cache_limits(max_size=None, max_age=None):
+    """Set the limits that are enforced on the on-disk cache as new
+    entries are added to it. *max_size* is the maximum total size of the
+    cache in bytes, and *max_age* is the maximum time in seconds that an
+    entry may remain unused. Once a limit is exceeded, the least recently
+    used entries are removed first. *None* means no limit.
+
+    To keep writes cheap, the cache is only scanned on the first write of
+    a process, whenever the size of the entries written since the last
+    scan brings the cache over *max_size*, and otherwise at most every ten
+    minutes. Entries written by other processes in the meantime may
+    therefore exceed the limits for a while.
+
+    The defaults are taken from the environment variables
+    :envvar:`PYOPENCL_CACHE_MAX_SIZE` (in bytes, with an optional suffix of
+    ``K``, ``M``, or ``G``) and :envvar:`PYOPENCL_CACHE_MAX_AGE_DAYS`.
+
+    .. versionadded:: 2019.2
+    """
+    global _max_size, _max_age
+    _max_size = _parse_size(max_size)
+    _max_age = _parse_age(max_age)
+
+    if _max_size is not None and _max_size < 0:
+        raise ValueError("max_size may not be negative")
+
+
+def _scan_cache(cache_dir):
+    """Return a list of tuples *(path, size, mtime, is_temp)* for the files
+    in *cache_dir*.
+    """
+    result = []
+
+    try:
+        subdirs = os.listdir(cache_dir)
+    except OSError:
+        return result
+
+    for subdir in subdirs:
+        subdir_path = os.path.join(cache_dir, subdir)
         try:
-            mkdir(self.path)
-            cleanup_m.register(self)
-            self.existed = False
+            names = os.listdir(subdir_path)
         except OSError:
-            self.existed = True
+            # not a directory, or removed in the meantime
+            continue
 
-    def sub(self, n):
-        from os.path import join
-        return join(self.path, n)
+        for name in names:
+            path = os.path.join(subdir_path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
 
-    def reset(self):
-        import os
-        _erase_dir(self.path)
-        os.mkdir(self.path)
+            result.append(
+                    (path, st.st_size, st.st_mtime, name.startswith(_TEMP_PREFIX)))
+
+    return result
 
-    def clean_up(self):
-        pass
 
-    def error_clean_up(self):
-        _erase_dir(self.path)
+def prune_cache(cache_dir=None, max_size=None, max_age=None):
+    """Remove entries from the on-disk cache in *cache_dir*, least recently
+    used first, until it occupies no more than *max_size* bytes and no
+    entry has remained unused for longer than *max_age* seconds. Leftover
+    temporary files from interrupted writes are removed as well.
+
+    :returns: the number of entries removed.
+
+    .. versionadded:: 2019.2
+    """
+    if cache_dir is None:
+        cache_dir = get_default_cache_dir()
+
+    removed_count, _ = _prune_cache(
+            cache_dir, _parse_size(max_size), _parse_age(max_age))
+    return removed_count
+
+
+def _prune_cache(cache_dir, max_size, max_age):
+    """Return a tuple *(removed_count, remaining_size)*, where
+    *remaining_size* is the total size of the entries left in *cache_dir*.
+    """
+    from time import time
+    now = time()
+
+    entries = []
+    to_remove = []
+    for path, size, mtime, is_temp in _scan_cache(cache_dir):
+        if is_temp:
+            if now - mtime > _TEMP_FILE_MAX_AGE:
+                to_remove.append((path, False))
+        elif max_age is not None and now - mtime > max_age:
+            to_remove.append((path, True))
+        else:
+            entries.append((mtime, size, path))
+
+    total_size = sum(size for _, size, _ in entries)
+
+    if max_size is not None:
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+
+            to_remove.append((path, True))
+            total_size -= size
+
+    removed_count = 0
+    for path, is_entry in to_remove:
+        try:
+            os.unlink(path)
+        except OSError:
+            # removed by another process, or still open on Windows
+            continue
+
+        if is_entry:
+            removed_count += 1
+
+    if removed_count:
+        logger.debug("pruned %d entries from the binary cache" % removed_count)
+
+    return removed_count, total_size
+
+
+def _prune_cache_after_write(cache_dir, written_size):
+    """Enforce the limits set by :func:`set_cache_limits` on *cache_dir*
+    after *written_size* bytes of entries were added to it, if due.
+    """
+    max_size = _max_size
+    max_age = _max_age
+    if max_size is None and max_age is None:
+        return
+
+    from time import time
+    now = time()
+
+    with _prune_lock:
+        state = _prune_state.get(cache_dir)
+        if state is not None:
+            state[0] += written_size
+            estimated_size, last_prune_time = state
+            if ((max_size is None or estimated_size <= max_size)
+                    and now - last_prune_time < _PRUNE_INTERVAL):
+                return
+
+        _, remaining_size = _prune_cache(cache_dir, max_size, max_age)
+        _prune_state[cache_dir] = [remaining_size, now]
+
+
+def get_cache_stats(cache_dir=None):
+    """Return a :class:`dict` describing the on-disk cache in *cache_dir*,
+    with the following keys:
+
+    * ``entries``: the number of entries in the cache.
+    * ``total_bytes``: the total size of the entries in bytes.
+    * ``hits``, ``misses``: the number of successful and failed lookups
+      made by this process, over all cache directories.
+    * ``hit_rate``: the fraction of lookups that were successful, or *None*
+      if no lookups have been made.
+
+    .. versionadded:: 2019.2
+    """
+    if cache_dir is None:
+        cache_dir = get_default_cache_dir()
+
+    entries = [
+            size
+            for _, size, _, is_temp in _scan_cache(cache_dir)
+            if not is_temp]
+
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+            "entries": len(entries),
+            "total_bytes": sum(entries),
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "hit_rate": _stats["hits"] / lookups if lookups else None,
+            }
 
 # }}}
 
@@ -185,10 +506,9 @@ def get_dependencies(src, include_path):
                     update_checksum(checksum, included_src)
                     _inner(included_src)
 
+                    st = os.stat(included_file_name)
                     result[included_file_name] = (
-                            os.stat(included_file_name).st_mtime,
-                            checksum.hexdigest(),
-                            )
+                            st.st_mtime, st.st_size, checksum.hexdigest())
 
                     found = True
                     break  # stop searching the include path
@@ -215,15 +535,37 @@ def get_file_md5sum(fname):
     return checksum.hexdigest()
 
 
+_file_md5sum_memo = {}
+
+
+def _get_file_md5sum_memoized(fname, mtime, size):
+    key = (fname, mtime, size)
+    try:
+        return _file_md5sum_memo[key]
+    except KeyError:
+        result = _file_md5sum_memo[key] = get_file_md5sum(fname)
+        return result
+
+
 def check_dependencies(deps):
-    for name, date, md5sum in deps:
+    """Return whether the files in *deps* (as returned by
+    :func:`get_dependencies`) are unchanged. Files whose modification time
+    and size are unchanged are assumed to be unchanged. Others are hashed,
+    at most once per process for each modification time and size.
+    """
+    for name, mtime, size, md5sum in deps:
         try:
-            possibly_updated = os.stat(name).st_mtime != date
+            st = os.stat(name)
         except OSError:
             return False
-        else:
-            if possibly_updated and md5sum != get_file_md5sum(name):
-                return False
+
+        if st.st_mtime == mtime and st.st_size == size:
+            continue
+
+        if (st.st_size != size
+                or md5sum != _get_file_md5sum_memoized(
+                    name, st.st_mtime, st.st_size)):
+            return False
 
     return True
 
@@ -251,98 +593,37 @@ def get_cache_key(device, options_bytes, src):
 
 
 def retrieve_from_cache(cache_dir, cache_key):
-    class _InvalidInfoFile(RuntimeError):
-        pass
+    entry = _read_entry(cache_dir, cache_key)
 
-    from os.path import join, isdir
-    module_cache_dir = join(cache_dir, cache_key)
-    if not isdir(module_cache_dir):
+    if entry is not None and check_dependencies(entry.dependencies):
+        _stats["hits"] += 1
+        return entry.binary, entry.log
+    else:
+        # A stale entry will be replaced once the program has been rebuilt.
+        _stats["misses"] += 1
         return None
 
-    cleanup_m = CleanupManager()
-    try:
-        try:
-            CacheLockManager(cleanup_m, cache_dir)
-
-            mod_cache_dir_m = ModuleCacheDirManager(cleanup_m, module_cache_dir)
-            info_path = mod_cache_dir_m.sub("info")
-            binary_path = mod_cache_dir_m.sub("binary")
-
-            # {{{ load info file
-
-            try:
-                from six.moves.cPickle import load
-
-                try:
-                    info_file = open(info_path, "rb")
-                except IOError:
-                    raise _InvalidInfoFile()
-
-                try:
-                    try:
-                        info = load(info_file)
-                    except EOFError:
-                        raise _InvalidInfoFile()
-                finally:
-                    info_file.close()
-
-            except _InvalidInfoFile:
-                mod_cache_dir_m.reset()
-                from warnings import warn
-                warn("PyOpenCL encountered an invalid info file for cache key %s"
-                        % cache_key)
-                return None
-
-            # }}}
-
-            # {{{ load binary
-
-            binary_file = open(binary_path, "rb")
-            try:
-                binary = binary_file.read()
-            finally:
-                binary_file.close()
-
-            # }}}
-
-            if check_dependencies(info.dependencies):
-                return binary, info.log
-            else:
-                mod_cache_dir_m.reset()
-
-        except Exception:
-            cleanup_m.error_clean_up()
-            raise
-    finally:
-        cleanup_m.clean_up()
-
 
 # {{{ top-level driver
 
-class _SourceInfo(Record):
-    pass
+def get_default_cache_dir():
+    """Return the directory used for the on-disk cache if no other directory
+    is specified.
+
+    .. versionadded:: 2019.2
+    """
+    import appdirs
+    return os.path.join(appdirs.user_cache_dir("pyopencl", "pyopencl"),
+            "pyopencl-compiler-cache-v4-py%s" % (
+                ".".join(str(i) for i in sys.version_info),))
 
 
 def _create_built_program_from_source_cached(ctx, src, options_bytes,
         devices, cache_dir, include_path):
-    from os.path import join
-
     if cache_dir is None:
-        import appdirs
-        cache_dir = join(appdirs.user_cache_dir("pyopencl", "pyopencl"),
-                "pyopencl-compiler-cache-v2-py%s" % (
-                    ".".join(str(i) for i in sys.version_info),))
+        cache_dir = get_default_cache_dir()
 
-    # {{{ ensure cache directory exists
-
-    try:
-        os.makedirs(cache_dir)
-    except OSError as e:
-        from errno import EEXIST
-        if e.errno != EEXIST:
-            raise
-
-    # }}}
+    _makedirs(cache_dir)
 
     if devices is None:
         devices = ctx.devices
@@ -425,41 +706,17 @@ def _create_built_program_from_source_cached(ctx, src, options_bytes,
     # {{{ save binaries to cache
 
     if to_be_built_indices:
-        cleanup_m = CleanupManager()
-        try:
-            try:
-                CacheLockManager(cleanup_m, cache_dir)
-
-                for i in to_be_built_indices:
-                    cache_key = cache_keys[i]
-                    binary = binaries[i]
-
-                    mod_cache_dir_m = ModuleCacheDirManager(cleanup_m,
-                            join(cache_dir, cache_key))
-                    info_path = mod_cache_dir_m.sub("info")
-                    binary_path = mod_cache_dir_m.sub("binary")
-                    source_path = mod_cache_dir_m.sub("source.cl")
-
-                    outf = open(source_path, "wt")
-                    outf.write(src)
-                    outf.close()
-
-                    outf = open(binary_path, "wb")
-                    outf.write(binary)
-                    outf.close()
-
-                    from six.moves.cPickle import dump
-                    info_file = open(info_path, "wb")
-                    dump(_SourceInfo(
-                        dependencies=get_dependencies(src, include_path),
-                        log=logs[i]), info_file)
-                    info_file.close()
-
-            except Exception:
-                cleanup_m.error_clean_up()
-                raise
-        finally:
-            cleanup_m.clean_up()
+        dependencies = get_dependencies(src, include_path)
+
+        written_size = 0
+        for i in to_be_built_indices:
+            written_size += _write_entry(cache_dir, cache_keys[i], _CacheEntry(
+                dependencies=dependencies,
+                log=logs[i],
+                binary=binaries[i],
+                source=src))
+
+        _prune_cache_after_write(cache_dir, written_size)
 
     # }}}
 
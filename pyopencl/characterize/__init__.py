@@ -40,6 +40,76 @@ def has_double_support(dev):
     return False
 
 
+@memoize
+def get_opencl_c_version(dev):
+    """Return the version of OpenCL C that *dev* compiles by default (as
+    reported by :attr:`pyopencl.device_info.OPENCL_C_VERSION`) as a tuple
+    *(major, minor)*, or *None* if it cannot be determined.
+
+    .. versionadded:: 2019.2
+    """
+    if dev._get_cl_version() < (1, 1):
+        return None
+
+    import re
+    match = re.match(r"^OpenCL C ([0-9]+)\.([0-9]+)", dev.opencl_c_version)
+    if match is None:
+        return None
+
+    return int(match.group(1)), int(match.group(2))
+
+
+_HAS_DEVICE_SCOPE_ATOMICS_CACHE = {}
+
+
+def has_device_scope_atomics(dev, ctx=None):
+    """Return *True* if code for *dev* may use the atomic operations of
+    OpenCL C 2.0 and newer with ``memory_scope_device`` and
+    ``memory_order_acq_rel``, which order memory accesses between work
+    groups. The fences of OpenCL 1.x only order the accesses of a single
+    work item. Such code must be built with ``-cl-std=CL2.0`` or
+    ``-cl-std=CL3.0``, according to :func:`get_opencl_c_version`.
+
+    These operations are part of OpenCL C 2.0, but optional in OpenCL C
+    3.0. For devices compiling OpenCL C 3.0, a test program that checks for
+    the corresponding feature macros is built in *ctx* (or a new context).
+
+    .. versionadded:: 2019.2
+    """
+    try:
+        return _HAS_DEVICE_SCOPE_ATOMICS_CACHE[dev]
+    except KeyError:
+        pass
+
+    c_version = get_opencl_c_version(dev)
+    if c_version is None or c_version[0] < 2:
+        result = False
+    elif c_version[0] == 2:
+        result = True
+    else:
+        if ctx is None:
+            ctx = cl.Context([dev])
+
+        prg = cl.Program(ctx, """
+            #if !defined(__opencl_c_atomic_scope_device) \\
+                || !defined(__opencl_c_atomic_order_acq_rel)
+            #error device-scope atomics not supported
+            #endif
+
+            __kernel void test_knl() {}
+            """)
+        try:
+            prg.build(options=["-cl-std=CL%d.0" % c_version[0]],
+                    devices=[dev])
+        except cl.Error:
+            result = False
+        else:
+            result = True
+
+    _HAS_DEVICE_SCOPE_ATOMICS_CACHE[dev] = result
+    return result
+
+
 def has_amd_double_support(dev):
     """"Fix to allow incomplete amd double support in low end boards"""
 
@@ -320,6 +390,38 @@ def get_simd_group_size(dev, type_size):
     return None
 
 
+@memoize
+def get_preferred_vector_width(dev, dtype):
+    """Return the number of entries of type *dtype* that *dev* prefers to
+    process at a time using explicit vector types, or 1 if it does not
+    prefer vector types for *dtype* or *dtype* is not a real scalar type.
+
+    .. versionadded:: 2019.2
+    """
+    import numpy as np
+    dtype = np.dtype(dtype)
+
+    if dtype.kind == "f":
+        type_names = {2: "half", 4: "float", 8: "double"}
+    elif dtype.kind in "iu":
+        type_names = {1: "char", 2: "short", 4: "int", 8: "long"}
+    else:
+        return 1
+
+    try:
+        type_name = type_names[dtype.itemsize]
+    except KeyError:
+        return 1
+
+    try:
+        width = getattr(dev, "preferred_vector_width_" + type_name)
+    except Exception:
+        # e.g. half, prior to OpenCL 1.1
+        return 1
+
+    return max(width, 1)
+
+
 def get_pocl_version(platform, fallback_value=None):
     if platform.name != "Portable Computing Language":
         return None
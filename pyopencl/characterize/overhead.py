@@ -0,0 +1,316 @@
+"""Measurements of the host-side overhead of launching work through
+the various layers of PyOpenCL.
+
+Run as::
+
+    python -m pyopencl.characterize.overhead [--output results.json]
+
+to obtain the results as JSON. Host-side overhead is best measured on a CPU
+implementation such as pocl, which can be selected through
+:envvar:`PYOPENCL_CTX`.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+__copyright__ = "Copyright (C) 2019 PyOpenCL contributors"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from six.moves import range
+from timeit import default_timer
+import pyopencl as cl
+import numpy as np
+
+
+# {{{ instrumentation
+
+class CountingAllocator(object):
+    """An allocator that passes allocations on to *allocator* (or allocates
+    :class:`pyopencl.Buffer` instances if it is *None*) and counts them.
+
+    .. attribute:: count
+    """
+
+    def __init__(self, context, allocator=None):
+        self.context = context
+        self.allocator = allocator
+        self.count = 0
+
+    def __call__(self, nbytes):
+        self.count += 1
+        if self.allocator is None:
+            return cl.Buffer(self.context, cl.mem_flags.READ_WRITE, nbytes)
+        else:
+            return self.allocator(nbytes)
+
+
+def _get_cache_counters():
+    from pyopencl.tools import first_arg_dependent_lru_cache
+    from pyopencl.cache import _stats as binary_cache_stats
+
+    kernel_cache_stats = first_arg_dependent_lru_cache.get_stats()
+    return {
+            "kernel_cache_hits": kernel_cache_stats["hits"],
+            "kernel_cache_misses": kernel_cache_stats["misses"],
+            "binary_cache_hits": binary_cache_stats["hits"],
+            "binary_cache_misses": binary_cache_stats["misses"],
+            }
+
+
+def _get_device_time(events):
+    prof = cl.profiling_info
+    return sum(
+            evt.get_profiling_info(prof.END) - evt.get_profiling_info(prof.START)
+            for evt in events) * 1e-9
+
+# }}}
+
+
+# {{{ measurement driver
+
+def measure_call_overhead(queue, f, allocator=None, desired_duration=0.5,
+        batch_size=100, warmup_rounds=3):
+    """Call *f* repeatedly and measure the time spent in it.
+
+    :arg f: a function without arguments that enqueues work on *queue* and
+        returns a list of the :class:`pyopencl.Event` instances it caused.
+    :arg allocator: a :class:`CountingAllocator` used by *f*, if any.
+    :returns: a :class:`dict` with the following keys:
+
+        * ``first_call_seconds``: the wall time of the first call, including
+          any kernel generation and build.
+        * ``calls``: the number of calls measured.
+        * ``host_seconds_per_call``: the time spent in *f*, excluding the
+          time spent waiting for the device.
+        * ``wall_seconds_per_call``: the time per call including waiting for
+          the device.
+        * ``device_seconds_per_call``: the device time of the events
+          returned by *f*, if *queue* has profiling enabled, else *None*.
+        * ``buffer_allocations_per_call``: allocations through *allocator*,
+          if given, else *None*.
+        * ``kernel_cache_hits``, ``kernel_cache_misses``,
+          ``binary_cache_hits``, ``binary_cache_misses``: the number of
+          lookups in :data:`pyopencl.tools.first_arg_dependent_lru_cache`
+          and the on-disk binary cache during the measured calls.
+    """
+    queue.finish()
+    start = default_timer()
+    f()
+    queue.finish()
+    first_call_seconds = default_timer() - start
+
+    for i in range(warmup_rounds):
+        f()
+    queue.finish()
+
+    profiling = bool(
+            queue.properties & cl.command_queue_properties.PROFILING_ENABLE)
+
+    cache_counters_before = _get_cache_counters()
+    allocations_before = allocator.count if allocator is not None else 0
+
+    calls = 0
+    host_seconds = 0
+    wall_seconds = 0
+    device_seconds = 0
+
+    while True:
+        events = []
+
+        start = default_timer()
+        for i in range(batch_size):
+            events.extend(f())
+        host_seconds += default_timer() - start
+        queue.finish()
+        wall_seconds += default_timer() - start
+
+        if profiling:
+            device_seconds += _get_device_time(events)
+
+        calls += batch_size
+        if wall_seconds >= desired_duration:
+            break
+
+    result = {
+            "first_call_seconds": first_call_seconds,
+            "calls": calls,
+            "host_seconds_per_call": host_seconds / calls,
+            "wall_seconds_per_call": wall_seconds / calls,
+            "device_seconds_per_call": (
+                device_seconds / calls if profiling else None),
+            "buffer_allocations_per_call": (
+                (allocator.count - allocations_before) / calls
+                if allocator is not None else None),
+            }
+
+    cache_counters_after = _get_cache_counters()
+    for name, value in cache_counters_after.items():
+        result[name] = value - cache_counters_before[name]
+
+    return result
+
+# }}}
+
+
+# {{{ benchmarks
+
+def _get_kernel_call_benchmark(queue, size, allocator):
+    prg = cl.Program(queue.context, """
+        __kernel void axpb(__global float *y, __global const float *x,
+            float a, float b)
+        {
+            int i = get_global_id(0);
+            y[i] = a*x[i] + b;
+        }
+        """).build()
+    knl = prg.axpb
+    knl.set_scalar_arg_dtypes([None, None, np.float32, np.float32])
+
+    x = cl.Buffer(queue.context, cl.mem_flags.READ_WRITE, 4*size)
+    y = cl.Buffer(queue.context, cl.mem_flags.READ_WRITE, 4*size)
+
+    def f():
+        return [knl(queue, (size,), None, y, x, 2, 1)]
+
+    return f
+
+
+def _get_elwise_kernel_runner_benchmark(queue, size, allocator):
+    import pyopencl.array as cl_array
+    x = cl_array.zeros(queue, size, np.float32, allocator=allocator)
+    y = cl_array.empty_like(x)
+
+    def f():
+        return [cl_array.Array._axpbz(y, 2, x, 1, queue=queue)]
+
+    return f
+
+
+def _get_array_add_benchmark(queue, size, allocator):
+    import pyopencl.array as cl_array
+    x = cl_array.zeros(queue, size, np.float32, allocator=allocator)
+    y = cl_array.zeros(queue, size, np.float32, allocator=allocator)
+
+    def f():
+        return (x + y).events
+
+    return f
+
+
+def _get_reduction_kernel_call_benchmark(queue, size, allocator):
+    import pyopencl.array as cl_array
+    from pyopencl.reduction import ReductionKernel
+
+    x = cl_array.zeros(queue, size, np.float32, allocator=allocator)
+    knl = ReductionKernel(queue.context, np.float32, neutral="0",
+            reduce_expr="a+b", map_expr="x[i]*x[i]",
+            arguments="__global const float *x")
+
+    def f():
+        result, evt = knl(x, queue=queue, return_event=True,
+                allocator=allocator)
+        return [evt]
+
+    return f
+
+
+_BENCHMARKS = [
+        ("kernel_call", _get_kernel_call_benchmark),
+        ("elwise_kernel_runner", _get_elwise_kernel_runner_benchmark),
+        ("array_add", _get_array_add_benchmark),
+        ("reduction_kernel_call", _get_reduction_kernel_call_benchmark),
+        ]
+
+
+def run_overhead_benchmarks(queue, size=1, desired_duration=0.5):
+    """Measure the host-side overhead of launching work through each layer
+    of PyOpenCL: :meth:`pyopencl.Kernel.__call__`, the kernel runners
+    behind :class:`pyopencl.array.Array` arithmetic, adding two
+    :class:`pyopencl.array.Array` instances, and
+    :meth:`pyopencl.reduction.ReductionKernel.__call__`. Each layer is
+    measured with arrays of *size* entries, by
+    :func:`measure_call_overhead`.
+
+    :returns: a JSON-serializable :class:`dict` describing the environment,
+        with the results of :func:`measure_call_overhead` for each layer
+        under the key ``"benchmarks"``.
+    """
+    import sys
+    from pyopencl.version import VERSION_TEXT
+
+    dev = queue.device
+    result = {
+            "pyopencl_version": VERSION_TEXT,
+            "python_version": sys.version.split()[0],
+            "platform": dev.platform.name,
+            "device": dev.name,
+            "driver_version": dev.driver_version,
+            "size": size,
+            "benchmarks": {},
+            }
+
+    for name, get_benchmark in _BENCHMARKS:
+        allocator = CountingAllocator(queue.context)
+        f = get_benchmark(queue, size, allocator)
+        result["benchmarks"][name] = measure_call_overhead(queue, f,
+                allocator=allocator, desired_duration=desired_duration)
+
+    return result
+
+# }}}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+            prog="python -m pyopencl.characterize.overhead",
+            description="Measure the host-side overhead of launching "
+            "work through PyOpenCL and write the results as JSON.")
+    parser.add_argument("--output", metavar="FILE",
+            help="write the results to FILE instead of standard output")
+    parser.add_argument("--size", type=int, default=1,
+            help="the number of array entries to use (default: 1)")
+    parser.add_argument("--duration", type=float, default=0.5,
+            help="the time in seconds to spend on each measurement "
+            "(default: 0.5)")
+    args = parser.parse_args()
+
+    ctx = cl.create_some_context()
+    queue = cl.CommandQueue(ctx,
+            properties=cl.command_queue_properties.PROFILING_ENABLE)
+
+    result = run_overhead_benchmarks(queue, size=args.size,
+            desired_duration=args.duration)
+
+    import json
+    if args.output is None:
+        import sys
+        json.dump(result, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(args.output, "w") as outf:
+            json.dump(result, outf, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
+
+# vim: foldmethod=marker
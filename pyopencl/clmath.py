@@ -26,10 +26,21 @@ THE SOFTWARE.
 
 import pyopencl.array as cl_array
 import pyopencl.elementwise as elementwise
-from pyopencl.array import _get_common_dtype
+from pyopencl.array import _get_common_dtype, _get_out_array
 import numpy as np
 
 
+def _get_out_arrays(out, likes, dtypes, queue):
+    if out is None:
+        out = (None,) * len(likes)
+    elif len(out) != len(likes):
+        raise ValueError("'out' must be a tuple of %d arrays" % len(likes))
+
+    return tuple(
+            _get_out_array(out_ary, like, dtype, queue=queue)
+            for out_ary, like, dtype in zip(out, likes, dtypes))
+
+
 def _make_unary_array_func(name):
     @cl_array.elwise_kernel_runner
     def knl_runner(result, arg):
@@ -42,9 +53,14 @@ def _make_unary_array_func(name):
         return elementwise.get_unary_func_kernel(
                 result.context, fname, arg.dtype)
 
-    def f(array, queue=None):
-        result = array._new_like_me(queue=queue)
-        event1 = knl_runner(result, array, queue=queue)
+    def f(array, queue=None, out=None, wait_for=None):
+        if isinstance(array, cl_array.LazyExpression):
+            if out is not None:
+                raise TypeError("'out' is not supported for lazy expressions")
+            return cl_array._make_lazy_function_call(name, array)
+
+        result = _get_out_array(out, array, queue=queue)
+        event1 = knl_runner(result, array, queue=queue, wait_for=wait_for)
         result.add_event(event1)
         return result
 
@@ -76,13 +92,16 @@ def _atan2pi(result, arg1, arg2):
 atan = _make_unary_array_func("atan")
 
 
-def atan2(y, x, queue=None):
+def atan2(y, x, queue=None, out=None, wait_for=None):
     """
     .. versionadded:: 2013.1
+
+    .. versionchanged:: 2019.2
+        Added *out* and *wait_for*.
     """
     queue = queue or y.queue
-    result = y._new_like_me(_get_common_dtype(y, x, queue))
-    result.add_event(_atan2(result, y, x, queue=queue))
+    result = _get_out_array(out, y, _get_common_dtype(y, x, queue), queue=queue)
+    result.add_event(_atan2(result, y, x, queue=queue, wait_for=wait_for))
     return result
 
 
@@ -90,13 +109,16 @@ atanh = _make_unary_array_func("atanh")
 atanpi = _make_unary_array_func("atanpi")
 
 
-def atan2pi(y, x, queue=None):
+def atan2pi(y, x, queue=None, out=None, wait_for=None):
     """
     .. versionadded:: 2013.1
+
+    .. versionchanged:: 2019.2
+        Added *out* and *wait_for*.
     """
     queue = queue or y.queue
-    result = y._new_like_me(_get_common_dtype(y, x, queue))
-    result.add_event(_atan2pi(result, y, x, queue=queue))
+    result = _get_out_array(out, y, _get_common_dtype(y, x, queue), queue=queue)
+    result.add_event(_atan2pi(result, y, x, queue=queue, wait_for=wait_for))
     return result
 
 
@@ -129,12 +151,13 @@ def _fmod(result, arg, mod):
                                        arg.dtype, mod.dtype)
 
 
-def fmod(arg, mod, queue=None):
+def fmod(arg, mod, queue=None, out=None, wait_for=None):
     """Return the floating point remainder of the division `arg/mod`,
     for each element in `arg` and `mod`."""
     queue = (queue or arg.queue) or mod.queue
-    result = arg._new_like_me(_get_common_dtype(arg, mod, queue))
-    result.add_event(_fmod(result, arg, mod, queue=queue))
+    result = _get_out_array(out, arg, _get_common_dtype(arg, mod, queue),
+            queue=queue)
+    result.add_event(_fmod(result, arg, mod, queue=queue, wait_for=wait_for))
     return result
 
 # TODO: fract
@@ -146,13 +169,12 @@ def _frexp(sig, expt, arg):
                                         expt.dtype, arg.dtype)
 
 
-def frexp(arg, queue=None):
+def frexp(arg, queue=None, out=None, wait_for=None):
     """Return a tuple `(significands, exponents)` such that
     `arg == significand * 2**exponent`.
     """
-    sig = arg._new_like_me(queue=queue)
-    expt = arg._new_like_me(queue=queue, dtype=np.int32)
-    event1 = _frexp(sig, expt, arg, queue=queue)
+    sig, expt = _get_out_arrays(out, (arg, arg), (None, np.int32), queue)
+    event1 = _frexp(sig, expt, arg, queue=queue, wait_for=wait_for)
     sig.add_event(event1)
     expt.add_event(event1)
     return sig, expt
@@ -169,13 +191,14 @@ def _ldexp(result, sig, exp):
                                         sig.dtype, exp.dtype)
 
 
-def ldexp(significand, exponent, queue=None):
+def ldexp(significand, exponent, queue=None, out=None, wait_for=None):
     """Return a new array of floating point values composed from the
     entries of `significand` and `exponent`, paired together as
     `result = significand * 2**exponent`.
     """
-    result = significand._new_like_me(queue=queue)
-    result.add_event(_ldexp(result, significand, exponent))
+    result = _get_out_array(out, significand, queue=queue)
+    result.add_event(_ldexp(result, significand, exponent,
+            queue=queue, wait_for=wait_for))
     return result
 
 
@@ -199,13 +222,12 @@ def _modf(intpart, fracpart, arg):
                                        fracpart.dtype, arg.dtype)
 
 
-def modf(arg, queue=None):
+def modf(arg, queue=None, out=None, wait_for=None):
     """Return a tuple `(fracpart, intpart)` of arrays containing the
     integer and fractional parts of `arg`.
     """
-    intpart = arg._new_like_me(queue=queue)
-    fracpart = arg._new_like_me(queue=queue)
-    event1 = _modf(intpart, fracpart, arg, queue=queue)
+    fracpart, intpart = _get_out_arrays(out, (arg, arg), (None, None), queue)
+    event1 = _modf(intpart, fracpart, arg, queue=queue, wait_for=wait_for)
     fracpart.add_event(event1)
     intpart.add_event(event1)
     return fracpart, intpart
@@ -260,22 +282,21 @@ def _hankel_01(h0, h1, x):
             h0.context, h0.dtype, x.dtype)
 
 
-def bessel_jn(n, x, queue=None):
-    result = x._new_like_me(queue=queue)
-    result.add_event(_bessel_jn(result, n, x, queue=queue))
+def bessel_jn(n, x, queue=None, out=None, wait_for=None):
+    result = _get_out_array(out, x, queue=queue)
+    result.add_event(_bessel_jn(result, n, x, queue=queue, wait_for=wait_for))
     return result
 
 
-def bessel_yn(n, x, queue=None):
-    result = x._new_like_me(queue=queue)
-    result.add_event(_bessel_yn(result, n, x, queue=queue))
+def bessel_yn(n, x, queue=None, out=None, wait_for=None):
+    result = _get_out_array(out, x, queue=queue)
+    result.add_event(_bessel_yn(result, n, x, queue=queue, wait_for=wait_for))
     return result
 
 
-def hankel_01(x, queue=None):
-    h0 = x._new_like_me(queue=queue)
-    h1 = x._new_like_me(queue=queue)
-    event1 = _hankel_01(h0, h1, x, queue=queue)
+def hankel_01(x, queue=None, out=None, wait_for=None):
+    h0, h1 = _get_out_arrays(out, (x, x), (None, None), queue)
+    event1 = _hankel_01(h0, h1, x, queue=queue, wait_for=wait_for)
     h0.add_event(event1)
     h1.add_event(event1)
     return h0, h1
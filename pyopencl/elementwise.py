@@ -29,7 +29,7 @@ OTHER DEALINGS IN THE SOFTWARE.
 """
 
 
-from pyopencl.tools import context_dependent_memoize
+from pyopencl.tools import context_dependent_lru_memoize
 import numpy as np
 import pyopencl as cl
 from pytools import memoize_method
@@ -42,7 +42,7 @@ from pyopencl.tools import (dtype_to_ctype, VectorArg, ScalarArg,
 def get_elwise_program(context, arguments, operation,
         name="elwise_kernel", options=[],
         preamble="", loop_prep="", after_loop="",
-        use_range=False):
+        use_range=False, vector_operation=None, vector_width=None):
 
     if use_range:
         body = r"""//CL//
@@ -63,6 +63,24 @@ def get_elwise_program(context, arguments, operation,
             }
           }
           """
+    elif vector_operation is not None:
+        # *vector_operation* processes the vector_width entries starting at
+        # i*vector_width, the scalar loop handles the remainder.
+        body = """//CL//
+          for (i = work_group_start + lid; i < n / %(vector_width)d;
+            i += gsize)
+          {
+            %(vector_operation)s;
+          }
+          for (i = (n / %(vector_width)d)*%(vector_width)d
+              + work_group_start + lid; i < n; i += gsize)
+          {
+            %%(operation)s;
+          }
+          """ % {
+              "vector_operation": vector_operation,
+              "vector_width": vector_width,
+              }
     else:
         body = """//CL//
           for (i = work_group_start + lid; i < n; i += gsize)
@@ -116,6 +134,15 @@ def get_elwise_kernel_and_types(context, arguments, operation,
     from pyopencl.tools import parse_arg_list, get_arg_offset_adjuster_code
     parsed_args = parse_arg_list(arguments, with_offset=True)
 
+    # arguments that come after the size or range arguments
+    trailing_args = kwargs.pop("trailing_args", [])
+
+    # recorded for get_strided_elwise_kernel
+    elwise_spec = dict(
+            context=context, arguments=list(parsed_args), operation=operation,
+            name=name, options=options, preamble=preamble,
+            use_range=use_range, kwargs=dict(kwargs))
+
     auto_preamble = kwargs.pop("auto_preamble", True)
 
     pragmas = []
@@ -151,6 +178,8 @@ def get_elwise_kernel_and_types(context, arguments, operation,
     else:
         parsed_args.append(ScalarArg(np.intp, "n"))
 
+    parsed_args.extend(trailing_args)
+
     loop_prep = kwargs.pop("loop_prep", "")
     loop_prep = get_arg_offset_adjuster_code(parsed_args) + loop_prep
     prg = get_elwise_program(
@@ -162,6 +191,9 @@ def get_elwise_kernel_and_types(context, arguments, operation,
 
     kernel = getattr(prg, name)
     kernel.set_scalar_arg_dtypes(get_arg_list_scalar_arg_dtypes(parsed_args))
+    kernel._pyopencl_elwise_spec = elwise_spec
+    kernel._pyopencl_strided_variants = {}
+    kernel._pyopencl_vectorized_variants = {}
 
     return kernel, parsed_args
 
@@ -180,6 +212,230 @@ def get_elwise_kernel(context, arguments, operation,
 # }}}
 
 
+# {{{ strided operands
+
+def _get_strided_operation(operation, arguments, is_strided):
+    """Rewrite the accesses ``name[i]`` to the vector arguments in
+    *operation* for which *is_strided* is true to go through byte offsets
+    computed from the strides. Return *None* if the operation accesses
+    those arguments in any other way.
+    """
+    import re
+    vector_args = [arg for arg in arguments if isinstance(arg, VectorArg)]
+
+    for arg, strided in zip(vector_args, is_strided):
+        if not strided:
+            continue
+
+        access_re = r"\b%s\s*\[\s*i\s*\]" % arg.name
+        if (len(re.findall(access_re, operation))
+                != len(re.findall(r"\b%s\b" % arg.name, operation))):
+            return None
+
+        operation = re.sub(access_re,
+                "(*(__global %(tp)s *) ((__global char *) %(name)s "
+                "+ %(name)s__byte_offset))"
+                % {"tp": dtype_to_ctype(arg.dtype), "name": arg.name},
+                operation)
+
+    return operation
+
+
+def get_strided_elwise_kernel(kernel, ndim, is_strided):
+    """Return a variant of *kernel*, which must have been obtained from
+    :func:`get_elwise_kernel`, in which the vector arguments for which the
+    corresponding entry of *is_strided* is true may have arbitrary strides.
+    Return *None* if the operation of *kernel* does not allow this, e.g.
+    because it accesses these arguments at other indices than ``i``.
+
+    The variant takes the same arguments as *kernel*, followed by the
+    *ndim* extents of the array shape, followed by the *ndim* byte strides
+    of each strided vector argument. The index ``i`` runs over the shape
+    in C order. Vector arguments that are not strided are indexed by ``i``
+    directly, and must therefore be C-contiguous.
+
+    .. versionadded:: 2019.2
+    """
+    is_strided = tuple(is_strided)
+    try:
+        return kernel._pyopencl_strided_variants[ndim, is_strided]
+    except KeyError:
+        pass
+
+    spec = kernel._pyopencl_elwise_spec
+    if spec["use_range"]:
+        raise ValueError("strided operands are not supported with ranges")
+
+    arguments = spec["arguments"]
+    kwargs = spec["kwargs"]
+    strided_args = [arg
+            for arg, strided in zip(
+                [arg for arg in arguments if isinstance(arg, VectorArg)],
+                is_strided)
+            if strided]
+
+    operation = _get_strided_operation(
+            spec["operation"], arguments, is_strided)
+
+    # The byte offsets are only available within the loop.
+    for code_kwarg in ["loop_prep", "after_loop"]:
+        code = kwargs.get(code_kwarg, "")
+        if _get_strided_operation(code, arguments, is_strided) != code:
+            operation = None
+
+    if operation is None:
+        result = None
+    else:
+        # {{{ compute byte offsets from i
+
+        index_code = ["long %s__byte_offset = 0;" % arg.name
+            for arg in strided_args]
+        index_code.append("long pyopencl__rem = i;")
+        index_code.append("long pyopencl__idx;")
+
+        for axis in range(ndim-1, -1, -1):
+            if axis:
+                index_code.append(
+                        "pyopencl__idx = pyopencl__rem %% pyopencl__shape%d; "
+                        "pyopencl__rem /= pyopencl__shape%d;" % (axis, axis))
+            else:
+                index_code.append("pyopencl__idx = pyopencl__rem;")
+
+            for arg in strided_args:
+                index_code.append(
+                        "%(name)s__byte_offset += "
+                        "pyopencl__idx*%(name)s__stride%(axis)d;"
+                        % {"name": arg.name, "axis": axis})
+
+        # }}}
+
+        trailing_args = (
+                [ScalarArg(np.intp, "pyopencl__shape%d" % axis)
+                    for axis in range(ndim)]
+                + [ScalarArg(np.intp, "%s__stride%d" % (arg.name, axis))
+                    for arg in strided_args
+                    for axis in range(ndim)])
+
+        result, _ = get_elwise_kernel_and_types(
+                spec["context"], arguments,
+                "\n".join(index_code) + "\n" + operation,
+                name=spec["name"], options=spec["options"],
+                preamble=spec["preamble"], trailing_args=trailing_args,
+                **kwargs)
+
+    kernel._pyopencl_strided_variants[ndim, is_strided] = result
+    return result
+
+# }}}
+
+
+# {{{ vectorized operands
+
+def _get_vector_operation(operation, arguments, width):
+    """Return a version of *operation* that processes the *width* entries
+    starting at index ``i*width`` using vector loads and stores, or *None*
+    if *operation* is not of the form ``name[i] = expr``, where *expr* only
+    consists of the arithmetic operators ``+-*/``, parentheses, scalar
+    arguments and accesses ``name[i]`` to vector arguments.
+    """
+    import re
+    vector_names = [arg.name for arg in arguments if isinstance(arg, VectorArg)]
+    scalar_names = [arg.name for arg in arguments if isinstance(arg, ScalarArg)]
+
+    def access_re(name):
+        return r"\b%s\s*\[\s*i\s*\]" % name
+
+    match = re.match(r"^\s*(\w+)\s*\[\s*i\s*\]\s*=([^=].*?);?\s*$",
+            operation, re.DOTALL)
+    if match is None or match.group(1) not in vector_names:
+        return None
+
+    dest, expr = match.groups()
+
+    remainder = expr
+    for name in vector_names:
+        remainder = re.sub(access_re(name), "", remainder)
+    for name in scalar_names:
+        remainder = re.sub(r"\b%s\b" % name, "", remainder)
+    if re.search(r"[^-+*/()\s]", remainder):
+        return None
+
+    for name in vector_names:
+        expr = re.sub(access_re(name), "vload%d(i, %s)" % (width, name), expr)
+
+    dtype = arguments[0].dtype
+    if dtype.kind == "f":
+        base_type = {4: "float", 8: "double"}[dtype.itemsize]
+    else:
+        base_type = {1: "char", 2: "short", 4: "int", 8: "long"}[dtype.itemsize]
+        if dtype.kind == "u":
+            base_type = "u" + base_type
+
+    return "vstore%d((%s%d) (%s), i, %s)" % (
+            width, base_type, width, expr, dest)
+
+
+def get_vectorized_elwise_kernel(kernel, device):
+    """Return a tuple ``(vector_kernel, vector_width)``, where
+    *vector_kernel* is a variant of *kernel*, which must have been obtained
+    from :func:`get_elwise_kernel`, that processes *vector_width* entries
+    at a time using the vector types of OpenCL. The variant takes the same
+    arguments as *kernel*, and should be launched with ``n / vector_width``
+    work items. Return ``(None, 1)`` if vectorization is not possible
+    or not worthwhile on *device*.
+
+    Only operations with a single element type, and of the form described
+    in :func:`_get_vector_operation`, are vectorized. The vector width is
+    the one preferred by *device* for the element type.
+
+    .. versionadded:: 2019.2
+    """
+    variants = getattr(kernel, "_pyopencl_vectorized_variants", None)
+    if variants is None:
+        return None, 1
+
+    try:
+        return variants[device]
+    except KeyError:
+        pass
+
+    result = None, 1
+
+    spec = kernel._pyopencl_elwise_spec
+    arguments = spec["arguments"]
+    kwargs = spec["kwargs"]
+    dtypes = set(arg.dtype for arg in arguments)
+
+    vector_operation = None
+    if (len(dtypes) == 1
+            and not spec["use_range"]
+            and not kwargs.get("loop_prep")
+            and not kwargs.get("after_loop")):
+        dtype, = dtypes
+        if dtype.kind in "iu" or (dtype.kind == "f" and dtype.itemsize >= 4):
+            from pyopencl.characterize import get_preferred_vector_width
+            width = get_preferred_vector_width(device, dtype)
+
+            if width in [2, 4, 8, 16]:
+                vector_operation = _get_vector_operation(
+                        spec["operation"], arguments, width)
+
+    if vector_operation is not None:
+        vector_kernel, _ = get_elwise_kernel_and_types(
+                spec["context"], arguments, spec["operation"],
+                name=spec["name"], options=spec["options"],
+                preamble=spec["preamble"],
+                vector_operation=vector_operation, vector_width=width,
+                **kwargs)
+        vector_kernel._pyopencl_vectorized_variants = None
+        result = vector_kernel, width
+
+    variants[device] = result
+    return result
+
+# }}}
+
+
 # {{{ ElementwiseKernel driver
 
 class ElementwiseKernel:
@@ -196,6 +452,10 @@ class ElementwiseKernel:
     :arg options: passed unmodified to :meth:`pyopencl.Program.build`.
     :arg preamble: a piece of C source code that gets inserted outside of the
         function context in the elementwise operation's kernel source code.
+    :arg async_build: if *True*, start building the kernel in the background
+        (see :meth:`pyopencl.Program.build_async`) instead of on first use.
+        The first call waits for the build to finish and raises any errors
+        that occurred during it.
 
     .. warning :: Using a `return` statement in *operation* will lead to
         incorrect results, as some elements may never get processed. Use
@@ -203,10 +463,23 @@ class ElementwiseKernel:
 
     .. versionchanged:: 2013.1
         Added ``PYOPENCL_ELWISE_CONTINUE``.
+
+    Array arguments that are not contiguous are supported if all array
+    arguments have the same shape and *operation* accesses the
+    non-contiguous ones only as ``name[i]``. No range or slice may be given
+    in that case.
+
+    .. versionchanged:: 2019.2
+        Added *async_build*.
+
+    .. versionchanged:: 2019.2
+        Added support for non-contiguous array arguments.
     """
 
     def __init__(self, context, arguments, operation,
             name="elwise_kernel", options=[], **kwargs):
+        async_build = kwargs.pop("async_build", False)
+
         self.context = context
         self.arguments = arguments
         self.operation = operation
@@ -214,6 +487,12 @@ class ElementwiseKernel:
         self.options = options
         self.kwargs = kwargs
 
+        if async_build:
+            self._build_future = cl._get_build_executor().submit(
+                    self.get_kernel, False)
+        else:
+            self._build_future = None
+
     @memoize_method
     def get_kernel(self, use_range):
         knl, arg_descrs = get_elwise_kernel_and_types(
@@ -245,6 +524,12 @@ class ElementwiseKernel:
         slice_ = kwargs.pop("slice", None)
         capture_as = kwargs.pop("capture_as", None)
 
+        # read once, as another thread may clear it concurrently
+        build_future = self._build_future
+        if build_future is not None:
+            build_future.result()
+            self._build_future = None
+
         use_range = range_ is not None or slice_ is not None
         kernel, arg_descrs = self.get_kernel(use_range)
 
@@ -260,14 +545,12 @@ class ElementwiseKernel:
         # {{{ assemble arg array
 
         invocation_args = []
+        vec_args = []
         for arg, arg_descr in zip(args, arg_descrs):
             if isinstance(arg_descr, VectorArg):
-                if not arg.flags.forc:
-                    raise RuntimeError("ElementwiseKernel cannot "
-                            "deal with non-contiguous arrays")
-
                 if repr_vec is None:
                     repr_vec = arg
+                vec_args.append(arg)
 
                 invocation_args.append(arg.base_data)
                 if arg_descr.with_offset:
@@ -285,6 +568,22 @@ class ElementwiseKernel:
         if queue is None:
             queue = repr_vec.queue
 
+        is_contiguous = all(arg.flags.forc for arg in vec_args)
+
+        if not is_contiguous:
+            if use_range:
+                raise RuntimeError("ElementwiseKernel cannot "
+                        "deal with non-contiguous arrays when given a range "
+                        "or slice")
+
+            from pyopencl.array import _get_strided_elwise_kernel_and_args
+            kernel, extra_args = _get_strided_elwise_kernel_and_args(
+                    kernel, repr_vec, vec_args)
+            if kernel is None:
+                raise RuntimeError("ElementwiseKernel cannot "
+                        "deal with non-contiguous arrays unless they have "
+                        "the same shape and are only accessed at index i")
+
         if slice_ is not None:
             if range_ is not None:
                 raise TypeError("may not specify both range and slice "
@@ -292,10 +591,6 @@ class ElementwiseKernel:
 
             range_ = slice(*slice_.indices(repr_vec.size))
 
-        max_wg_size = kernel.get_work_group_info(
-                cl.kernel_work_group_info.WORK_GROUP_SIZE,
-                queue.device)
-
         if range_ is not None:
             start = range_.start
             if start is None:
@@ -309,13 +604,23 @@ class ElementwiseKernel:
 
             invocation_args.append(step)
 
-            from pyopencl.array import splay
-            gs, ls = splay(queue,
-                    abs(range_.stop - start)//step,
-                    max_wg_size)
+            from pyopencl.array import _get_elwise_launch_sizes
+            gs, ls = _get_elwise_launch_sizes(queue, kernel,
+                    abs(range_.stop - start)//step, invocation_args)
+        elif is_contiguous:
+            invocation_args.append(repr_vec.size)
+            max_wg_size = kernel.get_work_group_info(
+                    cl.kernel_work_group_info.WORK_GROUP_SIZE,
+                    queue.device)
+            gs, ls = repr_vec.get_sizes(queue, max_wg_size,
+                    kernel=kernel, kernel_args=invocation_args)
         else:
             invocation_args.append(repr_vec.size)
-            gs, ls = repr_vec.get_sizes(queue, max_wg_size)
+            invocation_args.extend(extra_args)
+
+            from pyopencl.array import _get_elwise_launch_sizes
+            gs, ls = _get_elwise_launch_sizes(queue, kernel, repr_vec.size,
+                    invocation_args)
 
         if capture_as is not None:
             kernel.set_args(*invocation_args)
@@ -369,7 +674,7 @@ class ElementwiseTemplate(KernelTemplateBase):
 
 # {{{ kernels supporting array functionality
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_take_kernel(context, dtype, idx_dtype, vec_count=1):
     ctx = {
             "idx_tp": dtype_to_ctype(idx_dtype),
@@ -392,7 +697,7 @@ def get_take_kernel(context, dtype, idx_dtype, vec_count=1):
             name="take")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_take_put_kernel(context, dtype, idx_dtype, with_offsets, vec_count=1):
     ctx = {
             "idx_tp": dtype_to_ctype(idx_dtype),
@@ -432,7 +737,7 @@ def get_take_put_kernel(context, dtype, idx_dtype, with_offsets, vec_count=1):
             name="take_put")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_put_kernel(context, dtype, idx_dtype, vec_count=1):
     ctx = {
             "idx_tp": dtype_to_ctype(idx_dtype),
@@ -467,7 +772,7 @@ def get_put_kernel(context, dtype, idx_dtype, vec_count=1):
             name="put")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_copy_kernel(context, dtype_dest, dtype_src):
     src = "src[i]"
     if dtype_dest.kind == "c" != dtype_src.kind:
@@ -503,7 +808,7 @@ def real_dtype(dtype):
     return dtype.type(0).real.dtype
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_axpbyz_kernel(context, dtype_x, dtype_y, dtype_z):
     ax = "a*x[i]"
     by = "b*y[i]"
@@ -543,7 +848,7 @@ def get_axpbyz_kernel(context, dtype_x, dtype_y, dtype_z):
             name="axpbyz")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_axpbz_kernel(context, dtype_a, dtype_x, dtype_b, dtype_z):
     a_is_complex = dtype_a.kind == "c"
     x_is_complex = dtype_x.kind == "c"
@@ -604,7 +909,7 @@ def get_axpbz_kernel(context, dtype_a, dtype_x, dtype_b, dtype_z):
             name="axpb")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_multiply_kernel(context, dtype_x, dtype_y, dtype_z):
     x_is_complex = dtype_x.kind == "c"
     y_is_complex = dtype_y.kind == "c"
@@ -636,7 +941,7 @@ def get_multiply_kernel(context, dtype_x, dtype_y, dtype_z):
             name="multiply")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_divide_kernel(context, dtype_x, dtype_y, dtype_z):
     x_is_complex = dtype_x.kind == "c"
     y_is_complex = dtype_y.kind == "c"
@@ -673,7 +978,7 @@ def get_divide_kernel(context, dtype_x, dtype_y, dtype_z):
             name="divide")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_rdivide_elwise_kernel(context, dtype_x, dtype_y, dtype_z):
     # implements y / x!
     x_is_complex = dtype_x.kind == "c"
@@ -708,7 +1013,7 @@ def get_rdivide_elwise_kernel(context, dtype_x, dtype_y, dtype_z):
             name="divide_r")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_fill_kernel(context, dtype):
     return get_elwise_kernel(context,
             "%(tp)s *z, %(tp)s a" % {
@@ -719,7 +1024,7 @@ def get_fill_kernel(context, dtype):
             name="fill")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_reverse_kernel(context, dtype):
     return get_elwise_kernel(context,
             "%(tp)s *z, %(tp)s *y" % {
@@ -729,7 +1034,7 @@ def get_reverse_kernel(context, dtype):
             name="reverse")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_arange_kernel(context, dtype):
     if dtype.kind == "c":
         expr = (
@@ -747,7 +1052,7 @@ def get_arange_kernel(context, dtype):
         name="arange")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_pow_kernel(context, dtype_x, dtype_y, dtype_z,
         is_base_array, is_exp_array):
     if is_base_array:
@@ -798,7 +1103,7 @@ def get_pow_kernel(context, dtype_x, dtype_y, dtype_z,
             name="pow_method")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_unop_kernel(context, operator, res_dtype, in_dtype):
     return get_elwise_kernel(context, [
         VectorArg(res_dtype, "z", with_offset=True),
@@ -808,7 +1113,7 @@ def get_unop_kernel(context, operator, res_dtype, in_dtype):
         name="unary_op_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_array_scalar_binop_kernel(context, operator, dtype_res, dtype_a, dtype_b):
     return get_elwise_kernel(context, [
         VectorArg(dtype_res, "out", with_offset=True),
@@ -819,7 +1124,7 @@ def get_array_scalar_binop_kernel(context, operator, dtype_res, dtype_a, dtype_b
         name="scalar_binop_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_array_binop_kernel(context, operator, dtype_res, dtype_a, dtype_b):
     return get_elwise_kernel(context, [
         VectorArg(dtype_res, "out", with_offset=True),
@@ -830,7 +1135,7 @@ def get_array_binop_kernel(context, operator, dtype_res, dtype_a, dtype_b):
         name="binop_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_array_scalar_comparison_kernel(context, operator, dtype_a):
     return get_elwise_kernel(context, [
         VectorArg(np.int8, "out", with_offset=True),
@@ -841,7 +1146,7 @@ def get_array_scalar_comparison_kernel(context, operator, dtype_a):
         name="scalar_comparison_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_array_comparison_kernel(context, operator, dtype_a, dtype_b):
     return get_elwise_kernel(context, [
         VectorArg(np.int8, "out", with_offset=True),
@@ -852,7 +1157,7 @@ def get_array_comparison_kernel(context, operator, dtype_a, dtype_b):
         name="comparison_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_unary_func_kernel(context, func_name, in_dtype, out_dtype=None):
     if out_dtype is None:
         out_dtype = in_dtype
@@ -865,7 +1170,7 @@ def get_unary_func_kernel(context, func_name, in_dtype, out_dtype=None):
         name="%s_kernel" % func_name)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_binary_func_kernel(context, func_name, x_dtype, y_dtype, out_dtype,
                            preamble="", name=None):
     return get_elwise_kernel(context, [
@@ -878,7 +1183,7 @@ def get_binary_func_kernel(context, func_name, x_dtype, y_dtype, out_dtype,
         preamble=preamble)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_float_binary_func_kernel(context, func_name, x_dtype, y_dtype,
                                  out_dtype, preamble="", name=None):
     if (np.array(0, x_dtype) * np.array(0, y_dtype)).itemsize > 4:
@@ -901,14 +1206,14 @@ def get_float_binary_func_kernel(context, func_name, x_dtype, y_dtype,
         preamble=preamble)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_fmod_kernel(context, out_dtype=np.float32, arg_dtype=np.float32,
                     mod_dtype=np.float32):
     return get_float_binary_func_kernel(context, 'fmod', arg_dtype,
                                         mod_dtype, out_dtype)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_modf_kernel(context, int_dtype=np.float32,
                     frac_dtype=np.float32, x_dtype=np.float32):
     return get_elwise_kernel(context, [
@@ -922,7 +1227,7 @@ def get_modf_kernel(context, int_dtype=np.float32,
         name="modf_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_frexp_kernel(context, sign_dtype=np.float32, exp_dtype=np.float32,
                      x_dtype=np.float32):
     return get_elwise_kernel(context, [
@@ -938,7 +1243,7 @@ def get_frexp_kernel(context, sign_dtype=np.float32, exp_dtype=np.float32,
         name="frexp_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_ldexp_kernel(context, out_dtype=np.float32, sig_dtype=np.float32,
                      expt_dtype=np.float32):
     return get_binary_func_kernel(
@@ -947,7 +1252,7 @@ def get_ldexp_kernel(context, out_dtype=np.float32, sig_dtype=np.float32,
         name="ldexp_kernel")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_bessel_kernel(context, which_func, out_dtype=np.float64,
                       order_dtype=np.int32, x_dtype=np.float64):
     if x_dtype.kind != "c":
@@ -996,7 +1301,7 @@ def get_bessel_kernel(context, which_func, out_dtype=np.float64,
             """)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_hankel_01_kernel(context, out_dtype, x_dtype):
     if x_dtype != np.complex128:
         raise NotImplementedError("non-complex double dtype")
@@ -1026,7 +1331,7 @@ def get_hankel_01_kernel(context, out_dtype, x_dtype):
         """)
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_diff_kernel(context, dtype):
     return get_elwise_kernel(context, [
             VectorArg(dtype, "result", with_offset=True),
@@ -1036,7 +1341,7 @@ def get_diff_kernel(context, dtype):
             name="diff")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_if_positive_kernel(context, crit_dtype, dtype):
     return get_elwise_kernel(context, [
             VectorArg(dtype, "result", with_offset=True),
@@ -1047,6 +1352,25 @@ def get_if_positive_kernel(context, crit_dtype, dtype):
             "result[i] = crit[i] > 0 ? then_[i] : else_[i]",
             name="if_positive")
 
+
+@context_dependent_lru_memoize
+def get_fused_elwise_kernel(context, out_dtype, arg_descrs, statements, expr):
+    """Return a kernel evaluating the expression *expr* (after executing
+    *statements*) into ``out[i]``. *arg_descrs* is a tuple of tuples
+    ``(is_vector, dtype)``, whose entries become the arguments ``a0``,
+    ``a1``, ... of the kernel. See :class:`pyopencl.array.LazyExpression`.
+    """
+    args = [VectorArg(out_dtype, "out", with_offset=True)]
+    for i, (is_vector, dtype) in enumerate(arg_descrs):
+        if is_vector:
+            args.append(VectorArg(dtype, "a%d" % i, with_offset=True))
+        else:
+            args.append(ScalarArg(dtype, "a%d" % i))
+
+    return get_elwise_kernel(context, args,
+            "%s\nout[i] = %s" % (statements, expr),
+            name="fused_elwise")
+
 # }}}
 
 # vim: fdm=marker:filetype=pyopencl
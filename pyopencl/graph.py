@@ -0,0 +1,297 @@
+"""Recording of repeated sequences of enqueued commands for cheap replay."""
+
+from __future__ import division, absolute_import, print_function
+
+__copyright__ = "Copyright (C) 2019 PyOpenCL contributors"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from functools import partial
+import six
+import numpy as np
+import pyopencl as cl
+import pyopencl._cl as _cl
+from pyopencl.array import Array
+
+
+class GraphParameter(object):
+    """A placeholder for a value that is supplied each time a
+    :class:`CommandGraph` is replayed. Obtain instances from
+    :meth:`CommandGraph.parameter`.
+
+    .. attribute:: name
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "GraphParameter(%r)" % self.name
+
+
+class _KernelArgBinding(object):
+    """Sets a kernel argument from the value of a :class:`GraphParameter`,
+    or from a fixed value.
+
+    .. attribute:: value
+
+        The value the argument was last set to. Setting a kernel argument
+        does not retain memory objects, so this keeps them alive for as
+        long as the kernel may be launched with them.
+    """
+
+    def __init__(self, kernel, index, dtype):
+        self.kernel = kernel
+        self.index = index
+        self.dtype = dtype
+        self.value = None
+
+    def bind(self, value):
+        if self.dtype is not None:
+            value = np.array(value, dtype=self.dtype)
+        elif isinstance(value, Array):
+            if value.offset:
+                value = value.base_data.get_sub_region(
+                        value.offset, value.nbytes)
+            else:
+                value = value.base_data
+        self.kernel.set_arg(self.index, value)
+        self.value = value
+
+
+class _OperandBinding(object):
+    """Regenerates a copy or fill node from the current values of its
+    :class:`GraphParameter` operands.
+    """
+
+    def __init__(self, graph, node_index, make_node, args, kwargs):
+        self.graph = graph
+        self.node_index = node_index
+        self.make_node = make_node
+        self.args = args
+        self.kwargs = kwargs
+
+    def bind(self, value):
+        values = self.graph._values
+        args = [values[arg.name] if isinstance(arg, GraphParameter) else arg
+                for arg in self.args]
+        kwargs = dict(
+                (key, values[arg.name] if isinstance(arg, GraphParameter) else arg)
+                for key, arg in six.iteritems(self.kwargs))
+
+        self.graph._nodes[self.node_index] = self.make_node(*args, **kwargs)
+
+
+_UNBOUND = object()
+
+
+class CommandGraph(object):
+    """A sequence of kernel launches, copies and fills that is recorded once
+    and then replayed on *queue* with little Python overhead per command.
+
+    Arguments that differ between replays are recorded as
+    :class:`GraphParameter` placeholders and supplied to :meth:`__call__`.
+    All other arguments are set once, when the command is added. Each
+    kernel launch uses its own copy of the kernel, so that its arguments
+    persist between replays. When a graph is replayed, only arguments
+    whose parameter value changed since the last replay are set again.
+
+    *queue* must be an in-order queue. Commands in the graph are ordered by
+    the queue, so no event lists are built on replay.
+
+    For example::
+
+        graph = cl.graph.CommandGraph(queue)
+        u = graph.parameter("u")
+        dt = graph.parameter("dt")
+        graph.add_kernel(knl, u_array.shape, None, u, tmp.data, dt)
+        graph.add_copy(u, tmp.data)
+
+        for step in range(nsteps):
+            evt = graph(u=u_array, dt=0.1)
+
+    .. automethod:: parameter
+    .. automethod:: add_kernel
+    .. automethod:: add_copy
+    .. automethod:: add_fill
+    .. automethod:: __call__
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, queue):
+        if (queue.properties
+                & cl.command_queue_properties.OUT_OF_ORDER_EXEC_MODE_ENABLE):
+            raise ValueError("command graphs require an in-order queue")
+
+        self.queue = queue
+
+        self._nodes = []
+        self._parameters = {}
+
+        # parameter name -> list of bindings
+        self._bindings = {}
+
+        # bindings of arguments that are not parameters, which keep their
+        # values alive
+        self._fixed_bindings = []
+
+        # parameter name -> value of the last replay
+        self._values = {}
+
+    def parameter(self, name):
+        """Return a :class:`GraphParameter` named *name*, to be used in
+        place of arguments to the ``add_*`` methods. Its value is given by
+        the keyword argument *name* of :meth:`__call__`.
+        """
+        try:
+            return self._parameters[name]
+        except KeyError:
+            result = self._parameters[name] = GraphParameter(name)
+            self._bindings[name] = []
+            self._values[name] = _UNBOUND
+            return result
+
+    def _check_parameter(self, param):
+        if self._parameters.get(param.name) is not param:
+            raise ValueError("parameter '%s' does not belong to this graph"
+                    % param.name)
+
+    def add_kernel(self, kernel, global_size, local_size, *args, **kwargs):
+        """Add a launch of the :class:`pyopencl.Kernel` *kernel*, with the
+        same arguments as :meth:`pyopencl.Kernel.__call__`. The only
+        supported keyword argument is *global_offset*.
+
+        Any of *args* may be a :class:`GraphParameter`. Scalar arguments
+        are converted using the types given to
+        :meth:`pyopencl.Kernel.set_scalar_arg_dtypes`, if any.
+        :class:`pyopencl.array.Array` instances are passed as their
+        underlying buffer, or as a sub-buffer if they have an offset, which
+        must then meet the alignment requirements of sub-buffers. The graph
+        keeps all arguments alive.
+        """
+        global_offset = kwargs.pop("global_offset", None)
+        if kwargs:
+            raise TypeError("unexpected keyword arguments: %s"
+                    % ", ".join(kwargs))
+
+        if len(args) != kernel.num_args:
+            raise TypeError("kernel '%s' expects %d arguments, %d given"
+                    % (kernel.function_name, kernel.num_args, len(args)))
+
+        scalar_arg_dtypes = getattr(kernel, "_scalar_arg_dtypes", None)
+        if scalar_arg_dtypes is None:
+            scalar_arg_dtypes = [None] * len(args)
+
+        node_kernel = cl.Kernel(kernel.program, kernel.function_name)
+
+        for i, (arg, dtype) in enumerate(zip(args, scalar_arg_dtypes)):
+            if dtype is not None:
+                dtype = np.dtype(dtype)
+
+            binding = _KernelArgBinding(node_kernel, i, dtype)
+            if isinstance(arg, GraphParameter):
+                self._check_parameter(arg)
+                self._bindings[arg.name].append(binding)
+            else:
+                binding.bind(arg)
+                self._fixed_bindings.append(binding)
+
+        self._nodes.append(partial(_cl.enqueue_nd_range_kernel,
+                self.queue, node_kernel, global_size, local_size,
+                global_offset))
+
+    def _add_operand_node(self, make_node, args, kwargs):
+        params = [arg
+                for arg in list(args) + list(kwargs.values())
+                if isinstance(arg, GraphParameter)]
+
+        if not params:
+            self._nodes.append(make_node(*args, **kwargs))
+            return
+
+        for param in params:
+            self._check_parameter(param)
+
+        binding = _OperandBinding(self, len(self._nodes), make_node, args,
+                kwargs)
+        self._nodes.append(None)
+        for param in set(param.name for param in params):
+            self._bindings[param].append(binding)
+
+    def add_copy(self, dest, src, **kwargs):
+        """Add a copy with the same arguments as
+        :func:`pyopencl.enqueue_copy`, except *wait_for*. *dest* and *src*
+        may be :class:`GraphParameter` instances.
+        """
+        def make_node(dest, src, **kwargs):
+            return partial(cl.enqueue_copy, self.queue, dest, src, **kwargs)
+
+        self._add_operand_node(make_node, (dest, src), kwargs)
+
+    def add_fill(self, mem, pattern, offset, size):
+        """Add a fill with the same arguments as
+        :func:`pyopencl.enqueue_fill_buffer`, except *wait_for*. *mem* and
+        *pattern* may be :class:`GraphParameter` instances.
+        """
+        def make_node(mem, pattern):
+            return partial(cl.enqueue_fill_buffer, self.queue, mem, pattern,
+                    offset, size)
+
+        self._add_operand_node(make_node, (mem, pattern), {})
+
+    def __call__(self, wait_for=None, **kwargs):
+        """Enqueue the recorded commands, with the values of the graph's
+        parameters given as keyword arguments. Values may be omitted if they
+        are the same as in the previous replay.
+
+        :returns: the :class:`pyopencl.Event` of the last command, or *None*
+            if the graph is empty.
+        """
+        values = self._values
+
+        for name, value in six.iteritems(kwargs):
+            try:
+                last_value = values[name]
+            except KeyError:
+                raise TypeError("unknown graph parameter '%s'" % name)
+
+            if value is last_value:
+                continue
+
+            values[name] = value
+            for binding in self._bindings[name]:
+                binding.bind(value)
+
+        if len(kwargs) < len(values):
+            for name, value in six.iteritems(values):
+                if value is _UNBOUND:
+                    raise TypeError("no value given for graph parameter '%s'"
+                            % name)
+
+        if wait_for:
+            cl.enqueue_barrier(self.queue, wait_for=wait_for)
+
+        evt = None
+        for node in self._nodes:
+            evt = node()
+
+        return evt
@@ -241,6 +241,126 @@ def generate_specific_arg_handling_body(function_name,
 # }}}
 
 
+# {{{ fast-path arg handling body
+
+# struct characters with the same size on all platforms (when used with the
+# '=' prefix), by dtype kind and itemsize
+_FIXED_SIZE_STRUCT_CHARS = {
+        ("b", 1): "?",
+        ("i", 1): "b", ("i", 2): "h", ("i", 4): "i", ("i", 8): "q",
+        ("u", 1): "B", ("u", 2): "H", ("u", 4): "I", ("u", 8): "Q",
+        ("f", 2): "e", ("f", 4): "f", ("f", 8): "d",
+        }
+
+
+def generate_fast_arg_handling_body(num_passed_args, scalar_arg_dtypes,
+        work_around_arg_count_bug):
+    """Generate code that sets all arguments with at most two calls into
+    the wrapper: all scalar arguments are packed by a single
+    :class:`struct.Struct` and set by :meth:`Kernel._set_arg_buf_pack`, and
+    all other arguments are set by :meth:`Kernel._set_arg_multi`. Either
+    call is skipped if its arguments are the same as in the previous call.
+    This assumes that the argument list has already been validated by
+    :func:`generate_specific_arg_handling_body`.
+
+    :returns: a tuple *(struct_format, scalar_layout, body)*, where
+        *struct_format* is *None* if there are no scalar arguments, and
+        *scalar_layout* alternates CL argument indices and sizes.
+    """
+    from pytools.py_codegen import PythonCodeGenerator, Indentation
+    gen = PythonCodeGenerator()
+
+    struct_chars = []
+    scalar_exprs = []
+    scalar_layout = []
+    obj_args = []
+
+    if scalar_arg_dtypes is None:
+        scalar_arg_dtypes = [None] * num_passed_args
+
+    fp_arg_count = 0
+    cl_arg_idx = 0
+
+    for arg_idx, arg_dtype in enumerate(scalar_arg_dtypes):
+        arg_var = "arg%d" % arg_idx
+
+        if arg_dtype is None or np.dtype(arg_dtype).char == "V":
+            obj_args.append((cl_arg_idx, arg_var))
+            cl_arg_idx += 1
+            continue
+
+        arg_dtype = np.dtype(arg_dtype)
+
+        if arg_dtype.kind == "c":
+            real_char = _FIXED_SIZE_STRUCT_CHARS["f", arg_dtype.itemsize // 2]
+            parts = ["%s.real" % arg_var, "%s.imag" % arg_var]
+
+            if (work_around_arg_count_bug == "pocl"
+                    and arg_dtype == np.complex128
+                    and fp_arg_count + 2 <= 8):
+                # real and imaginary part as separate arguments
+                for part in parts:
+                    struct_chars.append(real_char)
+                    scalar_exprs.append(part)
+                    scalar_layout.extend([cl_arg_idx, arg_dtype.itemsize // 2])
+                    cl_arg_idx += 1
+            else:
+                struct_chars.append(2*real_char)
+                scalar_exprs.extend(parts)
+                scalar_layout.extend([cl_arg_idx, arg_dtype.itemsize])
+                cl_arg_idx += 1
+
+            fp_arg_count += 2
+
+        else:
+            if arg_dtype.kind == "f":
+                fp_arg_count += 1
+
+            struct_chars.append(
+                    _FIXED_SIZE_STRUCT_CHARS[arg_dtype.kind, arg_dtype.itemsize])
+            scalar_exprs.append(arg_var)
+            scalar_layout.extend([cl_arg_idx, arg_dtype.itemsize])
+            cl_arg_idx += 1
+
+    if struct_chars:
+        gen("buf = _scalar_pack(%s)" % ", ".join(scalar_exprs))
+        gen("if buf != self._pyopencl_last_scalar_buf:")
+        with Indentation(gen):
+            gen("self._set_arg_buf_pack(_SCALAR_LAYOUT, buf)")
+            gen("self._pyopencl_last_scalar_buf = buf")
+        gen("")
+
+    if obj_args:
+        obj_arg_vars = [arg_var for _, arg_var in obj_args]
+
+        # Only weak references to the previous arguments are kept, so that
+        # kernels (which may live in a cache for the life of the process)
+        # do not keep the last buffers passed to them alive. A dead
+        # reference compares unequal to any argument but None, for which
+        # _none_ref stands in.
+        gen("last_obj_args = self._pyopencl_last_obj_args")
+        gen("if last_obj_args is None or %s:" % " or ".join(
+            "last_obj_args[{i}]() is not {arg_var} "
+            "or {arg_var} is None and last_obj_args[{i}] is not _none_ref"
+            .format(i=i, arg_var=arg_var)
+            for i, arg_var in enumerate(obj_arg_vars)))
+        with Indentation(gen):
+            gen("self._set_arg_multi((%s,))" % ", ".join(
+                "%d, %s" % (cl_idx, arg_var) for cl_idx, arg_var in obj_args))
+            gen("self._pyopencl_last_obj_args = _get_obj_arg_refs((%s,))"
+                    % ", ".join(obj_arg_vars))
+        gen("")
+
+    if not struct_chars and not obj_args:
+        gen("pass")
+
+    struct_format = "=" + "".join(struct_chars) if struct_chars else None
+
+    return struct_format, tuple(scalar_layout), gen
+
+# }}}
+
+
 # {{{ error handler
 
 def wrap_in_error_handler(body, arg_names):
@@ -314,6 +434,64 @@ def _generate_enqueue_and_set_args_module(function_name,
     gen("from pyopencl import status_code")
     gen("")
 
+    if _CPY2 or _PYPY:
+        # the fast path does not apply the numpy scalar workaround in
+        # generate_buffer_arg_setter
+        arg_setter = err_handler
+    else:
+        struct_format, scalar_layout, fast_body = \
+                generate_fast_arg_handling_body(num_passed_args, scalar_arg_dtypes,
+                        work_around_arg_count_bug=work_around_arg_count_bug)
+
+        gen("import pyopencl._cl as _cl")
+        gen("from weakref import ref as _weakref_ref")
+        gen("from pyopencl import _KERNEL_ARG_CLASSES")
+        gen("")
+        gen("")
+        gen("def _none_ref():")
+        with Indentation(gen):
+            gen("return None")
+        gen("")
+        gen("")
+        gen("def _get_obj_arg_refs(obj_args):")
+        with Indentation(gen):
+            # Only objects that refer to device-side state may be skipped
+            # when passed again. Host buffers may have been modified.
+            gen("refs = []")
+            gen("for obj_arg in obj_args:")
+            with Indentation(gen):
+                gen("if obj_arg is None:")
+                with Indentation(gen):
+                    gen("refs.append(_none_ref)")
+                gen("elif isinstance(obj_arg, _KERNEL_ARG_CLASSES):")
+                with Indentation(gen):
+                    gen("refs.append(_weakref_ref(obj_arg))")
+                gen("else:")
+                with Indentation(gen):
+                    gen("return None")
+            gen("return tuple(refs)")
+        gen("")
+        gen("")
+        gen("_SCALAR_FORMAT = %r" % struct_format)
+        gen("_SCALAR_LAYOUT = %r" % (scalar_layout,))
+        gen("")
+
+        # If anything goes wrong, start over on the slow path, which knows
+        # which argument caused the problem.
+        arg_setter = PythonCodeGenerator()
+        arg_setter("try:")
+        with Indentation(arg_setter):
+            arg_setter.extend(fast_body)
+        arg_setter("except Exception:")
+        with Indentation(arg_setter):
+            arg_setter("self._pyopencl_last_scalar_buf = None")
+            arg_setter("self._pyopencl_last_obj_args = None")
+            # not importing _cl, which is a global here
+            arg_setter("import numpy as np")
+            arg_setter("from pyopencl import _KERNEL_ARG_CLASSES")
+            arg_setter("")
+            arg_setter.extend(err_handler)
+
     # {{{ generate _enqueue
 
     enqueue_name = "enqueue_knl_%s" % function_name
@@ -326,8 +504,9 @@ def _generate_enqueue_and_set_args_module(function_name,
                         "wait_for=None"])))
 
     with Indentation(gen):
-        add_local_imports(gen)
-        gen.extend(err_handler)
+        if arg_setter is err_handler:
+            add_local_imports(gen)
+        gen.extend(arg_setter)
 
         gen("""
             return _cl.enqueue_nd_range_kernel(queue, self, global_size, local_size,
@@ -343,8 +522,9 @@ def _generate_enqueue_and_set_args_module(function_name,
             % (", ".join(["self"] + arg_names)))
 
     with Indentation(gen):
-        add_local_imports(gen)
-        gen.extend(err_handler)
+        if arg_setter is err_handler:
+            add_local_imports(gen)
+        gen.extend(arg_setter)
 
     # }}}
 
@@ -352,7 +532,7 @@ def _generate_enqueue_and_set_args_module(function_name,
 
 
 invoker_cache = WriteOncePersistentDict(
-        "pyopencl-invoker-cache-v6",
+        "pyopencl-invoker-cache-v7",
         key_builder=_NumpyTypesKeyBuilder())
 
 
@@ -379,6 +559,13 @@ def generate_enqueue_and_set_args(function_name,
 
     pmod, enqueue_name = result
 
+    # Struct instances cannot be pickled, so this is added after retrieval
+    # from the cache.
+    struct_format = pmod.mod_globals.get("_SCALAR_FORMAT")
+    if struct_format is not None:
+        from struct import Struct
+        pmod.mod_globals["_scalar_pack"] = Struct(struct_format).pack
+
     return (
             pmod.mod_globals[enqueue_name],
             pmod.mod_globals["set_args"])
@@ -0,0 +1,216 @@
+"""Ahead-of-time compilation of recorded programs into the binary cache.
+
+Set the environment variable :envvar:`PYOPENCL_RECORD_MANIFEST` to the name of
+a file while running an application, and every program built from source
+(including the kernels generated by :mod:`pyopencl.array`,
+:mod:`pyopencl.elementwise`, :mod:`pyopencl.reduction` and
+:mod:`pyopencl.scan`) is appended to that file. Then run::
+
+    python -m pyopencl.precompile MANIFEST
+
+on the machine the application is deployed to, to fill its binary cache.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+__copyright__ = "Copyright (C) 2019 PyOpenCL contributors"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import json
+import six
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# {{{ recording
+
+# hashes of the manifest lines written by this process, by file name
+_recorded = {}
+
+
+def _get_device_id(device):
+    from pyopencl.cache import get_device_cache_id
+    # round-trip through JSON to turn tuples into lists, for comparison with
+    # identifiers read from a manifest
+    return json.loads(json.dumps(get_device_cache_id(device)))
+
+
+def record_build(filename, source, options, devices):
+    """Append a build of *source* with the user-supplied *options* (as
+    passed to :meth:`pyopencl.Program.build`) on *devices* to the manifest
+    *filename*. Builds already recorded by this process are not recorded
+    again.
+
+    Default options, include paths and :envvar:`PYOPENCL_BUILD_OPTIONS` are
+    added by :func:`precompile` on the machine the builds are replayed on,
+    so that the cache keys match those computed by the application there.
+    """
+    if isinstance(source, six.binary_type):
+        source = source.decode("utf-8")
+
+    from pyopencl import _split_options_if_necessary
+    options = [
+            option.decode("utf-8") if isinstance(option, six.binary_type)
+            else option
+            for option in _split_options_if_necessary(options)]
+
+    line = json.dumps({
+        "source": source,
+        "options": options,
+        "devices": [_get_device_id(dev) for dev in devices],
+        }, sort_keys=True)
+
+    from hashlib import md5
+    line_hash = md5(line.encode("utf-8")).digest()
+    recorded = _recorded.setdefault(filename, set())
+    if line_hash in recorded:
+        return
+    recorded.add(line_hash)
+
+    # A single write per line keeps lines from concurrently recording
+    # processes from being interleaved.
+    with open(filename, "a") as outf:
+        outf.write(line + "\n")
+
+# }}}
+
+
+# {{{ replay
+
+def load_manifest(filename):
+    """Return a list of the builds recorded in the manifest *filename*,
+    without duplicates.
+    """
+    result = []
+    seen = set()
+
+    with open(filename, "r") as inf:
+        for line in inf:
+            line = line.strip()
+            if not line or line in seen:
+                continue
+
+            seen.add(line)
+            result.append(json.loads(line))
+
+    return result
+
+
+def precompile(builds, devices=None, cache_dir=None):
+    """Carry out *builds* (as returned by :func:`load_manifest`) on those of
+    *devices* that match the devices they were recorded on, storing the
+    results in the binary cache at *cache_dir*. Builds run in parallel
+    on the pool used by :meth:`pyopencl.Program.build_async`.
+
+    :arg devices: the devices to build for. Defaults to all devices on all
+        platforms.
+    :returns: a tuple ``(built_count, cached_count, skipped_count)``, where
+        *skipped_count* counts recorded devices that are not among
+        *devices*.
+    """
+    import pyopencl as cl
+    from pyopencl.cache import create_built_program_from_source_cached
+
+    if devices is None:
+        devices = [dev
+                for platform in cl.get_platforms()
+                for dev in platform.get_devices()]
+
+    id_to_device = {}
+    for dev in devices:
+        id_to_device.setdefault(json.dumps(_get_device_id(dev)), dev)
+
+    contexts = {}
+
+    def get_context(dev):
+        try:
+            return contexts[dev]
+        except KeyError:
+            result = contexts[dev] = cl.Context([dev])
+            return result
+
+    executor = cl._get_build_executor()
+    futures = []
+    skipped_count = 0
+
+    for build in builds:
+        for dev_id in build["devices"]:
+            dev = id_to_device.get(json.dumps(dev_id))
+            if dev is None:
+                skipped_count += 1
+                continue
+
+            ctx = get_context(dev)
+            options_bytes, include_path = cl.Program._process_build_options(
+                    ctx, build["options"])
+
+            futures.append(executor.submit(
+                create_built_program_from_source_cached,
+                ctx, build["source"], options_bytes, [dev],
+                cache_dir=cache_dir, include_path=include_path))
+
+    built_count = 0
+    cached_count = 0
+    for future in futures:
+        _, was_cached = future.result()
+        if was_cached:
+            cached_count += 1
+        else:
+            built_count += 1
+
+    logger.info("precompile: %d built, %d already cached, %d skipped"
+            % (built_count, cached_count, skipped_count))
+
+    return built_count, cached_count, skipped_count
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+            prog="python -m pyopencl.precompile",
+            description="Fill the PyOpenCL binary cache with the programs "
+            "recorded in one or more manifests.")
+    parser.add_argument("manifest", nargs="+",
+            help="a manifest recorded using PYOPENCL_RECORD_MANIFEST")
+    parser.add_argument("--cache-dir",
+            help="the binary cache to fill (default: the per-user cache)")
+    args = parser.parse_args()
+
+    builds = []
+    for filename in args.manifest:
+        builds.extend(load_manifest(filename))
+
+    built_count, cached_count, skipped_count = precompile(
+            builds, cache_dir=args.cache_dir)
+
+    print("%d programs built, %d already cached, %d skipped "
+            "(recorded on devices not present here)"
+            % (built_count, cached_count, skipped_count))
+
+
+if __name__ == "__main__":
+    main()
+
+# }}}
+
+# vim: foldmethod=marker
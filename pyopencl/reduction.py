@@ -34,8 +34,9 @@ None of the original source code remains.
 
 
 import pyopencl as cl
+from pytools import memoize_method
 from pyopencl.tools import (
-        context_dependent_memoize,
+        context_dependent_lru_memoize,
         dtype_to_ctype, KernelTemplateBase,
         _process_code_for_macro)
 import numpy as np
@@ -61,8 +62,37 @@ KERNEL = r"""//CL//
 
     typedef ${out_type} pcl_out_type;
 
+    <%def name="reduce_in_local_memory()">
+        <%
+          cur_size = group_size
+        %>
+
+        % while cur_size > 1:
+            barrier(CLK_LOCAL_MEM_FENCE);
+
+            <%
+            new_size = cur_size // 2
+            assert new_size * 2 == cur_size
+            %>
+
+            if (pcl_lid < ${new_size})
+            {
+                pcl_ldata[pcl_lid] = PCL_REDUCE(
+                  pcl_ldata[pcl_lid],
+                  pcl_ldata[pcl_lid + ${new_size}]);
+            }
+
+            <% cur_size = new_size %>
+
+        % endwhile
+    </%def>
+
     __kernel void ${name}(
       __global pcl_out_type *pcl_out__base, long pcl_out__offset,
+      % if single_pass:
+        __global pcl_out_type *pcl_partials,
+        volatile __global atomic_uint *pcl_group_counter,
+      % endif
       ${arguments}
       long pcl_start, long pcl_step, long pcl_stop,
       unsigned int pcl_seq_count, long n)
@@ -91,30 +121,53 @@ KERNEL = r"""//CL//
 
         pcl_ldata[pcl_lid] = pcl_acc;
 
-        <%
-          cur_size = group_size
-        %>
+        ${reduce_in_local_memory()}
 
-        % while cur_size > 1:
-            barrier(CLK_LOCAL_MEM_FENCE);
+        % if single_pass:
+            // The last group to finish reduces the partial results of
+            // all groups. Each group releases its partial result through
+            // the counter, and the last group acquires all of them from it.
 
-            <%
-            new_size = cur_size // 2
-            assert new_size * 2 == cur_size
-            %>
+            __local int pcl_is_last_group;
 
-            if (pcl_lid < ${new_size})
+            if (pcl_lid == 0)
             {
-                pcl_ldata[pcl_lid] = PCL_REDUCE(
-                  pcl_ldata[pcl_lid],
-                  pcl_ldata[pcl_lid + ${new_size}]);
+                pcl_partials[get_group_id(0)] = pcl_ldata[0];
+
+                pcl_is_last_group = (
+                    atomic_fetch_add_explicit(pcl_group_counter, 1,
+                      memory_order_acq_rel, memory_scope_device)
+                    == get_num_groups(0) - 1);
             }
 
-            <% cur_size = new_size %>
+            barrier(CLK_LOCAL_MEM_FENCE);
 
-        % endwhile
+            if (pcl_is_last_group)
+            {
+                atomic_load_explicit(pcl_group_counter,
+                    memory_order_acquire, memory_scope_device);
+
+                pcl_acc = ${neutral};
+                for (unsigned pcl_j = pcl_lid; pcl_j < get_num_groups(0);
+                    pcl_j += PCL_GROUP_SIZE)
+                  pcl_acc = PCL_REDUCE(pcl_acc, pcl_partials[pcl_j]);
+
+                pcl_ldata[pcl_lid] = pcl_acc;
 
-        if (pcl_lid == 0) pcl_out[get_group_id(0)] = pcl_ldata[0];
+                ${reduce_in_local_memory()}
+
+                if (pcl_lid == 0)
+                {
+                    pcl_out[0] = pcl_ldata[0];
+
+                    // get ready for the next launch
+                    atomic_store_explicit(pcl_group_counter, 0,
+                        memory_order_relaxed, memory_scope_device);
+                }
+            }
+        % else:
+            if (pcl_lid == 0) pcl_out[get_group_id(0)] = pcl_ldata[0];
+        % endif
     }
     """
 
@@ -123,19 +176,7 @@ KERNEL = r"""//CL//
 
 # {{{ internal codegen frontends
 
-def _get_reduction_source(
-        ctx, out_type, out_type_size,
-        neutral, reduce_expr, map_expr, parsed_args,
-        name="reduce_kernel", preamble="", arg_prep="",
-        device=None, max_group_size=None):
-
-    if device is not None:
-        devices = [device]
-    else:
-        devices = ctx.devices
-
-    # {{{ compute group size
-
+def _get_group_size(devices, out_type_size, max_group_size=None):
     def get_dev_group_size(device):
         # dirty fix for the RV770 boards
         max_work_group_size = device.max_work_group_size
@@ -156,7 +197,21 @@ def _get_reduction_source(
     if max_group_size is not None:
         group_size = min(max_group_size, group_size)
 
-    # }}}
+    return group_size
+
+
+def _get_reduction_source(
+        ctx, out_type, out_type_size,
+        neutral, reduce_expr, map_expr, parsed_args,
+        name="reduce_kernel", preamble="", arg_prep="",
+        device=None, max_group_size=None, single_pass=False):
+
+    if device is not None:
+        devices = [device]
+    else:
+        devices = ctx.devices
+
+    group_size = _get_group_size(devices, out_type_size, max_group_size)
 
     from mako.template import Template
     from pytools import all
@@ -176,6 +231,7 @@ def _get_reduction_source(
         name=name,
         preamble=preamble,
         arg_prep=arg_prep,
+        single_pass=single_pass,
         double_support=all(has_double_support(dev) for dev in devices),
         ))
 
@@ -194,7 +250,7 @@ def get_reduction_kernel(stage,
          ctx, dtype_out,
          neutral, reduce_expr, map_expr=None, arguments=None,
          name="reduce_kernel", preamble="",
-         device=None, options=[], max_group_size=None):
+         device=None, options=[], max_group_size=None, single_pass=False):
 
     if map_expr is None:
         if stage == 2:
@@ -220,7 +276,7 @@ def get_reduction_kernel(stage,
     inf = _get_reduction_source(
             ctx, dtype_to_ctype(dtype_out), dtype_out.itemsize,
             neutral, reduce_expr, map_expr, arguments,
-            name, preamble, arg_prep, device, max_group_size)
+            name, preamble, arg_prep, device, max_group_size, single_pass)
 
     inf.program = cl.Program(ctx, inf.source)
     inf.program.build(options)
@@ -230,6 +286,7 @@ def get_reduction_kernel(stage,
 
     inf.kernel.set_scalar_arg_dtypes(
             [None, np.int64]
+            + ([None, None] if single_pass else [])
             + get_arg_list_scalar_arg_dtypes(inf.arg_types)
             + [np.int64]*3 + [np.uint32, np.int64]
             )
@@ -244,9 +301,30 @@ def get_reduction_kernel(stage,
 class ReductionKernel:
     def __init__(self, ctx, dtype_out,
             neutral, reduce_expr, map_expr=None, arguments=None,
-            name="reduce_kernel", options=[], preamble=""):
+            name="reduce_kernel", options=[], preamble="", async_build=False):
 
-        dtype_out = self.dtype_out = np.dtype(dtype_out)
+        self.dtype_out = np.dtype(dtype_out)
+
+        self.context = ctx
+        self._build_args = (neutral, reduce_expr, map_expr, arguments)
+        self._build_kwargs = dict(name=name, options=options, preamble=preamble)
+
+        from weakref import WeakKeyDictionary
+        self._single_pass_scratch = WeakKeyDictionary()
+
+        if async_build:
+            self._build_future = cl._get_build_executor().submit(self._build)
+        else:
+            self._build()
+            self._build_future = None
+
+    def _build(self):
+        ctx = self.context
+        dtype_out = self.dtype_out
+        neutral, reduce_expr, map_expr, arguments = self._build_args
+        name = self._build_kwargs["name"]
+        options = self._build_kwargs["options"]
+        preamble = self._build_kwargs["preamble"]
 
         max_group_size = None
         trip_count = 0
@@ -276,6 +354,72 @@ class ReductionKernel:
                 name=name+"_stage2", options=options, preamble=preamble,
                 max_group_size=max_group_size)
 
+    # {{{ single-pass operation
+
+    @memoize_method
+    def _get_single_pass_inf(self):
+        """Return a variant of :attr:`stage_1_inf` that carries out the
+        whole reduction in one launch, or *None* if that is not possible
+        on the devices of the context.
+        """
+        from pyopencl.characterize import (
+                has_device_scope_atomics, get_opencl_c_version)
+        if not all(has_device_scope_atomics(dev, self.context)
+                for dev in self.context.devices):
+            return None
+
+        c_major_versions = set(
+                get_opencl_c_version(dev)[0] for dev in self.context.devices)
+        if len(c_major_versions) != 1:
+            # no single -cl-std for all devices
+            return None
+        c_major_version, = c_major_versions
+
+        from pyopencl import _split_options_if_necessary
+        options = (list(_split_options_if_necessary(self._build_kwargs["options"]))
+                + ["-cl-std=CL%d.0" % c_major_version])
+
+        group_size = self.stage_1_inf.group_size
+        inf = get_reduction_kernel(1, self.context, self.dtype_out,
+                *self._build_args,
+                name=self._build_kwargs["name"]+"_single_pass",
+                options=options,
+                preamble=self._build_kwargs["preamble"],
+                max_group_size=group_size, single_pass=True)
+
+        if inf.group_size != group_size:
+            return None
+
+        for dev in self.context.devices:
+            if group_size > inf.kernel.get_work_group_info(
+                    cl.kernel_work_group_info.WORK_GROUP_SIZE, dev):
+                return None
+
+        return inf
+
+    def _get_single_pass_scratch(self, queue, max_group_count):
+        """Return a tuple ``(partials, group_counter)`` of buffers for use
+        by the single-pass kernel in *queue*. These are allocated once per
+        queue and reused, which is safe because launches within an in-order
+        queue do not overlap.
+        """
+        try:
+            return self._single_pass_scratch[queue]
+        except KeyError:
+            pass
+
+        partials = cl.Buffer(self.context, cl.mem_flags.READ_WRITE,
+                max_group_count*self.dtype_out.itemsize)
+        group_counter = cl.Buffer(self.context, cl.mem_flags.READ_WRITE, 4)
+        cl.enqueue_copy(queue, group_counter, np.zeros(1, np.uint32),
+                is_blocking=True)
+
+        result = partials, group_counter
+        self._single_pass_scratch[queue] = result
+        return result
+
+    # }}}
+
     def __call__(self, *args, **kwargs):
         """
         :arg range: A :class:`slice` object. Specifies the range of indices on which
@@ -294,6 +438,12 @@ class ReductionKernel:
         MAX_GROUP_COUNT = 1024  # noqa
         SMALL_SEQ_COUNT = 4  # noqa
 
+        # read once, as another thread may clear it concurrently
+        build_future = self._build_future
+        if build_future is not None:
+            build_future.result()
+            self._build_future = None
+
         from pyopencl.array import empty
 
         stage_inf = self.stage_1_inf
@@ -400,6 +550,39 @@ class ReductionKernel:
 
             size_args = [start, step, range_.stop, seq_count, sz]
 
+            if stage_inf is self.stage_1_inf and group_count > 1:
+                single_pass_inf = None
+                if not (use_queue.properties
+                        & cl.command_queue_properties.OUT_OF_ORDER_EXEC_MODE_ENABLE):
+                    single_pass_inf = self._get_single_pass_inf()
+
+                if single_pass_inf is not None:
+                    if out is not None:
+                        result = out
+                    else:
+                        result = empty(use_queue,
+                                (), self.dtype_out,
+                                allocator=allocator)
+
+                    partials, group_counter = self._get_single_pass_scratch(
+                            use_queue, MAX_GROUP_COUNT)
+
+                    last_evt = single_pass_inf.kernel(
+                            use_queue,
+                            (group_count*stage_inf.group_size,),
+                            (stage_inf.group_size,),
+                            *([result.base_data, result.offset,
+                                partials, group_counter]
+                                + invocation_args + size_args),
+                            wait_for=wait_for)
+
+                    result.add_event(last_evt)
+
+                    if return_event:
+                        return result, last_evt
+                    else:
+                        return result
+
             if group_count == 1 and out is not None:
                 result = out
             elif group_count == 1:
@@ -436,6 +619,471 @@ class ReductionKernel:
 # }}}
 
 
+# {{{ axis reduction kernel
+
+AXIS_KERNEL = r"""//CL//
+    #define PCL_GROUP_SIZE ${group_size}
+    #define PCL_REDUCE(a, b) (${reduce_expr})
+
+    % if double_support:
+        #if __OPENCL_C_VERSION__ < 120
+        #pragma OPENCL EXTENSION cl_khr_fp64: enable
+        #endif
+        #define PYOPENCL_DEFINE_CDOUBLE
+    % endif
+
+    #include <pyopencl-complex.h>
+
+    ${preamble}
+
+    typedef ${out_type} pcl_out_type;
+
+    <%def name="find_reduction_start(out_idx)">
+        % for k in range(len(in_types)):
+            long pcl_in${k}_idx = 0;
+        % endfor
+        {
+            long pcl_rem = ${out_idx};
+            % for d in reversed(range(out_ndim)):
+            {
+                const long pcl_coord = pcl_rem % pcl_out_dim${d};
+                pcl_rem /= pcl_out_dim${d};
+                % for k in range(len(in_types)):
+                    pcl_in${k}_idx += pcl_coord * pcl_in${k}_stride${d};
+                % endfor
+            }
+            % endfor
+        }
+    </%def>
+
+    <%def name="reduce_entry(j)">
+        {
+            % for k, in_type in enumerate(in_types):
+                const ${in_type} in${k} =
+                    pcl_in${k}[pcl_in${k}_idx + (${j})*pcl_in${k}_red_stride];
+            % endfor
+            pcl_acc = PCL_REDUCE(pcl_acc, (${map_expr}));
+        }
+    </%def>
+
+    __kernel void ${name}(
+      __global pcl_out_type *pcl_out__base, long pcl_out__offset,
+      % for k, in_type in enumerate(in_types):
+        __global const ${in_type} *pcl_in${k}__base, long pcl_in${k}__offset,
+      % endfor
+      % for d in range(out_ndim):
+        long pcl_out_dim${d},
+      % endfor
+      % for k in range(len(in_types)):
+        % for d in range(out_ndim):
+          long pcl_in${k}_stride${d},
+        % endfor
+        long pcl_in${k}_red_stride,
+      % endfor
+      long pcl_red_count, long pcl_out_count)
+    {
+        __global pcl_out_type *pcl_out = (__global pcl_out_type *) (
+            (__global char *) pcl_out__base + pcl_out__offset);
+        % for k, in_type in enumerate(in_types):
+            __global const ${in_type} *pcl_in${k} =
+                (__global const ${in_type} *) (
+                    (__global const char *) pcl_in${k}__base
+                    + pcl_in${k}__offset);
+        % endfor
+
+        % if per_group:
+            // one work group per output entry
+
+            __local pcl_out_type pcl_ldata[PCL_GROUP_SIZE];
+            unsigned int pcl_lid = get_local_id(0);
+
+            for (long pcl_out_idx = get_group_id(0);
+                pcl_out_idx < pcl_out_count;
+                pcl_out_idx += get_num_groups(0))
+            {
+                ${find_reduction_start("pcl_out_idx")}
+
+                pcl_out_type pcl_acc = ${neutral};
+                for (long pcl_j = pcl_lid; pcl_j < pcl_red_count;
+                    pcl_j += PCL_GROUP_SIZE)
+                    ${reduce_entry("pcl_j")}
+
+                pcl_ldata[pcl_lid] = pcl_acc;
+
+                <%
+                  cur_size = group_size
+                %>
+
+                % while cur_size > 1:
+                    barrier(CLK_LOCAL_MEM_FENCE);
+
+                    <%
+                    new_size = cur_size // 2
+                    assert new_size * 2 == cur_size
+                    %>
+
+                    if (pcl_lid < ${new_size})
+                    {
+                        pcl_ldata[pcl_lid] = PCL_REDUCE(
+                          pcl_ldata[pcl_lid],
+                          pcl_ldata[pcl_lid + ${new_size}]);
+                    }
+
+                    <% cur_size = new_size %>
+
+                % endwhile
+
+                if (pcl_lid == 0)
+                    pcl_out[pcl_out_idx] = pcl_ldata[0];
+
+                // pcl_ldata is reused for the next output entry
+                barrier(CLK_LOCAL_MEM_FENCE);
+            }
+        % else:
+            // one work item per output entry
+
+            for (long pcl_out_idx = get_global_id(0);
+                pcl_out_idx < pcl_out_count;
+                pcl_out_idx += get_global_size(0))
+            {
+                ${find_reduction_start("pcl_out_idx")}
+
+                pcl_out_type pcl_acc = ${neutral};
+                for (long pcl_j = 0; pcl_j < pcl_red_count; ++pcl_j)
+                    ${reduce_entry("pcl_j")}
+
+                pcl_out[pcl_out_idx] = pcl_acc;
+            }
+        % endif
+    }
+    """
+
+
+class AxisReductionKernel(object):
+    """Reduce one or several arrays of equal shape along one of their axes,
+    in a single launch. Unlike :class:`ReductionKernel`, the arrays need not
+    be contiguous.
+
+    *map_expr* is evaluated for each tuple of entries of the input arrays,
+    whose values are available as ``in0``, ``in1``, ... The remaining
+    arguments are as for :class:`ReductionKernel`. *in_dtypes* gives the
+    dtypes of the input arrays.
+
+    Depending on the layout of the inputs, the reduction is carried out
+    either by one work group per output entry (preferred when the reduced
+    axis is contiguous in memory) or by one work item per output entry (in
+    which case neighboring work items access neighboring entries, as when
+    reducing along the leading axis of a C-contiguous array).
+
+    .. automethod:: __call__
+
+    .. versionadded:: 2019.2
+    """
+
+    # Reductions shorter than this are not worth a whole work group.
+    MIN_GROUP_REDUCTION_LENGTH = 64
+    MAX_GROUP_COUNT = 4096
+
+    def __init__(self, ctx, dtype_out, neutral, reduce_expr, map_expr,
+            in_dtypes, name="axis_reduce_kernel", options=[], preamble=""):
+        self.context = ctx
+        self.dtype_out = np.dtype(dtype_out)
+        self.neutral = neutral
+        self.reduce_expr = reduce_expr
+        self.map_expr = map_expr
+        self.in_dtypes = [np.dtype(dtype) for dtype in in_dtypes]
+        self.name = name
+        self.options = options
+        self.preamble = preamble
+
+    def _build(self, out_ndim, per_group, group_size):
+        from mako.template import Template
+        from pytools import all
+        from pyopencl.characterize import has_double_support
+
+        src = str(Template(AXIS_KERNEL).render(
+            out_type=dtype_to_ctype(self.dtype_out),
+            in_types=[dtype_to_ctype(dtype) for dtype in self.in_dtypes],
+            out_ndim=out_ndim,
+            per_group=per_group,
+            group_size=group_size,
+            neutral=self.neutral,
+            reduce_expr=_process_code_for_macro(self.reduce_expr),
+            map_expr=self.map_expr,
+            name=self.name,
+            preamble=self.preamble,
+            double_support=all(
+                has_double_support(dev) for dev in self.context.devices),
+            ))
+
+        knl = getattr(
+                cl.Program(self.context, src).build(self.options), self.name)
+
+        nin = len(self.in_dtypes)
+        knl.set_scalar_arg_dtypes(
+                [None, np.int64]
+                + [None, np.int64]*nin
+                + [np.int64]*(out_ndim + nin*(out_ndim+1) + 2))
+
+        return knl
+
+    @memoize_method
+    def get_kernel(self, out_ndim, per_group):
+        """Return a tuple ``(kernel, group_size)``."""
+        group_size = _get_group_size(
+                self.context.devices, self.dtype_out.itemsize)
+        if not per_group:
+            return self._build(out_ndim, per_group, group_size), group_size
+
+        while True:
+            knl = self._build(out_ndim, per_group, group_size)
+
+            kernel_max_wg_size = min(
+                    knl.get_work_group_info(
+                        cl.kernel_work_group_info.WORK_GROUP_SIZE, dev)
+                    for dev in self.context.devices)
+
+            if group_size <= kernel_max_wg_size:
+                return knl, group_size
+
+            group_size = _get_group_size(
+                    self.context.devices, self.dtype_out.itemsize,
+                    kernel_max_wg_size)
+
+    def __call__(self, *arrays, **kwargs):
+        """Reduce *arrays* along the axis given by the keyword argument
+        *axis*. Also accepts the keyword arguments *queue*, *allocator*,
+        *wait_for*, *return_event* and *out* with the same meaning as for
+        :meth:`ReductionKernel.__call__`. If given, *out* must be a
+        C-contiguous array of the shape of the inputs with *axis* removed.
+        """
+        axis = kwargs.pop("axis")
+        queue = kwargs.pop("queue", None)
+        allocator = kwargs.pop("allocator", None)
+        wait_for = kwargs.pop("wait_for", None)
+        return_event = kwargs.pop("return_event", False)
+        out = kwargs.pop("out", None)
+
+        if kwargs:
+            raise TypeError("invalid keyword argument to reduction kernel")
+
+        if len(arrays) != len(self.in_dtypes):
+            raise TypeError("expected %d array arguments, got %d"
+                    % (len(self.in_dtypes), len(arrays)))
+
+        repr_ary = arrays[0]
+        shape = repr_ary.shape
+        for ary in arrays:
+            if ary.shape != shape:
+                raise ValueError("shapes of arguments do not match")
+
+        ndim = len(shape)
+        if axis < 0:
+            axis += ndim
+        if not 0 <= axis < ndim:
+            raise ValueError("axis out of range")
+
+        if queue is None:
+            queue = repr_ary.queue
+        if allocator is None:
+            allocator = repr_ary.allocator
+
+        if wait_for is None:
+            wait_for = []
+        else:
+            wait_for = list(wait_for)
+
+        out_shape = shape[:axis] + shape[axis+1:]
+        red_count = shape[axis]
+
+        if out is None:
+            from pyopencl.array import empty
+            out = empty(queue, out_shape, self.dtype_out, allocator=allocator)
+        elif out.shape != out_shape or not out.flags.c_contiguous:
+            raise ValueError("'out' must be a contiguous array of shape %s"
+                    % (out_shape,))
+
+        if out.size == 0:
+            if return_event:
+                return out, None
+            else:
+                return out
+
+        in_args = []
+        stride_args = []
+        contiguous_axis = True
+        for ary in arrays:
+            itemsize = ary.dtype.itemsize
+            if any(stride % itemsize for stride in ary.strides):
+                raise ValueError("array strides must be multiples "
+                        "of the item size")
+
+            strides = [stride // itemsize for stride in ary.strides]
+            stride_args.extend(strides[:axis] + strides[axis+1:])
+            stride_args.append(strides[axis])
+            contiguous_axis = contiguous_axis and abs(strides[axis]) == 1
+
+            in_args.extend([ary.base_data, ary.offset])
+            wait_for.extend(ary.events)
+
+        group_size = _get_group_size(
+                self.context.devices, self.dtype_out.itemsize)
+        per_group = (
+                red_count >= self.MIN_GROUP_REDUCTION_LENGTH
+                and (contiguous_axis
+                    or out.size < queue.device.max_compute_units*group_size))
+
+        knl, group_size = self.get_kernel(len(out_shape), per_group)
+
+        if per_group:
+            group_count = min(out.size, self.MAX_GROUP_COUNT)
+            gs, ls = (group_count*group_size,), (group_size,)
+        else:
+            from pyopencl.array import splay
+            gs, ls = splay(queue, out.size,
+                    knl.get_work_group_info(
+                        cl.kernel_work_group_info.WORK_GROUP_SIZE,
+                        queue.device))
+
+        evt = knl(queue, gs, ls,
+                *([out.base_data, out.offset] + in_args + list(out_shape)
+                    + stride_args + [red_count, out.size]),
+                wait_for=wait_for)
+        out.add_event(evt)
+
+        if return_event:
+            return out, evt
+        else:
+            return out
+
+# }}}
+
+
+# {{{ multi-output reduction kernel
+
+class MultiReductionKernel(object):
+    """Carry out several independent reductions over the same arguments in
+    a single pass, so that the input is read only once.
+
+    *reductions* is a sequence of tuples ``(dtype_out, neutral, reduce_expr,
+    map_expr)``, each with the same meaning as the corresponding argument of
+    :class:`ReductionKernel`. The remaining arguments are as for
+    :class:`ReductionKernel` and apply to all reductions.
+
+    Internally, the state of all reductions is kept in a struct generated
+    by :func:`pyopencl.tools.match_dtype_to_c_struct`, which is reduced by a
+    single :class:`ReductionKernel`.
+
+    .. automethod:: __call__
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, ctx, reductions, arguments,
+            name="multi_reduce_kernel", options=[], preamble=""):
+        reductions = [
+                (np.dtype(dtype_out), neutral, reduce_expr, map_expr)
+                for dtype_out, neutral, reduce_expr, map_expr in reductions]
+
+        dtype = np.dtype([
+            ("r%d" % i, dtype_out)
+            for i, (dtype_out, _, _, _) in enumerate(reductions)])
+
+        # Structs with the same layout must have the same name to be
+        # registered more than once.
+        from hashlib import md5
+        struct_name = "pcl_multi_reduction_%s" % (
+                md5(repr(dtype.descr).encode()).hexdigest()[:16])
+
+        from pyopencl.tools import match_dtype_to_c_struct, get_or_register_dtype
+        dtype, c_decl = match_dtype_to_c_struct(
+                ctx.devices[0], struct_name, dtype, context=ctx)
+        self.dtype_out = dtype = get_or_register_dtype(struct_name, dtype)
+
+        self.field_dtypes_and_offsets = [
+                dtype.fields["r%d" % i][:2] for i in range(len(reductions))]
+
+        # {{{ generate helpers
+
+        helpers = [c_decl]
+
+        helpers.append("%(tp)s pcl_multi_neutral()\n{\n  %(tp)s result;\n"
+                % {"tp": struct_name}
+                + "".join(
+                    "  result.r%d = %s;\n" % (i, neutral)
+                    for i, (_, neutral, _, _) in enumerate(reductions))
+                + "  return result;\n}\n")
+
+        helpers.append("%(tp)s pcl_multi_make(%(args)s)\n{\n  %(tp)s result;\n"
+                % {
+                    "tp": struct_name,
+                    "args": ", ".join(
+                        "%s v%d" % (dtype_to_ctype(dtype_out), i)
+                        for i, (dtype_out, _, _, _) in enumerate(reductions)),
+                    }
+                + "".join(
+                    "  result.r%d = v%d;\n" % (i, i)
+                    for i in range(len(reductions)))
+                + "  return result;\n}\n")
+
+        for i, (dtype_out, _, reduce_expr, _) in enumerate(reductions):
+            helpers.append(
+                    "%(tp)s pcl_multi_reduce_%(i)d(%(tp)s a, %(tp)s b)\n"
+                    "{\n  return %(expr)s;\n}\n" % {
+                        "tp": dtype_to_ctype(dtype_out),
+                        "i": i,
+                        "expr": reduce_expr,
+                        })
+
+        helpers.append("%(tp)s pcl_multi_reduce(%(tp)s a, %(tp)s b)\n{\n"
+                "  %(tp)s result;\n" % {"tp": struct_name}
+                + "".join(
+                    "  result.r%d = pcl_multi_reduce_%d(a.r%d, b.r%d);\n"
+                    % (i, i, i, i)
+                    for i in range(len(reductions)))
+                + "  return result;\n}\n")
+
+        # }}}
+
+        self.reduction_kernel = ReductionKernel(ctx, dtype,
+                neutral="pcl_multi_neutral()",
+                reduce_expr="pcl_multi_reduce(a, b)",
+                map_expr="pcl_multi_make(%s)" % ", ".join(
+                    "(%s)" % map_expr
+                    for _, _, _, map_expr in reductions),
+                arguments=arguments, name=name, options=options,
+                preamble=preamble + "\n" + "\n".join(helpers))
+
+    def __call__(self, *args, **kwargs):
+        """Accepts the same arguments as :meth:`ReductionKernel.__call__`,
+        except for *out*.
+
+        :return: a tuple of single-entry :class:`pyopencl.array.Array`
+            instances, one per reduction, if *return_event* is *False*,
+            otherwise a tuple ``(results, event)``.
+        """
+        return_event = kwargs.pop("return_event", False)
+        if "out" in kwargs:
+            raise TypeError("'out' is not supported for multi-output "
+                    "reductions")
+
+        result, evt = self.reduction_kernel(*args, return_event=True, **kwargs)
+
+        from pyopencl.array import Array
+        results = tuple(
+                Array(result.queue, (), field_dtype,
+                    data=result.base_data, offset=result.offset+field_offset,
+                    events=[evt])
+                for field_dtype, field_offset in self.field_dtypes_and_offsets)
+
+        if return_event:
+            return results, evt
+        else:
+            return results
+
+# }}}
+
+
 # {{{ template
 
 class ReductionTemplate(KernelTemplateBase):
@@ -480,7 +1128,7 @@ class ReductionTemplate(KernelTemplateBase):
 
 # {{{ array reduction kernel getters
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_any_kernel(ctx, dtype_in):
     from pyopencl.tools import VectorArg
     return ReductionKernel(ctx, np.int8, "false", "a || b",
@@ -488,7 +1136,7 @@ def get_any_kernel(ctx, dtype_in):
             arguments=[VectorArg(dtype_in, "in")])
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_all_kernel(ctx, dtype_in):
     from pyopencl.tools import VectorArg
     return ReductionKernel(ctx, np.int8, "true", "a && b",
@@ -496,18 +1144,21 @@ def get_all_kernel(ctx, dtype_in):
             arguments=[VectorArg(dtype_in, "in")])
 
 
-@context_dependent_memoize
+def _get_sum_neutral_and_reduce_expr(dtype_out):
+    if dtype_out.kind == "c":
+        from pyopencl.elementwise import complex_dtype_to_name
+        dtname = complex_dtype_to_name(dtype_out)
+        return "%s_new(0, 0)" % dtname, "%s_add(a, b)" % dtname
+    else:
+        return "0", "a+b"
+
+
+@context_dependent_lru_memoize
 def get_sum_kernel(ctx, dtype_out, dtype_in):
     if dtype_out is None:
         dtype_out = dtype_in
 
-    reduce_expr = "a+b"
-    neutral_expr = "0"
-    if dtype_out.kind == "c":
-        from pyopencl.elementwise import complex_dtype_to_name
-        dtname = complex_dtype_to_name(dtype_out)
-        reduce_expr = "%s_add(a, b)" % dtname
-        neutral_expr = "%s_new(0, 0)" % dtname
+    neutral_expr, reduce_expr = _get_sum_neutral_and_reduce_expr(dtype_out)
 
     return ReductionKernel(ctx, dtype_out, neutral_expr, reduce_expr,
             arguments="const %(tp)s *in"
@@ -515,7 +1166,7 @@ def get_sum_kernel(ctx, dtype_out, dtype_in):
 
 
 def _get_dot_expr(dtype_out, dtype_a, dtype_b, conjugate_first,
-        has_double_support, index_expr="i"):
+        has_double_support, index_expr="i", operand_exprs=None):
     if dtype_b is None:
         if dtype_a is None:
             dtype_b = dtype_out
@@ -533,8 +1184,11 @@ def _get_dot_expr(dtype_out, dtype_a, dtype_b, conjugate_first,
 
     from pyopencl.elementwise import complex_dtype_to_name
 
-    a = "a[%s]" % index_expr
-    b = "b[%s]" % index_expr
+    if operand_exprs is None:
+        a = "a[%s]" % index_expr
+        b = "b[%s]" % index_expr
+    else:
+        a, b = operand_exprs
 
     if a_is_complex and (dtype_a != dtype_out):
         a = "%s_cast(%s)" % (complex_dtype_to_name(dtype_out), a)
@@ -557,7 +1211,7 @@ def _get_dot_expr(dtype_out, dtype_a, dtype_b, conjugate_first,
     return map_expr, dtype_out, dtype_b
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_dot_kernel(ctx, dtype_out, dtype_a=None, dtype_b=None,
         conjugate_first=False):
     from pyopencl.characterize import has_double_support
@@ -565,13 +1219,7 @@ def get_dot_kernel(ctx, dtype_out, dtype_a=None, dtype_b=None,
             dtype_out, dtype_a, dtype_b, conjugate_first,
             has_double_support=has_double_support(ctx.devices[0]))
 
-    reduce_expr = "a+b"
-    neutral_expr = "0"
-    if dtype_out.kind == "c":
-        from pyopencl.elementwise import complex_dtype_to_name
-        dtname = complex_dtype_to_name(dtype_out)
-        reduce_expr = "%s_add(a, b)" % dtname
-        neutral_expr = "%s_new(0, 0)" % dtname
+    neutral_expr, reduce_expr = _get_sum_neutral_and_reduce_expr(dtype_out)
 
     return ReductionKernel(ctx, dtype_out, neutral=neutral_expr,
             reduce_expr=reduce_expr, map_expr=map_expr,
@@ -583,7 +1231,7 @@ def get_dot_kernel(ctx, dtype_out, dtype_a=None, dtype_b=None,
                     }))
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_subset_dot_kernel(ctx, dtype_out, dtype_subset, dtype_a=None, dtype_b=None,
         conjugate_first=False):
     from pyopencl.characterize import has_double_support
@@ -623,35 +1271,30 @@ def get_minmax_neutral(what, dtype):
             raise ValueError("what is not min or max.")
 
 
-@context_dependent_memoize
-def get_minmax_kernel(ctx, what, dtype):
+def _get_minmax_reduce_expr(what, dtype):
     if dtype.kind == "f":
-        reduce_expr = "f%s(a,b)" % what
+        return "f%s(a,b)" % what
     elif dtype.kind in "iu":
-        reduce_expr = "%s(a,b)" % what
+        return "%s(a,b)" % what
     else:
         raise TypeError("unsupported dtype specified")
 
+
+@context_dependent_lru_memoize
+def get_minmax_kernel(ctx, what, dtype):
     return ReductionKernel(ctx, dtype,
             neutral=get_minmax_neutral(what, dtype),
-            reduce_expr="%(reduce_expr)s" % {"reduce_expr": reduce_expr},
+            reduce_expr=_get_minmax_reduce_expr(what, dtype),
             arguments="const %(tp)s *in" % {
                 "tp": dtype_to_ctype(dtype),
                 }, preamble="#define MY_INFINITY (1./0)")
 
 
-@context_dependent_memoize
+@context_dependent_lru_memoize
 def get_subset_minmax_kernel(ctx, what, dtype, dtype_subset):
-    if dtype.kind == "f":
-        reduce_expr = "f%s(a,b)" % what
-    elif dtype.kind in "iu":
-        reduce_expr = "%s(a,b)" % what
-    else:
-        raise TypeError("unsupported dtype specified")
-
     return ReductionKernel(ctx, dtype,
             neutral=get_minmax_neutral(what, dtype),
-            reduce_expr="%(reduce_expr)s" % {"reduce_expr": reduce_expr},
+            reduce_expr=_get_minmax_reduce_expr(what, dtype),
             map_expr="in[lookup_tbl[i]]",
             arguments=(
                 "const %(tp_lut)s *lookup_tbl, "
@@ -661,6 +1304,143 @@ def get_subset_minmax_kernel(ctx, what, dtype, dtype_subset):
                     }),
             preamble="#define MY_INFINITY (1./0)")
 
+
+@context_dependent_lru_memoize
+def get_fused_reduction_kernel(ctx, what, dtype_out, dtype_map,
+        arg_descrs, map_statements, map_expr):
+    """Return a :class:`ReductionKernel` carrying out the reduction *what*
+    (one of ``"sum"``, ``"min"``, ``"max"``) over the values of *map_expr*
+    (of type *dtype_map*), computed after executing *map_statements*.
+    *arg_descrs* is a tuple of tuples ``(is_vector, dtype)``, whose entries
+    become the arguments ``a0``, ``a1``, ... of the kernel. See
+    :class:`pyopencl.array.LazyExpression`.
+    """
+    from pyopencl.tools import VectorArg, ScalarArg
+
+    args = []
+    map_func_args = []
+    for i, (is_vector, dtype) in enumerate(arg_descrs):
+        name = "a%d" % i
+        if is_vector:
+            args.append(VectorArg(dtype, name, with_offset=True))
+            map_func_args.append(
+                    "__global const %s *%s" % (dtype_to_ctype(dtype), name))
+        else:
+            args.append(ScalarArg(dtype, name))
+            map_func_args.append("%s %s" % (dtype_to_ctype(dtype), name))
+
+    # The map is carried out by a function, so that its statements
+    # (and the temporaries they define) have a place to live.
+    preamble = """//CL//
+        %(tp)s pcl_fused_map(long i, %(args)s)
+        {
+            %(statements)s
+            return %(expr)s;
+        }
+        """ % {
+            "tp": dtype_to_ctype(dtype_map),
+            "args": ", ".join(map_func_args),
+            "statements": map_statements,
+            "expr": map_expr,
+            }
+    map_expr = "pcl_fused_map(i, %s)" % ", ".join(arg.name for arg in args)
+
+    if what == "sum":
+        neutral = "0"
+        reduce_expr = "a+b"
+    elif what in ["min", "max"]:
+        neutral = get_minmax_neutral(what, dtype_out)
+        reduce_expr = _get_minmax_reduce_expr(what, dtype_out)
+        preamble = "#define MY_INFINITY (1./0)\n" + preamble
+    else:
+        raise ValueError("unsupported reduction: %s" % what)
+
+    return ReductionKernel(ctx, dtype_out,
+            neutral=neutral, reduce_expr=reduce_expr, map_expr=map_expr,
+            arguments=args, name="fused_%s" % what, preamble=preamble)
+
+
+@context_dependent_lru_memoize
+def get_axis_reduction_kernel(ctx, what, dtype_out, in_dtypes,
+        conjugate_first=False):
+    """Return an :class:`AxisReductionKernel` carrying out the reduction
+    *what* (one of ``"sum"``, ``"dot"``, ``"min"``, ``"max"``) on arrays
+    of dtypes *in_dtypes*.
+    """
+    preamble = ""
+    map_expr = "in0"
+
+    if what == "sum":
+        dtype_in, = in_dtypes
+        if dtype_out is None:
+            dtype_out = dtype_in
+        neutral, reduce_expr = _get_sum_neutral_and_reduce_expr(dtype_out)
+
+    elif what == "dot":
+        from pyopencl.characterize import has_double_support
+        dtype_a, dtype_b = in_dtypes
+        map_expr, dtype_out, _ = _get_dot_expr(
+                dtype_out, dtype_a, dtype_b, conjugate_first,
+                has_double_support=has_double_support(ctx.devices[0]),
+                operand_exprs=("in0", "in1"))
+        neutral, reduce_expr = _get_sum_neutral_and_reduce_expr(dtype_out)
+
+    elif what in ["min", "max"]:
+        dtype_out, = in_dtypes
+        neutral = get_minmax_neutral(what, dtype_out)
+        reduce_expr = _get_minmax_reduce_expr(what, dtype_out)
+        preamble = "#define MY_INFINITY (1./0)"
+
+    else:
+        raise ValueError("unsupported reduction: %s" % what)
+
+    return AxisReductionKernel(ctx, dtype_out, neutral, reduce_expr, map_expr,
+            in_dtypes, name="axis_%s" % what, preamble=preamble)
+
+
+@context_dependent_lru_memoize
+def get_multi_reduction_kernel(ctx, whats, dtype_in):
+    """Return a :class:`MultiReductionKernel` carrying out the reductions
+    in the tuple *whats*, each of which is one of ``"sum"``,
+    ``"sum_squares"`` (the sum of the squared magnitudes), ``"min"`` and
+    ``"max"``, over an array of dtype *dtype_in*.
+    """
+    reductions = []
+    for what in whats:
+        if what == "sum":
+            reductions.append(
+                    (dtype_in,)
+                    + _get_sum_neutral_and_reduce_expr(dtype_in)
+                    + ("in[i]",))
+
+        elif what == "sum_squares":
+            if dtype_in.kind == "c":
+                from pyopencl.elementwise import complex_dtype_to_name
+                dtype_out = dtype_in.type(0).real.dtype
+                map_expr = "%s_abs_squared(in[i])" % (
+                        complex_dtype_to_name(dtype_in))
+            else:
+                dtype_out = dtype_in
+                map_expr = "in[i]*in[i]"
+
+            reductions.append(
+                    (dtype_out,)
+                    + _get_sum_neutral_and_reduce_expr(dtype_out)
+                    + (map_expr,))
+
+        elif what in ["min", "max"]:
+            reductions.append((dtype_in,
+                get_minmax_neutral(what, dtype_in),
+                _get_minmax_reduce_expr(what, dtype_in),
+                "in[i]"))
+
+        else:
+            raise ValueError("unsupported reduction: %s" % what)
+
+    return MultiReductionKernel(ctx, reductions,
+            arguments="const %s *in" % dtype_to_ctype(dtype_in),
+            name="multi_reduce", preamble="#define MY_INFINITY (1./0)")
+
 # }}}
 
 # vim: filetype=pyopencl:fdm=marker
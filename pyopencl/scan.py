@@ -946,7 +946,8 @@ class _GenericScanKernelBase(object):
             arguments, input_expr, scan_expr, neutral, output_statement,
             is_segment_start_expr=None, input_fetch_exprs=[],
             index_dtype=np.int32,
-            name_prefix="scan", options=[], preamble="", devices=None):
+            name_prefix="scan", options=[], preamble="", devices=None,
+            async_build=False):
         """
         :arg ctx: a :class:`pyopencl.Context` within which the code
             for this scan kernel will be generated.
@@ -1019,6 +1020,12 @@ class _GenericScanKernelBase(object):
             `OFFSET` is allowed to be 0 or -1, and `ARG_NAME_TYPE` is the type
             of `ARG_NAME`.
         :arg preamble: |preamble|
+        :arg async_build: if *True*, build the kernels in the background
+            (see :meth:`pyopencl.Program.build_async`). The first call
+            waits for the build to finish and raises any errors that
+            occurred during it.
+
+            .. versionadded:: 2019.2
 
         The first array in the argument list determines the size of the index
         space over which the scan is carried out, and thus the values over
@@ -1132,13 +1139,25 @@ class _GenericScanKernelBase(object):
         self.store_segment_start_flags = (
                 self.is_segmented and self.use_lookbehind_update)
 
-        self.finish_setup()
+        if async_build:
+            self._build_future = cl._get_build_executor().submit(
+                    self.finish_setup)
+        else:
+            self.finish_setup()
+            self._build_future = None
 
     # }}}
 
     def finish_setup(self):
         raise NotImplementedError
 
+    def _wait_for_build(self):
+        # read once, as another thread may clear it concurrently
+        build_future = self._build_future
+        if build_future is not None:
+            build_future.result()
+            self._build_future = None
+
 
 generic_scan_kernel_cache = WriteOncePersistentDict(
         "pyopencl-generated-scan-kernel-cache-v1",
@@ -1461,6 +1480,8 @@ class GenericScanKernel(_GenericScanKernelBase):
     # }}}
 
     def __call__(self, *args, **kwargs):
+        self._wait_for_build()
+
         # {{{ argument processing
 
         allocator = kwargs.get("allocator")
@@ -1677,6 +1698,8 @@ class GenericDebugScanKernel(_GenericScanKernelBase):
         self.kernel.set_scalar_arg_dtypes(scalar_arg_dtypes)
 
     def __call__(self, *args, **kwargs):
+        self._wait_for_build()
+
         # {{{ argument processing
 
         allocator = kwargs.get("allocator")
@@ -0,0 +1,164 @@
+"""Processing of host data sets in chunks, with transfers and computation
+overlapped.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+__copyright__ = "Copyright (C) 2019 PyOpenCL contributors"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from collections import deque
+from six.moves import range
+import numpy as np
+import pyopencl.array as cl_array
+
+
+class _Slot(object):
+    """The device-side input buffer of one in-flight chunk, along with the
+    queue its work is enqueued on.
+    """
+
+    def __init__(self, queue, allocator):
+        self.queue = queue
+        self.allocator = allocator
+        self.input_ary = None
+
+    def get_input_array(self, chunk):
+        ary = self.input_ary
+        if (ary is None
+                or ary.dtype != chunk.dtype
+                or ary.shape[1:] != chunk.shape[1:]
+                or ary.shape[0] < chunk.shape[0]):
+            ary = self.input_ary = cl_array.empty(self.queue, chunk.shape,
+                    chunk.dtype, allocator=self.allocator)
+
+        if ary.shape[0] != chunk.shape[0]:
+            ary = ary[:chunk.shape[0]]
+
+        return ary
+
+    def finish(self, evt):
+        if evt is not None:
+            evt.wait()
+
+        # All work on the queue up to the download is now complete, so this
+        # does not block. It releases the staging memory of the upload.
+        if self.input_ary is not None:
+            self.input_ary.finish()
+
+
+def _iter_source_chunks(source, chunk_size):
+    if isinstance(source, np.ndarray):
+        if chunk_size is None:
+            raise TypeError("chunk_size must be given for array sources")
+
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start+chunk_size]
+    else:
+        for chunk in source:
+            yield np.asarray(chunk)
+
+
+def _stream_map_chunks(queues, func, source, chunk_size, host_pool, allocator):
+    if not queues:
+        raise ValueError("at least one queue must be given")
+
+    if host_pool is None:
+        from pyopencl.tools import PinnedHostMemoryPool
+        host_pool = PinnedHostMemoryPool(queues[0])
+
+    slots = [_Slot(queue, allocator) for queue in queues]
+
+    # (slot, result, event) of the chunks in flight, oldest first
+    in_flight = deque()
+
+    for i, chunk in enumerate(_iter_source_chunks(source, chunk_size)):
+        if len(in_flight) == len(slots):
+            # Wait for the oldest chunk, whose slot is the one to reuse.
+            finished_slot, result, evt = in_flight.popleft()
+            finished_slot.finish(evt)
+            yield result
+
+        slot = slots[i % len(slots)]
+
+        if not chunk.flags.forc:
+            chunk = np.ascontiguousarray(chunk)
+
+        input_ary = slot.get_input_array(chunk)
+        input_ary.set(chunk, async_=True, host_pool=host_pool)
+
+        result_ary = func(input_ary)
+        result, evt = result_ary.get_async(queue=slot.queue, host_pool=host_pool)
+        in_flight.append((slot, result, evt))
+
+    while in_flight:
+        finished_slot, result, evt = in_flight.popleft()
+        finished_slot.finish(evt)
+        yield result
+
+
+def stream_map(queues, func, source, chunk_size=None, out=None, host_pool=None,
+        allocator=None):
+    """Apply *func* to *source* in chunks, keeping up to ``len(queues)``
+    chunks in flight, so that uploads, computation and downloads of
+    different chunks overlap.
+
+    :arg queues: a sequence of :class:`pyopencl.CommandQueue` instances in
+        the same context. Chunks are assigned to them in turn, and all work
+        for a chunk is enqueued on its queue. At least two queues are
+        needed for overlap, and three usually suffice.
+    :arg func: a function that takes a :class:`pyopencl.array.Array`
+        holding a chunk of *source* and returns a
+        :class:`pyopencl.array.Array` with the result for that chunk,
+        computed on the chunk's queue. The input array is reused for a later
+        chunk once the result has been transferred to the host.
+    :arg source: either a :class:`numpy.ndarray` (e.g. a :class:`numpy.memmap`)
+        that is split into chunks of *chunk_size* entries along its first
+        axis, or an iterable of :class:`numpy.ndarray` chunks.
+    :arg out: if given, a :class:`numpy.ndarray` (e.g. a :class:`numpy.memmap`)
+        that the results are concatenated into along the first axis.
+    :arg host_pool: a :class:`pyopencl.tools.PinnedHostMemoryPool` used for
+        staging transfers. By default, a new one is created.
+    :arg allocator: used to allocate the device-side input arrays.
+    :returns: *out* if it is given, otherwise a generator that yields the
+        results for each chunk as :class:`numpy.ndarray` instances, in
+        order. The result arrays are allocated from *host_pool*, so their
+        memory is reused once they are deleted.
+
+    .. versionadded:: 2019.2
+    """
+    chunk_results = _stream_map_chunks(
+            list(queues), func, source, chunk_size, host_pool, allocator)
+
+    if out is None:
+        return chunk_results
+
+    start = 0
+    for result in chunk_results:
+        out[start:start+len(result)] = result
+        start += len(result)
+
+    if start != len(out):
+        raise ValueError("results have %d entries along the first axis, "
+                "but 'out' has %d" % (start, len(out)))
+
+    return out
@@ -69,6 +69,455 @@ from pyopencl._cl import (  # noqa
 # }}}
 
 
+# {{{ arena allocator
+
+class _Arena(object):
+    def __init__(self, buf, size):
+        self.buf = buf
+        self.size = size
+        self.offset = 0
+        self.active_blocks = 0
+
+
+class ArenaAllocator(object):
+    """An allocator that carves small allocations out of larger buffers
+    (arenas) as sub-buffers, to save the cost of allocating many small
+    buffers. It may be passed as the *allocator* of
+    :class:`pyopencl.array.Array` and related functions.
+
+    Allocations of more than *max_block_size* bytes (by default, an eighth
+    of *arena_size*) are passed on to *allocator*. Smaller allocations are
+    rounded up to the base address alignment required of sub-buffers by the
+    devices in *context* and placed one after the other in the current
+    arena. Once the current arena is full, a new one is started. An arena
+    is reused once all sub-buffers placed in it have been deleted.
+
+    :arg allocator: used to allocate arenas and large blocks. It must return
+        :class:`pyopencl.Buffer` instances, e.g. a :class:`DeferredAllocator`
+        or an :class:`ImmediateAllocator`. By default, a
+        :class:`DeferredAllocator` for *context* is used.
+
+    Requires OpenCL 1.1.
+
+    .. attribute:: arena_size
+    .. attribute:: max_block_size
+    .. attribute:: alignment
+
+        The alignment of blocks within an arena, in bytes.
+
+    .. attribute:: active_blocks
+
+        The number of sub-buffers allocated through this allocator that have
+        not yet been deleted.
+
+    .. attribute:: arena_count
+
+        The number of arenas currently allocated.
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, context, allocator=None, arena_size=1 << 20,
+            max_block_size=None):
+        if allocator is None:
+            allocator = DeferredAllocator(context)
+        if max_block_size is None:
+            max_block_size = arena_size // 8
+        if max_block_size > arena_size:
+            raise ValueError("max_block_size may not exceed arena_size")
+
+        self.allocator = allocator
+        self.arena_size = arena_size
+        self.max_block_size = max_block_size
+
+        # mem_base_addr_align is given in bits
+        self.alignment = max(
+                dev.mem_base_addr_align // 8 for dev in context.devices)
+
+        from threading import Lock
+        # Blocks are returned from weak reference callbacks, which may run
+        # in any thread.
+        self._lock = Lock()
+
+        self._current_arena = None
+        self._free_arenas = []
+        self._arena_count = 0
+
+        # weak references to the blocks, kept alive until their callback
+        self._block_refs = set()
+
+    @property
+    def active_blocks(self):
+        return len(self._block_refs)
+
+    @property
+    def arena_count(self):
+        return self._arena_count
+
+    def _get_arena(self):
+        if self._free_arenas:
+            return self._free_arenas.pop()
+
+        arena = _Arena(self.allocator(self.arena_size), self.arena_size)
+        self._arena_count += 1
+        return arena
+
+    def _free_block(self, arena, block_ref):
+        with self._lock:
+            self._block_refs.discard(block_ref)
+
+            arena.active_blocks -= 1
+            if arena.active_blocks:
+                return
+
+            if arena is self._current_arena:
+                arena.offset = 0
+            elif not self._free_arenas:
+                arena.offset = 0
+                self._free_arenas.append(arena)
+            else:
+                # keep at most one spare arena besides the current one
+                self._arena_count -= 1
+
+    def __call__(self, size):
+        if size > self.max_block_size:
+            return self.allocator(size)
+
+        alignment = self.alignment
+        block_size = max((size + alignment - 1) // alignment, 1) * alignment
+
+        with self._lock:
+            arena = self._current_arena
+            if arena is None or arena.offset + block_size > arena.size:
+                if arena is not None and not arena.active_blocks:
+                    arena.offset = 0
+                else:
+                    arena = self._current_arena = self._get_arena()
+
+            origin = arena.offset
+            arena.offset += block_size
+            arena.active_blocks += 1
+
+        try:
+            block = arena.buf.get_sub_region(origin, max(size, 1))
+        except Exception:
+            with self._lock:
+                arena.active_blocks -= 1
+            raise
+
+        import weakref
+        block_ref = weakref.ref(block,
+                lambda block_ref: self._free_block(arena, block_ref))
+
+        with self._lock:
+            self._block_refs.add(block_ref)
+
+        return block
+
+# }}}
+
+
+# {{{ queue-aware memory pool
+
+def _get_block_size(size, leading_bits_in_bin_id):
+    """Round *size* up to the block size of its :class:`MemoryPool` bin."""
+    if size <= 1 << leading_bits_in_bin_id:
+        return max(size, 1)
+
+    shift = bitlog2(size) - leading_bits_in_bin_id
+    return ((size + (1 << shift) - 1) >> shift) << shift
+
+
+class _HeldBlock(object):
+    def __init__(self, buf, queue, event):
+        self.buf = buf
+        self.queue = queue
+        self.event = event
+
+
+class QueueAwareMemoryPool(object):
+    """A memory pool for use with several command queues at once. Like
+    :class:`MemoryPool`, it holds on to memory returned to it and hands it
+    out again, but it keeps track of the queue each block was allocated
+    for. When a block is returned, a marker is enqueued on that queue to
+    record when its last use completes.
+
+    A returned block is handed out again immediately for allocations on
+    the same queue, since in-order queues serialize its uses. It is only
+    handed out for another queue once its marker has completed. If the
+    allocator fails for lack of memory, a block whose marker has not yet
+    completed may be handed to another queue, after enqueueing a barrier on
+    that queue that waits for the marker. No host-side synchronization
+    takes place in any case.
+
+    Blocks are served as sub-buffers covering an entire block, whose
+    deletion returns the block to the pool. Allocation sizes are rounded
+    up to the same bins as :class:`MemoryPool` uses, as determined by
+    *leading_bits_in_bin_id*. Requires OpenCL 1.1.
+
+    :arg allocator: used to allocate blocks. It must return
+        :class:`pyopencl.Buffer` instances, and should be an
+        :class:`ImmediateAllocator`.
+
+    .. note::
+
+        Only uses of a block on the queue it was allocated for are tracked.
+        If a block is also used on other queues, ordering those uses before
+        the block is returned is up to the application.
+
+    .. attribute:: held_blocks
+
+        The number of blocks held by this pool for reuse.
+
+    .. attribute:: active_blocks
+
+        The number of blocks in use.
+
+    .. automethod:: allocate
+    .. automethod:: get_allocator
+    .. automethod:: free_held
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, allocator, leading_bits_in_bin_id=4):
+        self.allocator = allocator
+        self.leading_bits_in_bin_id = leading_bits_in_bin_id
+
+        from threading import Lock
+        # Blocks are returned from weak reference callbacks, which may run
+        # in any thread.
+        self._lock = Lock()
+
+        # block size -> list of _HeldBlock
+        self._bins = {}
+        self._held_blocks = 0
+
+        # weak references to the blocks in use, kept alive until their callback
+        self._block_refs = set()
+
+    @property
+    def held_blocks(self):
+        return self._held_blocks
+
+    @property
+    def active_blocks(self):
+        return len(self._block_refs)
+
+    def _take_held_block(self, queue, block_size):
+        held = self._bins.get(block_size)
+        if not held:
+            return None
+
+        # prefer blocks last used on the same queue
+        for i in range(len(held)-1, -1, -1):
+            if held[i].queue == queue:
+                return held.pop(i)
+
+        complete = cl.command_execution_status.COMPLETE
+        for i in range(len(held)-1, -1, -1):
+            if held[i].event.command_execution_status == complete:
+                return held.pop(i)
+
+        return None
+
+    def _return_block(self, buf, block_size, queue, block_ref):
+        try:
+            event = cl.enqueue_marker(queue)
+        except Exception:
+            # The queue may be unusable, e.g. during interpreter shutdown.
+            # Drop the block rather than risk reusing it early.
+            event = None
+
+        with self._lock:
+            self._block_refs.discard(block_ref)
+            if event is not None:
+                self._bins.setdefault(block_size, []).append(
+                        _HeldBlock(buf, queue, event))
+                self._held_blocks += 1
+
+    def allocate(self, queue, size):
+        """Return a :class:`pyopencl.Buffer` of at least *size* bytes for use
+        on *queue*.
+        """
+        block_size = _get_block_size(size, self.leading_bits_in_bin_id)
+
+        with self._lock:
+            held_block = self._take_held_block(queue, block_size)
+            if held_block is not None:
+                self._held_blocks -= 1
+
+        if held_block is not None:
+            buf = held_block.buf
+        else:
+            try:
+                buf = self.allocator(block_size)
+            except cl.MemoryError:
+                with self._lock:
+                    held = self._bins.get(block_size)
+                    if not held:
+                        raise
+
+                    held_block = held.pop()
+                    self._held_blocks -= 1
+
+                buf = held_block.buf
+                cl.enqueue_barrier(queue, wait_for=[held_block.event])
+
+        block = buf.get_sub_region(0, block_size)
+
+        import weakref
+        block_ref = weakref.ref(block,
+                lambda block_ref: self._return_block(
+                    buf, block_size, queue, block_ref))
+
+        with self._lock:
+            self._block_refs.add(block_ref)
+
+        return block
+
+    def get_allocator(self, queue):
+        """Return an allocator that allocates from this pool for use on
+        *queue*, for use as the *allocator* of :class:`pyopencl.array.Array`.
+        """
+        from functools import partial
+        return partial(self.allocate, queue)
+
+    def free_held(self):
+        """Free all memory held by this pool for reuse."""
+        with self._lock:
+            self._bins = {}
+            self._held_blocks = 0
+
+# }}}
+
+
+# {{{ pinned host memory pool
+
+class _PinnedHostArrayOwner(object):
+    """The base of the arrays handed out by :class:`PinnedHostMemoryPool`,
+    which exposes the memory of *ary* (an array on a mapped block) without
+    holding a reference to *ary* itself.
+    """
+
+    def __init__(self, ary):
+        self.__array_interface__ = dict(ary.__array_interface__)
+        self.block = ary.base
+
+
+class PinnedHostMemoryPool(object):
+    """A pool of host memory that is suited for fast transfers to and from
+    the devices of *queue*, because it is allocated by OpenCL as buffers
+    with :attr:`pyopencl.mem_flags.ALLOC_HOST_PTR`. Each buffer is mapped
+    once and handed out as a :class:`numpy.ndarray`. When that array (and
+    any views of it) are deleted, its memory returns to the pool for reuse.
+
+    Allocation sizes are rounded up to the same bins as :class:`MemoryPool`
+    uses, as determined by *leading_bits_in_bin_id*.
+
+    The arrays may be passed as the *host_pool* of
+    :meth:`pyopencl.array.Array.get` and :meth:`pyopencl.array.Array.set` to
+    use them for staging transfers.
+
+    .. attribute:: held_blocks
+
+        The number of blocks held by this pool for reuse.
+
+    .. attribute:: active_blocks
+
+        The number of blocks in use.
+
+    .. automethod:: empty
+    .. automethod:: free_held
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, queue, leading_bits_in_bin_id=4):
+        self.queue = queue
+        self.leading_bits_in_bin_id = leading_bits_in_bin_id
+
+        from threading import Lock
+        # Blocks are returned from weak reference callbacks, which may run
+        # in any thread.
+        self._lock = Lock()
+
+        # block size -> list of mapped uint8 arrays
+        self._bins = {}
+        self._held_blocks = 0
+
+        # weak references to the arrays in use, kept alive until their callback
+        self._block_refs = set()
+
+    @property
+    def held_blocks(self):
+        return self._held_blocks
+
+    @property
+    def active_blocks(self):
+        return len(self._block_refs)
+
+    def _return_block(self, block, block_size, block_ref):
+        with self._lock:
+            self._block_refs.discard(block_ref)
+            self._bins.setdefault(block_size, []).append(block)
+            self._held_blocks += 1
+
+    def empty(self, shape, dtype, order="C"):
+        """Return an uninitialized :class:`numpy.ndarray` in pinned host
+        memory, with the same arguments as :func:`numpy.empty`.
+        """
+        dtype = np.dtype(dtype)
+        if isinstance(shape, six.integer_types):
+            shape = (shape,)
+
+        from pytools import product
+        nbytes = product(shape) * dtype.itemsize
+        block_size = _get_block_size(nbytes, self.leading_bits_in_bin_id)
+
+        block = None
+        with self._lock:
+            held = self._bins.get(block_size)
+            if held:
+                block = held.pop()
+                self._held_blocks -= 1
+
+        if block is None:
+            mf = cl.mem_flags
+            buf = cl.Buffer(self.queue.context,
+                    mf.READ_WRITE | mf.ALLOC_HOST_PTR, block_size)
+            # The mapping keeps the buffer alive and unmaps it once the
+            # array is deleted.
+            block, _ = cl.enqueue_map_buffer(self.queue, buf,
+                    cl.map_flags.READ | cl.map_flags.WRITE, 0,
+                    (block_size,), np.uint8, is_blocking=True)
+
+        owner = _PinnedHostArrayOwner(
+                np.ndarray(shape, dtype, buffer=block, order=order))
+        result = np.asarray(owner)
+        assert result.base is owner
+
+        # Views of result share its base, so the block is only returned once
+        # the owner, and with it the last of result and its views, is gone.
+        import weakref
+        block_ref = weakref.ref(owner,
+                lambda block_ref: self._return_block(
+                    block, block_size, block_ref))
+
+        with self._lock:
+            self._block_refs.add(block_ref)
+
+        return result
+
+    def free_held(self):
+        """Unmap and free all memory held by this pool for reuse."""
+        with self._lock:
+            self._bins = {}
+            self._held_blocks = 0
+
+# }}}
+
+
 # {{{ first-arg caches
 
 _first_arg_dependent_caches = []
@@ -165,6 +614,152 @@ def clear_first_arg_caches():
         cache.clear()
 
 
+class FirstArgDependentLRUCache(object):
+    """A size-bounded memoization cache shared among functions decorated
+    with :func:`first_arg_dependent_lru_memoize`. Entries are keyed by the
+    decorated function, its first argument (typically a
+    :class:`pyopencl.Context`) and its remaining arguments. Once more than
+    :attr:`max_entries` entries are held, the least recently used ones are
+    dropped, along with the references they hold to their first argument.
+
+    .. attribute:: max_entries
+
+        The maximum number of entries held, or *None* for no limit.
+        Lowering it evicts entries immediately.
+
+    .. attribute:: hits
+    .. attribute:: misses
+    .. attribute:: evictions
+
+    .. automethod:: get_stats
+    .. automethod:: discard
+    .. automethod:: clear
+
+    .. versionadded:: 2019.2
+    """
+
+    def __init__(self, max_entries=None):
+        from collections import OrderedDict
+        from threading import Lock
+
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, value):
+        if value is not None and value < 0:
+            raise ValueError("max_entries may not be negative")
+
+        with self._lock:
+            self._max_entries = value
+            self._evict()
+
+    def _evict(self):
+        if self._max_entries is None:
+            return
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry for *key* and mark it as most recently used.
+
+        :raises KeyError: if *key* is not in the cache.
+        """
+        with self._lock:
+            try:
+                # pop and re-insert to move to the most recently used end
+                result = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                raise
+
+            self._entries[key] = result
+            self.hits += 1
+            return result
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            self._evict()
+
+    def discard(self, cl_object):
+        """Drop all entries whose first argument is *cl_object*."""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == cl_object]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all entries. Does not reset the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Return a :class:`dict` with the keys ``hits``, ``misses``,
+        ``evictions``, ``entries`` and ``max_entries``.
+        """
+        return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                }
+
+
+def _get_default_lru_cache_size():
+    import os
+    size = os.environ.get("PYOPENCL_KERNEL_CACHE_MAX_ENTRIES")
+    if size is None:
+        return 1024
+    elif size.lower() == "none":
+        return None
+    else:
+        return int(size)
+
+
+first_arg_dependent_lru_cache = FirstArgDependentLRUCache(
+        _get_default_lru_cache_size())
+_first_arg_dependent_caches.append(first_arg_dependent_lru_cache)
+
+
+@decorator
+def first_arg_dependent_lru_memoize(func, cl_object, *args):
+    """Like :func:`first_arg_dependent_memoize`, but stores results in
+    :data:`first_arg_dependent_lru_cache`, which holds a bounded number of
+    entries and discards the least recently used ones. Its size defaults to
+    1024 entries and may be set using the environment variable
+    ``PYOPENCL_KERNEL_CACHE_MAX_ENTRIES`` (``none`` for no limit) or
+    by assigning to :attr:`FirstArgDependentLRUCache.max_entries`.
+
+    .. versionadded:: 2019.2
+    """
+    key = (func, cl_object, args)
+    try:
+        return first_arg_dependent_lru_cache.get(key)
+    except KeyError:
+        result = func(cl_object, *args)
+        first_arg_dependent_lru_cache.put(key, result)
+        return result
+
+
+context_dependent_lru_memoize = first_arg_dependent_lru_memoize
+
+
 import atexit
 atexit.register(clear_first_arg_caches)
 
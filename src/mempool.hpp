@@ -34,6 +34,7 @@
 #include <memory>
 #include <ostream>
 #include <iostream>
+#include <stdexcept>
 #include "wrap_cl.hpp"
 #include "bitlog.hpp"
 
@@ -70,9 +71,9 @@ namespace PYGPU_PACKAGE
     public:
       typedef typename Allocator::pointer_type pointer_type;
       typedef typename Allocator::size_type size_type;
+      typedef uint32_t bin_nr_t;
 
     private:
-      typedef uint32_t bin_nr_t;
       typedef std::vector<pointer_type> bin_t;
 
       typedef std::map<bin_nr_t, bin_t> container_t;
@@ -88,17 +89,39 @@ namespace PYGPU_PACKAGE
       // An active block is one that is in use by the application.
       unsigned m_active_blocks;
 
+      // The total sizes of held and active blocks, as returned by alloc_size.
+      size_type m_held_bytes;
+      size_type m_active_bytes;
+
+      // The number of allocations served from held blocks (hits) and from
+      // the allocator (misses).
+      unsigned long m_hits;
+      unsigned long m_misses;
+
+      // If nonzero, held blocks are freed, largest first, whenever their
+      // total size exceeds this.
+      size_type m_max_held_bytes;
+
       bool m_stop_holding;
       int m_trace;
 
       unsigned m_leading_bits_in_bin_id;
 
     public:
-      memory_pool(Allocator const &alloc=Allocator(), unsigned leading_bits_in_bin_id=4)
+      memory_pool(Allocator const &alloc=Allocator(), unsigned leading_bits_in_bin_id=4,
+          size_type max_held_bytes=0)
         : m_allocator(alloc.copy()),
-        m_held_blocks(0), m_active_blocks(0), m_stop_holding(false),
+        m_held_blocks(0), m_active_blocks(0),
+        m_held_bytes(0), m_active_bytes(0), m_hits(0), m_misses(0),
+        m_max_held_bytes(max_held_bytes),
+        m_stop_holding(false),
         m_trace(false), m_leading_bits_in_bin_id(leading_bits_in_bin_id)
       {
+        // Bin numbers must have room for the exponent of any size.
+        if (leading_bits_in_bin_id > 24)
+          throw std::invalid_argument(
+              "memory_pool: leading_bits_in_bin_id must not exceed 24");
+
         if (m_allocator->is_deferred())
         {
           PyErr_WarnEx(PyExc_UserWarning, "Memory pools expect non-deferred "
@@ -193,6 +216,7 @@ namespace PYGPU_PACKAGE
       {
         bin_nr_t bin_nr = bin_number(size);
         bin_t &bin = get_bin(bin_nr);
+        size_type alloc_sz = alloc_size(bin_nr);
 
         if (bin.size())
         {
@@ -200,13 +224,14 @@ namespace PYGPU_PACKAGE
             std::cout
               << "[pool] allocation of size " << size << " served from bin " << bin_nr
               << " which contained " << bin.size() << " entries" << std::endl;
-          return pop_block_from_bin(bin, size);
+          ++m_hits;
+          return pop_block_from_bin(bin, alloc_sz);
         }
 
-        size_type alloc_sz = alloc_size(bin_nr);
-
         assert(bin_number(alloc_sz) == bin_nr);
 
+        ++m_misses;
+
         if (m_trace)
           std::cout << "[pool] allocation of size " << size << " required new memory" << std::endl;
 
@@ -222,7 +247,7 @@ namespace PYGPU_PACKAGE
 
         m_allocator->try_release_blocks();
         if (bin.size())
-          return pop_block_from_bin(bin, size);
+          return pop_block_from_bin(bin, alloc_sz);
 
         if (m_trace)
           std::cout << "[pool] allocation still OOM after GC" << std::endl;
@@ -252,16 +277,28 @@ namespace PYGPU_PACKAGE
       {
         --m_active_blocks;
         bin_nr_t bin_nr = bin_number(size);
+        size_type alloc_sz = alloc_size(bin_nr);
+        m_active_bytes -= alloc_sz;
 
         if (!m_stop_holding)
         {
           inc_held_blocks();
           get_bin(bin_nr).push_back(p);
+          m_held_bytes += alloc_sz;
 
           if (m_trace)
             std::cout << "[pool] block of size " << size << " returned to bin "
               << bin_nr << " which now contains " << get_bin(bin_nr).size()
               << " entries" << std::endl;
+
+          if (m_max_held_bytes && m_held_bytes > m_max_held_bytes)
+          {
+            if (m_trace)
+              std::cout << "[pool] held memory exceeds " << m_max_held_bytes
+                << " bytes, trimming" << std::endl;
+
+            trim(m_max_held_bytes);
+          }
         }
         else
           m_allocator->free(p);
@@ -272,17 +309,30 @@ namespace PYGPU_PACKAGE
         for (bin_pair_t &bin_pair: m_container)
         {
           bin_t &bin = bin_pair.second;
+          size_type bin_alloc_size = alloc_size(bin_pair.first);
 
           while (bin.size())
-          {
-            m_allocator->free(bin.back());
-            bin.pop_back();
-
-            dec_held_blocks();
-          }
+            free_block_from_bin(bin, bin_alloc_size);
         }
 
         assert(m_held_blocks == 0);
+        assert(m_held_bytes == 0);
+      }
+
+      void trim(size_type target_held_bytes)
+      {
+        // free largest stuff first
+        for (bin_pair_t &bin_pair: reverse(m_container))
+        {
+          if (m_held_bytes <= target_held_bytes)
+            break;
+
+          bin_t &bin = bin_pair.second;
+          size_type bin_alloc_size = alloc_size(bin_pair.first);
+
+          while (bin.size() && m_held_bytes > target_held_bytes)
+            free_block_from_bin(bin, bin_alloc_size);
+        }
       }
 
       void stop_holding()
@@ -297,6 +347,41 @@ namespace PYGPU_PACKAGE
       unsigned held_blocks()
       { return m_held_blocks; }
 
+      size_type active_bytes()
+      { return m_active_bytes; }
+
+      size_type held_bytes()
+      { return m_held_bytes; }
+
+      unsigned long hits()
+      { return m_hits; }
+
+      unsigned long misses()
+      { return m_misses; }
+
+      unsigned leading_bits_in_bin_id()
+      { return m_leading_bits_in_bin_id; }
+
+      size_type max_held_bytes()
+      { return m_max_held_bytes; }
+
+      void set_max_held_bytes(size_type max_held_bytes)
+      {
+        m_max_held_bytes = max_held_bytes;
+        if (m_max_held_bytes)
+          trim(m_max_held_bytes);
+      }
+
+      // Returns the number of blocks held in each nonempty bin.
+      std::map<bin_nr_t, unsigned> held_blocks_by_bin() const
+      {
+        std::map<bin_nr_t, unsigned> result;
+        for (bin_pair_t const &bin_pair: m_container)
+          if (bin_pair.second.size())
+            result[bin_pair.first] = bin_pair.second.size();
+        return result;
+      }
+
       bool try_to_free_memory()
       {
         // free largest stuff first
@@ -306,11 +391,7 @@ namespace PYGPU_PACKAGE
 
           if (bin.size())
           {
-            m_allocator->free(bin.back());
-            bin.pop_back();
-
-            dec_held_blocks();
-
+            free_block_from_bin(bin, alloc_size(bin_pair.first));
             return true;
           }
         }
@@ -323,20 +404,32 @@ namespace PYGPU_PACKAGE
       {
         pointer_type result = m_allocator->allocate(alloc_sz);
         ++m_active_blocks;
+        m_active_bytes += alloc_sz;
 
         return result;
       }
 
-      pointer_type pop_block_from_bin(bin_t &bin, size_type size)
+      pointer_type pop_block_from_bin(bin_t &bin, size_type alloc_sz)
       {
         pointer_type result = bin.back();
         bin.pop_back();
 
         dec_held_blocks();
+        m_held_bytes -= alloc_sz;
         ++m_active_blocks;
+        m_active_bytes += alloc_sz;
 
         return result;
       }
+
+      void free_block_from_bin(bin_t &bin, size_type alloc_sz)
+      {
+        m_allocator->free(bin.back());
+        bin.pop_back();
+
+        dec_held_blocks();
+        m_held_bytes -= alloc_sz;
+      }
   };
 
 
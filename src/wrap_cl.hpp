@@ -4341,6 +4341,56 @@ namespace pyopencl
             (m_kernel, arg_index, len, buf));
       }
 
+      void set_arg_buf_pack(py::tuple indices_and_sizes, py::object py_buffer)
+      {
+        // Sets consecutive pieces of py_buffer as arguments. indices_and_sizes
+        // alternates argument indices and the sizes of their pieces.
+        const char *buf;
+        PYOPENCL_BUFFER_SIZE_T len;
+
+#ifdef PYOPENCL_USE_NEW_BUFFER_INTERFACE
+        py_buffer_wrapper buf_wrapper;
+
+        try
+        {
+          buf_wrapper.get(py_buffer.ptr(), PyBUF_ANY_CONTIGUOUS);
+        }
+        catch (py::error_already_set &)
+        {
+          PyErr_Clear();
+          throw error("Kernel.set_arg", CL_INVALID_VALUE,
+              "invalid kernel argument");
+        }
+
+        buf = reinterpret_cast<const char *>(buf_wrapper.m_buf.buf);
+        len = buf_wrapper.m_buf.len;
+#else
+        const void *void_buf;
+        if (PyObject_AsReadBuffer(py_buffer.ptr(), &void_buf, &len))
+        {
+          PyErr_Clear();
+          throw error("Kernel.set_arg", CL_INVALID_VALUE,
+              "invalid kernel argument");
+        }
+        buf = reinterpret_cast<const char *>(void_buf);
+#endif
+
+        size_t offset = 0;
+        for (size_t i = 0; i + 1 < indices_and_sizes.size(); i += 2)
+        {
+          cl_uint arg_index = indices_and_sizes[i].cast<cl_uint>();
+          size_t size = indices_and_sizes[i+1].cast<size_t>();
+
+          if (offset + size > (size_t) len)
+            throw error("Kernel.set_arg", CL_INVALID_VALUE,
+                "packed kernel arguments exceed buffer size");
+
+          PYOPENCL_CALL_GUARDED(clSetKernelArg,
+              (m_kernel, arg_index, size, buf + offset));
+          offset += size;
+        }
+      }
+
 #if PYOPENCL_CL_VERSION >= 0x2000
       void set_arg_svm(cl_uint arg_index, svm_arg_wrapper const &wrp)
       {
@@ -4397,6 +4447,13 @@ namespace pyopencl
         set_arg_buf(arg_index, arg);
       }
 
+      void set_arg_multi(py::tuple indices_and_args)
+      {
+        // indices_and_args alternates argument indices and arguments.
+        for (size_t i = 0; i + 1 < indices_and_args.size(); i += 2)
+          set_arg(indices_and_args[i].cast<cl_uint>(), indices_and_args[i+1]);
+      }
+
       py::object get_info(cl_kernel_info param_name) const
       {
         switch (param_name)
@@ -429,6 +429,8 @@ void pyopencl_expose_part_2(py::module &m)
       .DEF_SIMPLE_METHOD(get_work_group_info)
       .def("_set_arg_null", &cls::set_arg_null)
       .def("_set_arg_buf", &cls::set_arg_buf)
+      .def("_set_arg_buf_pack", &cls::set_arg_buf_pack)
+      .def("_set_arg_multi", &cls::set_arg_multi)
 #if PYOPENCL_CL_VERSION >= 0x2000
       .def("_set_arg_svm", &cls::set_arg_svm)
 #endif
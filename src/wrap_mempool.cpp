@@ -234,6 +234,31 @@ namespace
 
 
 
+  template<class Pool>
+  py::dict memory_pool_get_stats(Pool &pool)
+  {
+    py::dict held_bytes_by_block_size;
+    for (auto const &bin_nr_and_count: pool.held_blocks_by_bin())
+    {
+      typename Pool::size_type block_size = pool.alloc_size(bin_nr_and_count.first);
+      held_bytes_by_block_size[py::cast(block_size)] = py::cast(
+          block_size * bin_nr_and_count.second);
+    }
+
+    py::dict result;
+    result["held_blocks"] = pool.held_blocks();
+    result["active_blocks"] = pool.active_blocks();
+    result["held_bytes"] = pool.held_bytes();
+    result["active_bytes"] = pool.active_bytes();
+    result["hits"] = pool.hits();
+    result["misses"] = pool.misses();
+    result["held_bytes_by_block_size"] = held_bytes_by_block_size;
+    return result;
+  }
+
+
+
+
   template<class Wrapper>
   void expose_memory_pool(Wrapper &wrapper)
   {
@@ -241,9 +266,19 @@ namespace
     wrapper
       .def_property_readonly("held_blocks", &cls::held_blocks)
       .def_property_readonly("active_blocks", &cls::active_blocks)
+      .def_property_readonly("held_bytes", &cls::held_bytes)
+      .def_property_readonly("active_bytes", &cls::active_bytes)
+      .def_property_readonly("hits", &cls::hits)
+      .def_property_readonly("misses", &cls::misses)
+      .def_property_readonly("leading_bits_in_bin_id",
+          &cls::leading_bits_in_bin_id)
+      .def_property("max_held_bytes",
+          &cls::max_held_bytes, &cls::set_max_held_bytes)
+      .def("get_stats", memory_pool_get_stats<cls>)
       .DEF_SIMPLE_METHOD(bin_number)
       .DEF_SIMPLE_METHOD(alloc_size)
       .DEF_SIMPLE_METHOD(free_held)
+      .DEF_SIMPLE_METHOD(trim)
       .DEF_SIMPLE_METHOD(stop_holding)
       ;
   }
@@ -296,9 +331,10 @@ void pyopencl_expose_mempool(py::module &m)
       cls, /* boost::noncopyable, */
       std::shared_ptr<cls>> wrapper( m, "MemoryPool");
     wrapper
-      .def(py::init<cl_allocator_base const &, unsigned>(),
+      .def(py::init<cl_allocator_base const &, unsigned, size_t>(),
           py::arg("allocator"),
-          py::arg("leading_bits_in_bin_id")=4
+          py::arg("leading_bits_in_bin_id")=4,
+          py::arg("max_held_bytes")=0
           )
       .def("allocate", device_pool_allocate)
       .def("__call__", device_pool_allocate)
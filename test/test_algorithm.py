@@ -222,6 +222,36 @@ def test_astype(ctx_factory):
     assert a2.dtype == np.float32
     assert la.norm(a - a2) / la.norm(a) < 1e-7
 
+
+def test_kernel_lru_cache(ctx_factory):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.tools import first_arg_dependent_lru_cache as cache
+    old_max_entries = cache.max_entries
+    cache.clear()
+
+    try:
+        cache.max_entries = 2
+        stats = cache.get_stats()
+
+        a_gpu = cl_array.arange(queue, 100, dtype=np.float32)
+        for i in range(2):
+            (a_gpu + 1).get()
+        assert cache.get_stats()["hits"] > stats["hits"]
+
+        for dtype in [np.int32, np.int64, np.float32]:
+            (a_gpu.astype(dtype) * 2).get()
+
+        stats = cache.get_stats()
+        assert stats["entries"] <= 2
+        assert stats["evictions"] > 0
+
+        cache.discard(context)
+        assert len(cache) == 0
+    finally:
+        cache.max_entries = old_max_entries
+
 # }}}
 
 
@@ -257,6 +287,26 @@ def test_sum(ctx_factory):
             assert abs(sum_a_gpu_2 - sum_a) / abs(sum_a) < 1e-4
 
 
+def test_sum_repeated(ctx_factory):
+    from pytest import importorskip
+    importorskip("mako")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    # Several multi-group reductions in flight on the same queue, which
+    # share scratch space if reductions run in a single pass.
+    arrays = [clrand(queue, (n,), np.float32)
+            for n in [20000, 200000, 1000000, 30000]]
+    results = [cl_array.sum(a_gpu) for a_gpu in arrays]
+
+    for a_gpu, result in zip(arrays, results):
+        sum_a = np.sum(a_gpu.get())
+        assert abs(result.get() - sum_a) / abs(sum_a) < 1e-4
+
+
 def test_sum_without_data(ctx_factory):
     from pytest import importorskip
     importorskip("mako")
@@ -391,6 +441,88 @@ def test_dot(ctx_factory):
             assert rel_err < 1e-4, rel_err
 
 
+def test_fused_reduction(ctx_factory):
+    from pytest import importorskip
+    importorskip("mako")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    n = 200000
+    a_gpu = clrand(queue, (n,), np.float32)
+    b_gpu = clrand(queue, (n,), np.float32)
+    a = a_gpu.get()
+    b = b_gpu.get()
+
+    x = cl_array.lazy(a_gpu)
+    resid = x*x - b_gpu
+
+    sum_ref = np.sum(a*a - b)
+    sum_gpu = cl_array.sum(resid).get()
+    assert abs(sum_gpu - sum_ref) / abs(sum_ref) < 1e-4
+
+    dot_ref = np.dot(a*a - b, a*a - b)
+    dot_gpu = cl_array.dot(resid, resid).get()
+    assert abs(dot_gpu - dot_ref) / abs(dot_ref) < 1e-4
+
+    dot_gpu = cl_array.vdot(2*x, b_gpu).get()
+    assert abs(dot_gpu - 2*np.dot(a, b)) / abs(dot_gpu) < 1e-4
+
+    for what in ["min", "max"]:
+        op_ref = getattr(np, what)(a - 3*b)
+        op_gpu = getattr(cl_array, what)(x - 3*b_gpu).get()
+        assert abs(op_gpu - op_ref) < 1e-5, (op_gpu, op_ref, what)
+
+    # complex expressions are materialized first
+    c_gpu = general_clrand(queue, (n,), np.complex64)
+    c = c_gpu.get()
+    sum_ref = np.sum(c*a)
+    sum_gpu = cl_array.sum(cl_array.lazy(c_gpu)*a_gpu).get()
+    assert abs(sum_gpu - sum_ref) / abs(sum_ref) < 1e-4
+
+
+def test_axis_reduction(ctx_factory):
+    from pytest import importorskip
+    importorskip("mako")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    a_gpu = clrand(queue, (30, 200, 7), np.float32)
+    b_gpu = clrand(queue, (30, 200, 7), np.float32)
+    a = a_gpu.get()
+    b = b_gpu.get()
+
+    for axis in [0, 1, 2, -1]:
+        sum_ref = np.sum(a, axis=axis)
+        sum_gpu = cl_array.sum(a_gpu, axis=axis).get()
+        assert sum_gpu.shape == sum_ref.shape
+        assert la.norm(sum_gpu - sum_ref) / la.norm(sum_ref) < 1e-5
+
+        for what in ["min", "max"]:
+            op_ref = getattr(np, what)(a, axis=axis)
+            op_gpu = getattr(cl_array, what)(a_gpu, axis=axis).get()
+            assert (op_gpu == op_ref).all(), what
+
+        dot_ref = np.sum(a*b, axis=axis)
+        dot_gpu = cl_array.dot(a_gpu, b_gpu, axis=axis).get()
+        assert la.norm(dot_gpu - dot_ref) / la.norm(dot_ref) < 1e-5
+
+    # non-contiguous input: row- and column-wise reductions of a transposed
+    # slice
+    a_gpu = clrand(queue, (1000, 300), np.float32)
+    a = a_gpu.get()
+
+    for axis in [0, 1]:
+        sum_ref = np.sum(a.T[:, 5:900:3], axis=axis)
+        sum_gpu = cl_array.sum(a_gpu.T[:, 5:900:3], axis=axis).get()
+        assert la.norm(sum_gpu - sum_ref) / la.norm(sum_ref) < 1e-5
+
+
 @memoize
 def make_mmc_dtype(device):
     dtype = np.dtype([
@@ -469,6 +601,86 @@ def test_struct_reduce(ctx_factory):
     assert abs(minmax["cur_min"] - np.min(a)) < 1e-5
     assert abs(minmax["cur_max"] - np.max(a)) < 1e-5
 
+
+def test_async_build(ctx_factory):
+    pytest.importorskip("concurrent.futures")
+    pytest.importorskip("mako")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.elementwise import ElementwiseKernel
+    from pyopencl.reduction import ReductionKernel
+    from pyopencl.scan import GenericScanKernel
+
+    # unusual names to avoid retrieving the kernels from in-memory caches
+    twice = ElementwiseKernel(context,
+            "int *a", "a[i] = 2*a[i]", name="async_twice", async_build=True)
+    total = ReductionKernel(context, np.int32, neutral="0",
+            reduce_expr="a+b", map_expr="a[i]", arguments="__global int *a",
+            name="async_total", async_build=True)
+    cumsum = GenericScanKernel(context, np.int32,
+            arguments="__global int *a, __global int *out",
+            input_expr="a[i]", scan_expr="a+b", neutral="0",
+            output_statement="out[i] = item;", name_prefix="async_cumsum",
+            async_build=True)
+
+    prg_future = cl.Program(context, """
+        __kernel void async_zero(__global int *a)
+        { a[get_global_id(0)] = 0; }
+        """).build_async()
+
+    a = np.arange(1000, dtype=np.int32)
+    a_gpu = cl_array.to_device(queue, a)
+
+    twice(a_gpu)
+    assert (a_gpu.get() == 2*a).all()
+    assert total(a_gpu).get() == np.sum(2*a)
+
+    out_gpu = cl_array.empty_like(a_gpu)
+    cumsum(a_gpu, out_gpu)
+    assert (out_gpu.get() == np.cumsum(2*a)).all()
+
+    prg_future.result().async_zero(queue, a.shape, None, a_gpu.data)
+    assert (a_gpu.get() == 0).all()
+
+    broken = ElementwiseKernel(context,
+            "int *a", "a[i] = undefined_name", async_build=True)
+    with pytest.raises(cl.RuntimeError):
+        broken(a_gpu)
+
+
+def test_multi_reduction(ctx_factory):
+    pytest.importorskip("mako")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+    a_gpu = clrand(queue, (300000,), np.float32)
+    a = a_gpu.get()
+
+    a_sum, a_sum_sq, a_min, a_max = cl_array.multi_reduce(
+            a_gpu, ["sum", "sum_squares", "min", "max"])
+
+    assert abs(a_sum.get() - np.sum(a)) / np.sum(a) < 1e-4
+    assert abs(a_sum_sq.get() - np.sum(a*a)) / np.sum(a*a) < 1e-4
+    assert a_min.get() == np.min(a)
+    assert a_max.get() == np.max(a)
+
+    from pyopencl.reduction import MultiReductionKernel
+    krnl = MultiReductionKernel(context, [
+        (np.int32, "0", "a+b", "x[i] > 0.5f"),
+        (np.float32, "0", "a+b", "x[i]*y[i]"),
+        ], arguments="__global float *x, __global float *y")
+
+    b_gpu = clrand(queue, a_gpu.shape, np.float32)
+    b = b_gpu.get()
+
+    count, dot = krnl(a_gpu, b_gpu)
+    assert count.get() == np.sum(a > 0.5)
+    assert abs(dot.get() - np.dot(a, b)) / np.dot(a, b) < 1e-4
+
 # }}}
 
 
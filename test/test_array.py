@@ -574,6 +574,40 @@ def test_bitwise(ctx_factory):
         res = ~a  # pylint:disable=invalid-unary-operand-type
         assert (res_dev.get() == res).all()
 
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64])
+def test_lazy_fusion(ctx_factory, dtype):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    import pyopencl.clmath as clmath
+
+    n = 10000
+    a_dev, b_dev, c_dev = [general_clrand(queue, (n,), dtype) for i in range(3)]
+    a, b, c = [x_dev.get() for x_dev in (a_dev, b_dev, c_dev)]
+
+    x = cl_array.lazy(a_dev)
+    y = x - 2
+
+    result = (y*y + 3*cl_array.lazy(b_dev)/c_dev - clmath.exp(x)).evaluate()
+    assert isinstance(result, cl_array.Array)
+    assert result.dtype == dtype
+
+    ref = (a - 2)**2 + 3*b/c - np.exp(a)
+    assert la.norm(result.get() - ref) / la.norm(ref) < 1e-5
+
+    # evaluate into a given array, with a different scalar
+    out = cl_array.empty_like(a_dev)
+    result = (-abs(x) * 5 + b_dev).evaluate(out=out)
+    assert result is out
+    assert la.norm(out.get() - (-abs(a)*5 + b)) / la.norm(b) < 1e-5
+
+    # mixed types
+    i_dev = cl_array.arange(queue, n, dtype=np.int32)
+    result = (x*i_dev + 1).get()
+    assert la.norm(result - (a*np.arange(n, dtype=np.int32) + 1)) \
+            / la.norm(result) < 1e-5
+
 # }}}
 
 
@@ -1092,6 +1126,289 @@ def test_transpose(ctx_factory):
     assert np.array_equal(a_gpu.T.get(), a.T)
 
 
+def test_strided_elwise(ctx_factory):
+    if _PYPY:
+        pytest.xfail("numpypy: no array creation from __array_interface__")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    a_gpu = clrand(queue, (3000,), dtype=np.float32)
+    b_gpu = clrand(queue, (3000,), dtype=np.float32)
+    a = a_gpu.get()
+    b = b_gpu.get()
+
+    result = a_gpu[::2] + b_gpu[1::2]
+    assert result.flags.c_contiguous
+    assert np.allclose(result.get(), a[::2] + b[1::2])
+    assert np.allclose((2*a_gpu[::3] + 1).get(), 2*a[::3] + 1)
+
+    c_gpu = a_gpu.reshape(30, 100)
+    d_gpu = b_gpu.reshape(100, 30)
+    c = a.reshape(30, 100)
+    d = b.reshape(100, 30)
+    assert np.allclose((c_gpu.T + d_gpu).get(), c.T + d)
+    assert np.allclose((c_gpu[::2, 10:60] * 3).get(), c[::2, 10:60] * 3)
+
+    # assignment into a non-contiguous view
+    c_gpu[:, ::4] = 0
+    c[:, ::4] = 0
+    c_gpu[::3, 1::4] = d_gpu[:10, :25]
+    c[::3, 1::4] = d[:10, :25]
+    assert np.array_equal(c_gpu.get(), c)
+
+    from pyopencl.elementwise import ElementwiseKernel
+    knl = ElementwiseKernel(context,
+            "float *z, float *x, float a",
+            "z[i] = a*x[i]")
+    z_gpu = cl_array.empty(queue, 1500, np.float32)
+    knl(z_gpu, b_gpu[::2], 5)
+    assert np.allclose(z_gpu.get(), 5*b[::2])
+
+    knl = ElementwiseKernel(context,
+            "float *z, float *x",
+            "z[i] = x[n-1-i]")
+    with pytest.raises(RuntimeError):
+        knl(z_gpu, b_gpu[::2])
+
+
+def test_broadcasting(ctx_factory):
+    if _PYPY:
+        pytest.xfail("numpypy: no array creation from __array_interface__")
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    a_gpu = clrand(queue, (200, 30), dtype=np.float32)
+    row_gpu = clrand(queue, (30,), dtype=np.float32)
+    col_gpu = clrand(queue, (200, 1), dtype=np.float32)
+    a = a_gpu.get()
+    row = row_gpu.get()
+    col = col_gpu.get()
+
+    assert np.allclose((a_gpu + row_gpu).get(), a + row)
+    assert np.allclose((row_gpu - a_gpu).get(), row - a)
+    assert np.allclose((a_gpu * col_gpu).get(), a * col)
+    assert np.allclose((a_gpu / row_gpu).get(), a / row)
+    assert np.allclose((col_gpu + row_gpu).get(), col + row)
+    assert np.array_equal((a_gpu < row_gpu).get(), (a < row).astype(np.int8))
+    assert np.allclose(cl_array.maximum(a_gpu, row_gpu).get(),
+            np.maximum(a, row))
+
+    # centering
+    centered_gpu = a_gpu.mul_add(1, col_gpu, -1)
+    assert np.allclose(centered_gpu.get(), a - col)
+
+    a_gpu -= row_gpu
+    assert np.allclose(a_gpu.get(), a - row)
+
+    with pytest.raises(ValueError):
+        a_gpu + col_gpu[:100]
+    with pytest.raises(ValueError):
+        row_gpu += a_gpu
+
+
+def test_arithmetic_out(ctx_factory):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+
+    a_gpu = clrand(queue, (50, 20), dtype=np.float32)
+    b_gpu = clrand(queue, (50, 20), dtype=np.float32) + 1
+    row_gpu = clrand(queue, (20,), dtype=np.float32)
+    a = a_gpu.get()
+    b = b_gpu.get()
+    row = row_gpu.get()
+
+    out_gpu = cl_array.empty_like(a_gpu)
+
+    for func, np_func in [
+            (cl_array.add, np.add),
+            (cl_array.subtract, np.subtract),
+            (cl_array.multiply, np.multiply),
+            (cl_array.divide, np.divide),
+            (cl_array.power, np.power),
+            ]:
+        assert func(a_gpu, b_gpu, out=out_gpu) is out_gpu
+        assert np.allclose(out_gpu.get(), np_func(a, b))
+
+        assert func(a_gpu, row_gpu, out=out_gpu) is out_gpu
+        assert np.allclose(out_gpu.get(), np_func(a, row))
+
+        assert func(a_gpu, 3, out=out_gpu) is out_gpu
+        assert np.allclose(out_gpu.get(), np_func(a, 3))
+
+        assert func(3, b_gpu, out=out_gpu) is out_gpu
+        assert np.allclose(out_gpu.get(), np_func(3, b))
+
+        assert np.allclose(func(a_gpu, b_gpu).get(), np_func(a, b))
+
+    assert a_gpu.mul_add(2, b_gpu, 3, out=out_gpu) is out_gpu
+    assert np.allclose(out_gpu.get(), 2*a + 3*b)
+
+    assert cl_array.maximum(a_gpu, b_gpu, out=out_gpu) is out_gpu
+    assert np.allclose(out_gpu.get(), np.maximum(a, b))
+
+    with pytest.raises(ValueError):
+        cl_array.add(a_gpu, b_gpu, out=out_gpu[:10])
+    with pytest.raises(TypeError):
+        cl_array.add(a_gpu, b_gpu,
+                out=cl_array.empty(queue, a.shape, np.float64))
+
+
+def test_elementwise_functions_out(ctx_factory):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    a = np.random.randint(-10, 10, (50, 20)).astype(np.int32)
+    b = np.random.randint(-10, 10, (50, 20)).astype(np.int32)
+    a_gpu = cl_array.to_device(queue, a)
+    b_gpu = cl_array.to_device(queue, b)
+
+    out_gpu = cl_array.empty_like(a_gpu)
+    for func, np_func in [
+            (cl_array.negative, np.negative),
+            (cl_array.absolute, np.absolute),
+            (cl_array.bitwise_not, np.invert),
+            ]:
+        assert func(a_gpu, out=out_gpu) is out_gpu
+        assert (out_gpu.get() == np_func(a)).all()
+
+    for func, np_func in [
+            (cl_array.bitwise_and, np.bitwise_and),
+            (cl_array.bitwise_or, np.bitwise_or),
+            (cl_array.bitwise_xor, np.bitwise_xor),
+            ]:
+        assert func(a_gpu, b_gpu, out=out_gpu) is out_gpu
+        assert (out_gpu.get() == np_func(a, b)).all()
+        assert func(3, b_gpu, out=out_gpu) is out_gpu
+        assert (out_gpu.get() == np_func(3, b)).all()
+
+    with pytest.raises(TypeError):
+        cl_array.bitwise_and(a_gpu.astype(np.float32), 1)
+
+    cmp_out_gpu = cl_array.empty(queue, a.shape, np.int8)
+    for func, np_func in [
+            (cl_array.equal, np.equal),
+            (cl_array.not_equal, np.not_equal),
+            (cl_array.less, np.less),
+            (cl_array.less_equal, np.less_equal),
+            (cl_array.greater, np.greater),
+            (cl_array.greater_equal, np.greater_equal),
+            ]:
+        assert func(a_gpu, b_gpu, out=cmp_out_gpu) is cmp_out_gpu
+        assert (cmp_out_gpu.get() == np_func(a, b)).all()
+        assert func(a_gpu, 2, out=cmp_out_gpu) is cmp_out_gpu
+        assert (cmp_out_gpu.get() == np_func(a, 2)).all()
+        assert func(2, b_gpu, out=cmp_out_gpu) is cmp_out_gpu
+        assert (cmp_out_gpu.get() == np_func(2, b)).all()
+
+    float_out_gpu = cl_array.empty(queue, a.shape, np.float32)
+    assert a_gpu.astype(np.float32, out=float_out_gpu) is float_out_gpu
+    assert (float_out_gpu.get() == a).all()
+
+    c = (a + 1j*b).astype(np.complex64)
+    c_gpu = cl_array.to_device(queue, c)
+    for func, np_func in [
+            (cl_array.real, np.real),
+            (cl_array.imag, np.imag),
+            ]:
+        assert func(c_gpu, out=float_out_gpu) is float_out_gpu
+        assert (float_out_gpu.get() == np_func(c)).all()
+
+    c_out_gpu = cl_array.empty_like(c_gpu)
+    assert cl_array.conj(c_gpu, out=c_out_gpu) is c_out_gpu
+    assert (c_out_gpu.get() == np.conj(c)).all()
+
+    cat_out_gpu = cl_array.empty(queue, (100, 20), np.int32)
+    assert cl_array.concatenate((a_gpu, b_gpu), out=cat_out_gpu) is cat_out_gpu
+    assert (cat_out_gpu.get() == np.concatenate((a, b))).all()
+
+    flat_a_gpu = a_gpu.reshape(a.size)
+    flat_out_gpu = cl_array.empty_like(flat_a_gpu)
+    assert cl_array.cumsum(flat_a_gpu, out=flat_out_gpu) is flat_out_gpu
+    assert (flat_out_gpu.get() == np.cumsum(a)).all()
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.int32, np.uint8])
+def test_vectorized_elwise(ctx_factory, dtype):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.elementwise import get_axpbyz_kernel, get_vectorized_elwise_kernel
+    dtype = np.dtype(dtype)
+    knl = get_axpbyz_kernel(context, dtype, dtype, dtype)
+    vector_knl, vector_width = get_vectorized_elwise_kernel(knl, queue.device)
+    print(dtype, vector_width)
+    assert (vector_knl is None) == (vector_width == 1)
+
+    # not a multiple of any vector width, to exercise the scalar tail
+    n = 100003
+    a = np.random.randint(0, 10, n).astype(dtype)
+    b = np.random.randint(0, 10, n).astype(dtype)
+    a_gpu = cl_array.to_device(queue, a)
+    b_gpu = cl_array.to_device(queue, b)
+
+    assert np.array_equal((a_gpu + b_gpu).get(), a + b)
+    assert np.array_equal((a_gpu - b_gpu).get(), a - b)
+    assert np.array_equal((a_gpu * b_gpu).get(), a * b)
+
+    # misaligned offsets fall back to the scalar kernel
+    assert np.array_equal((a_gpu[1:] + b_gpu[:-1]).get(), a[1:] + b[:-1])
+
+    c_gpu = cl_array.empty_like(a_gpu)
+    c_gpu[:] = a_gpu
+    assert np.array_equal(c_gpu.get(), a)
+    c_gpu.fill(7)
+    assert (c_gpu.get() == 7).all()
+
+
+def test_autotune(ctx_factory, tmpdir):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl import autotune
+    from pyopencl.elementwise import ElementwiseKernel
+
+    autotune_file = str(tmpdir.join("autotune.json"))
+    was_enabled = autotune.is_autotuning_enabled()
+    autotune.set_autotuning(True, autotune_file=autotune_file)
+
+    try:
+        a = np.random.rand(100000).astype(np.float32)
+        b = np.random.rand(100000).astype(np.float32)
+        a_gpu = cl_array.to_device(queue, a)
+        b_gpu = cl_array.to_device(queue, b)
+
+        # benchmarking must not affect in-place operations
+        a_gpu += b_gpu
+        assert np.allclose(a_gpu.get(), a + b)
+
+        knl = ElementwiseKernel(context,
+                "float *z, float *x", "z[i] = 2*x[i]")
+        knl(a_gpu, b_gpu)
+        assert np.allclose(a_gpu.get(), 2*b)
+        knl(a_gpu[:1000], b_gpu[:1000])
+
+        import json
+        with open(autotune_file) as inf:
+            results = json.load(inf)
+        assert len(results) >= 3
+
+        # results are reused from the file
+        autotune.set_autotuning(True, autotune_file=autotune_file)
+        knl(a_gpu, b_gpu)
+        with open(autotune_file) as inf:
+            assert json.load(inf) == results
+    finally:
+        autotune.set_autotuning(was_enabled)
+
+
 def test_newaxis(ctx_factory):
     context = ctx_factory()
     queue = cl.CommandQueue(context)
@@ -1243,6 +1560,127 @@ def test_get_async(ctx_factory):
     assert np.abs(b1 - b).mean() < 1e-5
 
 
+def test_pinned_host_pool_transfers(ctx_factory):
+    from pyopencl.tools import PinnedHostMemoryPool
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    host_pool = PinnedHostMemoryPool(queue)
+
+    a = np.random.rand(1000, 3).astype(np.float32)
+    a_gpu = cl_array.to_device(queue, a, host_pool=host_pool, async_=True)
+    a_gpu.set(2*a, host_pool=host_pool, async_=True)
+    queue.finish()
+
+    for i in range(3):
+        b = a_gpu.get(host_pool=host_pool)
+        assert b.shape == a.shape
+        assert (b == 2*a).all()
+        del b
+
+    # staging and result memory is recycled once the transfers' events
+    # are released
+    a_gpu.finish()
+    assert host_pool.active_blocks == 0
+    held_blocks = host_pool.held_blocks
+    assert held_blocks > 0
+
+    b, evt = a_gpu.get_async(host_pool=host_pool)
+    evt.wait()
+    assert (b == 2*a).all()
+    assert host_pool.held_blocks == held_blocks - 1
+
+    # views keep the memory of the array they refer to in use
+    b = a_gpu.get(host_pool=host_pool)
+    a_gpu.finish()
+    view = b[:, 0]
+    del b
+    assert host_pool.active_blocks == 1
+    c = host_pool.empty(a.shape, a.dtype)
+    c.fill(0)
+    assert (view == 2*a[:, 0]).all()
+    del view
+    del c
+    assert host_pool.active_blocks == 0
+
+    # non-C-contiguous arrays are transferred in their own storage order
+    a_f_gpu = cl_array.to_device(queue, np.asfortranarray(a))
+    b = a_f_gpu.get(host_pool=host_pool)
+    a_f_gpu.finish()
+    assert b.flags.f_contiguous
+    assert host_pool.active_blocks == 1
+    assert (b == a).all()
+
+    del b
+    host_pool.free_held()
+    assert host_pool.held_blocks == 0
+
+
+def test_stream_map(ctx_factory):
+    from pyopencl.streaming import stream_map
+
+    context = ctx_factory()
+    queues = [cl.CommandQueue(context) for i in range(3)]
+
+    a = np.random.rand(10000, 2).astype(np.float32)
+
+    def func(chunk):
+        return 2*chunk + 1
+
+    out = np.empty_like(a)
+    assert stream_map(queues, func, a, chunk_size=768, out=out) is out
+    assert np.allclose(out, 2*a + 1)
+
+    chunks = [a[:1000], a[1000:1500], a[1500:]]
+    results = list(stream_map(queues[:2], func, iter(chunks)))
+    assert [len(r) for r in results] == [1000, 500, 8500]
+    assert np.allclose(np.concatenate(results), 2*a + 1)
+
+
+def test_scalar_readback_batch(ctx_factory):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    from pyopencl.clrandom import rand as clrand
+    a_gpu = clrand(queue, (10**5,), np.float32)
+    b_gpu = clrand(queue, (10**5,), np.int32, a=0, b=1000)
+    a = a_gpu.get()
+    b = b_gpu.get()
+
+    batch = cl_array.ScalarReadbackBatch(queue)
+
+    for i in range(3):
+        # reusing staging buffers across flushes
+        with batch:
+            sum_a = batch.submit(cl_array.sum(a_gpu))
+            max_b = batch.submit(cl_array.max(b_gpu))
+            any_b = batch.submit((b_gpu > 500).any())
+
+        got_called = []
+        sum_a.add_done_callback(got_called.append)
+
+        assert abs(float(sum_a) - np.sum(a)) / np.sum(a) < 1e-4
+        assert max_b.result() == np.max(b)
+        assert bool(any_b) == (b > 500).any()
+        assert sum_a.done()
+
+        counter = 0
+        while not got_called:
+            from time import sleep
+            sleep(0.01)
+
+            counter += 1
+            if counter >= 500:
+                break
+
+        assert got_called == [sum_a]
+
+    # result() flushes if necessary
+    max_b = batch.submit(cl_array.max(b_gpu))
+    assert max_b.result() == np.max(b)
+
+
 def test_outoforderqueue_get(ctx_factory):
     context = ctx_factory()
     try:
@@ -446,6 +446,37 @@ def test_hankel_01_complex(ctx_factory, ref_src):
         pt.show()
 
 
+def test_clmath_out(ctx_factory):
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    a = np.random.rand(1000).astype(np.float32)
+    a_gpu = cl_array.to_device(queue, a)
+    out_gpu = cl_array.empty_like(a_gpu)
+
+    assert clmath.sin(a_gpu, out=out_gpu) is out_gpu
+    assert np.allclose(out_gpu.get(), np.sin(a), atol=1e-6)
+
+    # in-place
+    evt = cl.enqueue_marker(queue)
+    clmath.exp(out_gpu, out=out_gpu, wait_for=[evt])
+    assert np.allclose(out_gpu.get(), np.exp(np.sin(a)), atol=1e-6)
+
+    assert clmath.atan2(a_gpu, a_gpu + 1, out=out_gpu) is out_gpu
+    assert np.allclose(out_gpu.get(), np.arctan2(a, a + 1), atol=1e-6)
+
+    exponents_gpu = cl_array.empty(queue, a.shape, np.int32)
+    significands, exponents = clmath.frexp(a_gpu,
+            out=(out_gpu, exponents_gpu))
+    assert significands is out_gpu and exponents is exponents_gpu
+    assert np.allclose(np.ldexp(out_gpu.get(), exponents_gpu.get()), a)
+
+    with pytest.raises(ValueError):
+        clmath.sin(a_gpu, out=out_gpu[:10])
+    with pytest.raises(TypeError):
+        clmath.sin(a_gpu, out=exponents_gpu)
+
+
 def test_outoforderqueue_clmath(ctx_factory):
     context = ctx_factory()
     try:
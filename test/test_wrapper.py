@@ -573,6 +573,117 @@ def test_mempool_2(ctx_factory):
         assert asize < asize*(1+1/8)
 
 
+def test_mempool_stats_and_trim(ctx_factory):
+    from pyopencl.tools import MemoryPool, ImmediateAllocator
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    pool = MemoryPool(ImmediateAllocator(queue), leading_bits_in_bin_id=2)
+    assert pool.leading_bits_in_bin_id == 2
+
+    block_size = pool.alloc_size(pool.bin_number(1000))
+    bufs = [pool.allocate(1000) for i in range(4)]
+    assert pool.active_bytes == 4*block_size
+    assert pool.misses == 4
+
+    del bufs
+    stats = pool.get_stats()
+    assert stats["active_bytes"] == 0
+    assert stats["held_bytes"] == 4*block_size
+    assert stats["held_bytes_by_block_size"] == {block_size: 4*block_size}
+
+    buf = pool.allocate(1000)
+    assert pool.hits == 1
+    del buf
+
+    pool.max_held_bytes = 2*block_size
+    assert pool.held_bytes == 2*block_size
+
+    bufs = [pool.allocate(1000) for i in range(4)]
+    del bufs
+    assert pool.held_bytes == 2*block_size
+
+    pool.trim(0)
+    assert pool.held_blocks == 0
+
+    with pytest.raises(ValueError):
+        MemoryPool(ImmediateAllocator(queue), leading_bits_in_bin_id=40)
+
+
+def test_arena_allocator(ctx_factory):
+    from pyopencl.tools import ArenaAllocator
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    if queue._get_cl_version() < (1, 1) or cl.get_cl_header_version() < (1, 1):
+        pytest.skip("sub-buffers require OpenCL 1.1")
+
+    allocator = ArenaAllocator(context, arena_size=1 << 16)
+
+    a = cl_array.arange(queue, 10, dtype=np.float32, allocator=allocator)
+    b = cl_array.arange(queue, 10, dtype=np.float32, allocator=allocator)
+    assert allocator.active_blocks == 2
+
+    # The arena holding b is never released. Beyond that, at most two
+    # arenas are in use: the one holding the current a, and the one the
+    # next result goes to once that is full.
+    for i in range(1000):
+        a = a + b
+        assert allocator.arena_count <= 3
+
+    assert (a.get() == 1001*np.arange(10, dtype=np.float32)).all()
+
+    big = cl_array.empty(queue, 1 << 16, np.float32, allocator=allocator)
+    assert allocator.active_blocks == 2
+    del big
+
+    del a, b
+    queue.finish()
+    assert allocator.active_blocks == 0
+
+
+def test_queue_aware_mempool(ctx_factory):
+    from pyopencl.tools import QueueAwareMemoryPool, ImmediateAllocator
+
+    context = ctx_factory()
+    queue1 = cl.CommandQueue(context)
+    queue2 = cl.CommandQueue(context)
+
+    if queue1._get_cl_version() < (1, 1) or cl.get_cl_header_version() < (1, 1):
+        pytest.skip("sub-buffers require OpenCL 1.1")
+
+    pool = QueueAwareMemoryPool(ImmediateAllocator(queue1))
+
+    a = cl_array.arange(queue1, 1000, dtype=np.float32,
+            allocator=pool.get_allocator(queue1))
+    assert pool.active_blocks == 1
+    a.fill(3)
+    del a
+    assert pool.held_blocks == 1
+
+    # reused right away on the same queue
+    b = cl_array.empty(queue1, 1000, np.float32,
+            allocator=pool.get_allocator(queue1))
+    assert pool.held_blocks == 0
+    del b
+
+    # reused on another queue once the last use has completed
+    queue1.finish()
+    c = cl_array.empty(queue2, 1000, np.float32,
+            allocator=pool.get_allocator(queue2))
+    assert pool.held_blocks == 0
+    c.fill(1)
+    assert (c.get() == 1).all()
+
+    del c
+    queue2.finish()
+    pool.free_held()
+    assert pool.held_blocks == 0
+    assert pool.active_blocks == 0
+
+
 def test_vector_args(ctx_factory):
     context = ctx_factory()
     queue = cl.CommandQueue(context)
@@ -1142,6 +1253,279 @@ def test_threaded_nanny_events(ctx_factory):
     t2.join()
 
 
+def test_concurrent_binary_cache(ctx_factory, tmpdir):
+    import threading
+    from pyopencl.cache import create_built_program_from_source_cached
+
+    ctx = ctx_factory()
+    src = """
+        __kernel void twice(__global float *a)
+        { a[get_global_id(0)] *= 2; }
+        """
+    cache_dir = str(tmpdir)
+
+    def build():
+        create_built_program_from_source_cached(
+                ctx, src, b"", cache_dir=cache_dir)
+
+    threads = [threading.Thread(target=build) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    entries = [entry for entry in tmpdir.visit() if entry.isfile()]
+    assert len(entries) == len(ctx.devices)
+    assert not any(entry.basename.startswith(".tmp-")
+            for entry in entries)
+
+    _, was_cached = create_built_program_from_source_cached(
+            ctx, src, b"", cache_dir=cache_dir)
+    assert was_cached
+
+
+def test_binary_cache_pruning(ctx_factory, tmpdir):
+    from pyopencl.cache import (create_built_program_from_source_cached,
+            get_cache_stats, prune_cache)
+
+    ctx = ctx_factory()
+    cache_dir = str(tmpdir)
+
+    for i in range(3):
+        src = "__kernel void knl(__global float *a) { a[0] = %d; }" % i
+        create_built_program_from_source_cached(
+                ctx, src, b"", cache_dir=cache_dir)
+
+    stats = get_cache_stats(cache_dir)
+    assert stats["entries"] == 3 * len(ctx.devices)
+    assert stats["total_bytes"] > 0
+
+    _, was_cached = create_built_program_from_source_cached(
+            ctx, src, b"", cache_dir=cache_dir)
+    assert was_cached
+    assert get_cache_stats(cache_dir)["hits"] > stats["hits"]
+
+    # the most recently used program survives
+    assert prune_cache(cache_dir, max_size=stats["total_bytes"] // 2) > 0
+    _, was_cached = create_built_program_from_source_cached(
+            ctx, src, b"", cache_dir=cache_dir)
+    assert was_cached
+
+    prune_cache(cache_dir, max_size=0)
+    assert get_cache_stats(cache_dir)["entries"] == 0
+
+    # limits are enforced as programs are added
+    from pyopencl.cache import set_cache_limits
+    create_built_program_from_source_cached(ctx, src, b"", cache_dir=cache_dir)
+    max_size = int(2.5 * get_cache_stats(cache_dir)["total_bytes"])
+
+    set_cache_limits(max_size=max_size)
+    try:
+        for i in range(6):
+            src = "__kernel void knl(__global float *a) { a[1] = %d; }" % i
+            create_built_program_from_source_cached(
+                    ctx, src, b"", cache_dir=cache_dir)
+
+            assert get_cache_stats(cache_dir)["total_bytes"] <= max_size
+    finally:
+        set_cache_limits()
+
+
+def test_binary_cache_dependencies(ctx_factory, tmpdir):
+    from pyopencl.cache import create_built_program_from_source_cached
+
+    ctx = ctx_factory()
+    cache_dir = tmpdir.mkdir("cache")
+    include_dir = tmpdir.mkdir("include")
+    header = include_dir.join("value.h")
+
+    src = """
+        #include "value.h"
+        __kernel void knl(__global float *a) { a[0] = VALUE; }
+        """
+    options_bytes = ("-I %s" % include_dir).encode()
+
+    def build():
+        _, was_cached = create_built_program_from_source_cached(
+                ctx, src, options_bytes, cache_dir=str(cache_dir),
+                include_path=[str(include_dir)])
+        return was_cached
+
+    header.write("#define VALUE 1\n")
+    assert not build()
+    assert build()
+
+    # same contents, new modification time
+    header.setmtime(header.mtime() + 10)
+    assert build()
+
+    header.write("#define VALUE 2\n")
+    assert not build()
+
+
+def test_precompile_manifest(ctx_factory, tmpdir, monkeypatch):
+    pytest.importorskip("concurrent.futures")
+
+    from pyopencl.precompile import load_manifest, precompile
+
+    ctx = ctx_factory()
+    manifest = str(tmpdir.join("manifest.json"))
+    cache_dir = str(tmpdir.mkdir("cache"))
+
+    src = """
+        __kernel void recorded(__global float *a)
+        { a[get_global_id(0)] = 17; }
+        """
+
+    monkeypatch.setenv("PYOPENCL_RECORD_MANIFEST", manifest)
+    for i in range(2):
+        cl.Program(ctx, src).build(options=["-DRECORDED"],
+                cache_dir=str(tmpdir.mkdir("rec%d" % i)))
+    monkeypatch.delenv("PYOPENCL_RECORD_MANIFEST")
+
+    builds = load_manifest(manifest)
+    assert len(builds) == 1
+
+    # only the options given to build are recorded, not the ones that
+    # depend on the installation
+    assert builds[0]["options"] == ["-DRECORDED"]
+
+    built_count, cached_count, skipped_count = precompile(
+            builds, devices=ctx.devices, cache_dir=cache_dir)
+    assert built_count == len(ctx.devices)
+    assert skipped_count == 0
+
+    prg = cl.Program(ctx, src).build(options=["-DRECORDED"],
+            cache_dir=cache_dir)
+    _, was_cached, _ = prg._build_duration_info
+    assert was_cached
+
+
+def test_repeated_kernel_args(ctx_factory):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    prg = cl.Program(ctx, """
+        __kernel void fill(__global int *a, int value, float2 scale)
+        { a[get_global_id(0)] = value * (int) (scale.x + scale.y); }
+        """).build()
+    knl = prg.fill
+    knl.set_scalar_arg_dtypes([None, np.int32, cltypes.float2])
+
+    n = 100
+    a = cl_array.empty(queue, n, np.int32)
+    b = cl_array.empty(queue, n, np.int32)
+    scale = cltypes.make_float2(1, 1)
+
+    knl(queue, (n,), None, a.data, 1, scale)
+    knl(queue, (n,), None, a.data, 3, scale)
+    knl(queue, (n,), None, b.data, 3, scale)
+    assert (a.get() == 6).all()
+    assert (b.get() == 6).all()
+
+    # arguments set by hand must not be mistaken for those of the last call
+    knl.set_arg(1, np.int32(5))
+    knl.set_arg(0, a.data)
+    knl(queue, (n,), None, b.data, 3, scale)
+    assert (a.get() == 6).all()
+    assert (b.get() == 6).all()
+
+
+def test_overhead_benchmarks(ctx_factory):
+    import json
+    from pyopencl.characterize.overhead import run_overhead_benchmarks
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context,
+            properties=cl.command_queue_properties.PROFILING_ENABLE)
+
+    result = run_overhead_benchmarks(queue, desired_duration=0)
+    json.dumps(result)
+
+    assert set(result["benchmarks"]) == set([
+        "kernel_call", "elwise_kernel_runner", "array_add",
+        "reduction_kernel_call"])
+
+    for bench_result in result["benchmarks"].values():
+        assert bench_result["calls"] > 0
+        assert bench_result["host_seconds_per_call"] >= 0
+        assert bench_result["device_seconds_per_call"] is not None
+
+    assert result["benchmarks"]["kernel_call"][
+            "buffer_allocations_per_call"] == 0
+    assert result["benchmarks"]["array_add"][
+            "buffer_allocations_per_call"] == 1
+
+
+def test_command_graph(ctx_factory):
+    from pyopencl.graph import CommandGraph
+
+    context = ctx_factory()
+    queue = cl.CommandQueue(context)
+
+    prg = cl.Program(context, """
+        __kernel void axpy(__global float *y, __global const float *x,
+            float a)
+        {
+            int i = get_global_id(0);
+            y[i] += a*x[i];
+        }
+        """).build()
+    knl = prg.axpy
+    knl.set_scalar_arg_dtypes([None, None, np.float32])
+
+    n = 100
+    x = cl_array.empty(queue, n, np.float32).fill(1)
+    y = cl_array.empty(queue, n, np.float32)
+    z = cl_array.empty(queue, n, np.float32)
+
+    graph = CommandGraph(queue)
+    out = graph.parameter("out")
+    a = graph.parameter("a")
+    graph.add_fill(out, np.float32(0), 0, x.nbytes)
+    graph.add_kernel(knl, (n,), None, out, x, a)
+    graph.add_kernel(knl, (n,), None, out, x, 1)
+
+    graph(out=y.data, a=2)
+    graph(out=z.data, a=3)
+    queue.finish()
+    assert (y.get() == 3).all()
+    assert (z.get() == 4).all()
+
+    # unchanged parameters may be omitted
+    graph(out=y.data)
+    graph(a=5).wait()
+    assert (y.get() == 6).all()
+
+    with pytest.raises(TypeError):
+        graph(b=1)
+
+    # arrays with an offset are bound at that offset
+    dev = queue.device
+    offset_n = dev.mem_base_addr_align // 8 // x.dtype.itemsize
+    y_full = cl_array.zeros(queue, n + offset_n, np.float32)
+    y_part = y_full[offset_n:]
+    assert y_part.offset
+
+    graph = CommandGraph(queue)
+    out = graph.parameter("out")
+    graph.add_kernel(knl, (n,), None, out, x, np.float32(2))
+    graph(out=y_part).wait()
+
+    y_host = y_full.get()
+    assert (y_host[:offset_n] == 0).all()
+    assert (y_host[offset_n:] == 2).all()
+
+    # the graph keeps arguments that are not parameters alive
+    graph = CommandGraph(queue)
+    out = graph.parameter("out")
+    graph.add_kernel(knl, (n,), None, out,
+            cl_array.empty(queue, n, np.float32).fill(3).data, np.float32(1))
+    y.fill(0)
+    graph(out=y).wait()
+    assert (y.get() == 3).all()
+
+
 if __name__ == "__main__":
     # make sure that import failures get reported, instead of skipping the tests.
     import pyopencl  # noqa